@@ -1,9 +1,197 @@
-from flask import Flask, render_template, request, redirect, url_for
+import functools
+import hashlib
+import hmac
+import json
+import os
+import time
+from collections.abc import Iterable
+from datetime import date
+
+from flask import (
+    Flask, Response, abort, g, jsonify, make_response, render_template, request, redirect, stream_with_context,
+    url_for,
+)
+from markupsafe import Markup
+
+from quickdelivery import cache, db, feed, ingest, jobs, schema
 
 app = Flask(__name__)
 
-# Klanten opslag
-klanten_data = []
+# Zelfde database als de desktop-app; op de server via QUICKDELIVERY_DB te overschrijven
+DB_PATH = os.environ.get("QUICKDELIVERY_DB", str(db.DEFAULT_DB_PATH))
+# Eén pool per worker-proces; alle requests (greenlets) van de worker delen de verbindingen
+pool = db.ConnectionPool(DB_PATH)
+# Eén gedeelde poller per worker voor alle SSE-clients
+change_feed = feed.ChangeFeed(DB_PATH)
+# Publieke statuspagina: data en gerenderde HTML, geldig zolang er geen nieuw event is
+track_cache = cache.VersionedTTLCache()
+# Routeoptimalisatie buiten de request-threads
+job_runner = jobs.JobRunner(DB_PATH)
+
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 500
+# Commentaarregel naar stille streams zodat proxies de verbinding openhouden
+SSE_HEARTBEAT_S = 15
+# Gemiste events na Last-Event-ID worden per pagina ingehaald
+SSE_BACKLOG_PAGE_SIZE = 500
+BATCH_MAX_BYTES = 20 * 1024 * 1024
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+# Keepalive tijdens het wachten op een job-resultaat
+JOB_STREAM_HEARTBEAT_S = 15
+# Rollen die de API (klant- en bestelgegevens) mogen gebruiken
+API_ROLES = ("planner", "manager")
+
+
+class ApiError(Exception):
+    """Ongeldige parameter in een API-request (400)."""
+
+
+class AuthError(Exception):
+    """Geen of onjuiste inloggegevens (401) of een rol zonder API-toegang (403)."""
+
+    def __init__(self, message: str, status: int = 401):
+        super().__init__(message)
+        self.status = status
+
+
+@app.errorhandler(ApiError)
+def _api_error(exc):
+    return jsonify(error=str(exc)), 400
+
+
+@app.errorhandler(AuthError)
+def _auth_error(exc):
+    response = jsonify(error=str(exc))
+    if exc.status == 401:
+        response.headers["WWW-Authenticate"] = 'Basic realm="QuickDelivery API"'
+    return response, exc.status
+
+
+@app.errorhandler(ingest.IngestError)
+def _ingest_error(exc):
+    return jsonify(error=str(exc)), 400
+
+
+@app.errorhandler(ingest.PayloadTooLarge)
+def _payload_too_large(exc):
+    return jsonify(error=str(exc)), 413
+
+
+@app.errorhandler(jobs.JobError)
+def _job_error(exc):
+    return jsonify(error=str(exc)), 400
+
+
+@app.errorhandler(jobs.QueueFull)
+def _job_queue_full(exc):
+    response = jsonify(error=str(exc))
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
+
+@app.errorhandler(db.SchemaError)
+def _schema_error(exc):
+    return jsonify(error=str(exc)), 503
+
+
+def _int_arg(name: str, default: int | None = None) -> int | None:
+    value = request.args.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(f"{name} moet een geheel getal zijn") from None
+
+
+def _date_arg(name: str) -> str | None:
+    value = request.args.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ApiError(f"{name} moet een datum zijn (JJJJ-MM-DD)") from None
+
+
+def _page_args() -> tuple[int, int]:
+    after_id = _int_arg("after_id", 0)
+    limit = _int_arg("limit", API_DEFAULT_LIMIT)
+    if limit < 1:
+        raise ApiError("limit moet minimaal 1 zijn")
+    return after_id, min(limit, API_MAX_LIMIT)
+
+
+def _keyset_page(conn, sql: str, params: list, after_id: int, limit: int) -> dict:
+    """Voert een query uit met 'id > after_id' paginering (geen OFFSET)."""
+    rows = conn.execute(
+        f"{sql} AND id > ? ORDER BY id LIMIT ?", params + [after_id, limit + 1]
+    ).fetchall()
+    items = [dict(row) for row in rows[:limit]]
+    next_after_id = items[-1]["id"] if len(rows) > limit else None
+    return {"items": items, "next_after_id": next_after_id}
+
+
+def _cached_json(tables: tuple, build):
+    """JSON-antwoord met ETag op basis van table_versions.
+
+    Bij een passende If-None-Match wordt alleen de versietabel gelezen en
+    volgt een 304 zonder de eigenlijke query uit te voeren.
+    """
+    with pool.connection() as conn:
+        versions = db.table_versions(conn, tables)
+        raw = f"{request.full_path}|{sorted(versions.items())}"
+        etag = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+        if request.if_none_match.contains(etag):
+            response = make_response("", 304)
+        else:
+            response = jsonify(build(conn))
+    response.set_etag(etag)
+    # Altijd opnieuw valideren; de 304 is goedkoop
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _authenticate() -> dict:
+    """Gebruiker uit HTTP Basic: e-mail en wachtwoord van een account in users."""
+    auth = request.authorization
+    if auth is None or auth.type != "basic" or not auth.username or auth.password is None:
+        raise AuthError("Inloggen vereist")
+    with pool.connection() as conn:
+        row = conn.execute(
+            "SELECT id, email, password, role FROM users WHERE lower(email) = lower(?)", (auth.username,)
+        ).fetchone()
+    # Ook zonder account een vergelijking, zodat de responstijd niets verraadt
+    expected = row["password"] if row is not None else ""
+    valid = hmac.compare_digest(expected.encode("utf-8"), auth.password.encode("utf-8"))
+    if row is None or not valid:
+        raise AuthError("Onjuist e-mailadres of wachtwoord")
+    if row["role"] not in API_ROLES:
+        raise AuthError("Geen toegang tot de API voor deze rol", 403)
+    return {"id": row["id"], "email": row["email"], "role": row["role"]}
+
+
+def api_login_required(view):
+    """Alleen voor planners en managers; de gebruiker staat daarna in g.api_user."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.api_user = _authenticate()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _prepare_database():
+    """Schema bijwerken bij het starten; op de server is geen desktop-app die dat doet."""
+    conn = db.connect(DB_PATH)
+    try:
+        schema.migrate(conn)
+    finally:
+        conn.close()
+
+
+_prepare_database()
 
 
 @app.route("/")
@@ -19,17 +207,17 @@ def klanten():
         contact = request.form.get("contact", "").strip()
 
         if naam and adres:
-            klanten_data.append(
-                {
-                    "id": len(klanten_data) + 1,
-                    "naam": naam,
-                    "adres": adres,
-                    "contact": contact,
-                }
-            )
+            with pool.connection() as conn:
+                with conn:
+                    conn.execute(
+                        "INSERT INTO klanten (naam, adres, contact) VALUES (?, ?, ?)",
+                        (naam, adres, contact),
+                    )
 
         return redirect(url_for("klanten"))
 
+    with pool.connection() as conn:
+        klanten_data = [dict(row) for row in conn.execute("SELECT id, naam, adres, contact FROM klanten ORDER BY id")]
     return render_template("klanten.html", current_page="klanten", klanten=klanten_data)
 
 
@@ -48,7 +236,354 @@ def tracking():
     return render_template("tracking.html", current_page="tracking")
 
 
+# ---------- JSON API ----------
+
+@app.route("/api/klanten")
+@api_login_required
+def api_klanten():
+    after_id, limit = _page_args()
+    sql = "SELECT id, naam, adres, contact FROM klanten WHERE 1=1"
+    params = []
+    zoek = request.args.get("q", "").strip()
+    if zoek:
+        sql += " AND naam LIKE ?"
+        params.append(f"%{zoek}%")
+    return _cached_json(("klanten",), lambda conn: _keyset_page(conn, sql, params, after_id, limit))
+
+
+@app.route("/api/bestellingen")
+@api_login_required
+def api_bestellingen():
+    after_id, limit = _page_args()
+    sql = "SELECT id, klant, ophaal, aflever, datum, status, chauffeur_id FROM bestellingen WHERE 1=1"
+    params = []
+    for kolom in ("status", "klant"):
+        waarde = request.args.get(kolom, "").strip()
+        if waarde:
+            sql += f" AND {kolom} = ?"
+            params.append(waarde)
+    chauffeur_id = _int_arg("chauffeur_id")
+    if chauffeur_id is not None:
+        sql += " AND chauffeur_id = ?"
+        params.append(chauffeur_id)
+    datum_van = _date_arg("datum_van")
+    if datum_van:
+        sql += " AND datum_dag >= ?"
+        params.append(datum_van)
+    datum_tot = _date_arg("datum_tot")
+    if datum_tot:
+        sql += " AND datum_dag <= ?"
+        params.append(datum_tot)
+    return _cached_json(("bestellingen",), lambda conn: _keyset_page(conn, sql, params, after_id, limit))
+
+
+@app.route("/api/chauffeurs")
+@api_login_required
+def api_chauffeurs():
+    after_id, limit = _page_args()
+    sql = "SELECT id, naam, voertuig, beschikbaar FROM chauffeurs WHERE 1=1"
+    params = []
+    beschikbaar = _int_arg("beschikbaar")
+    if beschikbaar is not None:
+        sql += " AND beschikbaar = ?"
+        params.append(1 if beschikbaar else 0)
+    return _cached_json(("chauffeurs",), lambda conn: _keyset_page(conn, sql, params, after_id, limit))
+
+
+@app.route("/api/status_events")
+@api_login_required
+def api_status_events():
+    after_id, limit = _page_args()
+    sql = "SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events WHERE 1=1"
+    params = []
+    bestelling_id = _int_arg("bestelling_id")
+    if bestelling_id is not None:
+        sql += " AND bestelling_id = ?"
+        params.append(bestelling_id)
+    return _cached_json(("status_events",), lambda conn: _keyset_page(conn, sql, params, after_id, limit))
+
+
+@app.route("/api/bestellingen/<int:bestelling_id>/events")
+@api_login_required
+def api_bestelling_events(bestelling_id: int):
+    after_id, limit = _page_args()
+    # Volledige historie: gearchiveerde events staan in status_events_archive
+    sql = (
+        "SELECT * FROM ("
+        " SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events_archive WHERE bestelling_id = ?"
+        " UNION ALL"
+        " SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events WHERE bestelling_id = ?"
+        ") WHERE 1=1"
+    )
+    return _cached_json(
+        ("status_events",),
+        lambda conn: _keyset_page(conn, sql, [bestelling_id, bestelling_id], after_id, limit),
+    )
+
+
+@app.route("/api/bestellingen/batch", methods=["POST"])
+@api_login_required
+def api_bestellingen_batch():
+    """JSON array of NDJSON; per record het resultaat (created, duplicate of invalid).
+
+    idempotency_key geldt per ingelogde gebruiker (één account per webshop-koppeling).
+    """
+    if request.content_length is not None and request.content_length > BATCH_MAX_BYTES:
+        # Snel afwijzen; zonder Content-Length (chunked) telt read_body/read_lines
+        raise ingest.PayloadTooLarge(f"Aanvraag groter dan {BATCH_MAX_BYTES} bytes")
+    if request.mimetype in NDJSON_TYPES:
+        # Regel voor regel uit de stream, zonder de hele body als tekst in het geheugen
+        records = ingest.parse_ndjson(ingest.read_lines(request.stream, BATCH_MAX_BYTES))
+    else:
+        records = ingest.parse_json_array(ingest.read_body(request.stream, BATCH_MAX_BYTES))
+    with pool.connection() as conn:
+        results = ingest.ingest(conn, records, g.api_user["id"])
+    summary = {kind: sum(1 for r in results if r["result"] == kind) for kind in ("created", "duplicate", "invalid")}
+    return jsonify(**summary, results=results)
+
+
+# ---------- Routeoptimalisatie (jobs) ----------
+
+@app.route("/api/jobs", methods=["POST"])
+@api_login_required
+def api_jobs_submit():
+    """{"stops": [{"id", "aflever"}, ...]} of {"dag": "JJJJ-MM-DD"}; 202 met job-id, 200 bij hergebruik."""
+    soort, invoer = jobs.parse_request(request.get_json(silent=True))
+    with pool.connection() as conn:
+        job, reused = job_runner.submit(conn, soort, invoer)
+    response = jsonify(**job, hergebruikt=reused)
+    response.headers["Location"] = url_for("api_job", job_id=job["id"])
+    return response, 200 if reused else 202
+
+
+def _load_job(job_id: str) -> dict:
+    with pool.connection() as conn:
+        job = job_runner.get(conn, job_id)
+    if job is None:
+        abort(404)
+    return job
+
+
+@app.route("/api/jobs/<job_id>")
+@api_login_required
+def api_job(job_id: str):
+    return jsonify(_load_job(job_id))
+
+
+@app.route("/api/jobs/<job_id>/stream")
+@api_login_required
+def api_job_stream(job_id: str):
+    """SSE: een 'job' event zodra de job klaar (of mislukt) is, daarna sluit de stream."""
+    job = _load_job(job_id)
+
+    def stream(job):
+        last_ping = time.monotonic()
+        while job["status"] == "bezig":
+            # Niet langer wachten dan tot de job verloopt; get() markeert hem dan als mislukt
+            remaining = job["aangemaakt_op"] + jobs.JOB_TIMEOUT_S - time.time()
+            job_runner.wait(job_id, max(0.0, min(JOB_STREAM_HEARTBEAT_S, remaining)))
+            job = _load_job(job_id)
+            if job["status"] == "bezig" and time.monotonic() - last_ping >= JOB_STREAM_HEARTBEAT_S:
+                last_ping = time.monotonic()
+                yield ": ping\n\n"
+        yield f"event: job\ndata: {json.dumps(job)}\n\n"
+
+    return Response(
+        stream_with_context(stream(job)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------- Publieke statuspagina ----------
+
+def _track_version(conn, bestelling_id: int):
+    # Index (bestelling_id, id): één lookup, goedkoper dan de hele bestelling opbouwen
+    return conn.execute("SELECT MAX(id) FROM status_events WHERE bestelling_id = ?", (bestelling_id,)).fetchone()[0]
+
+
+def _track_data(conn, bestelling_id: int) -> dict | None:
+    """Alleen status, datum, ETA en historie; geen namen of adressen."""
+    order = conn.execute(
+        "SELECT id, status, datum, datum_dag, chauffeur_id FROM bestellingen WHERE id = ?", (bestelling_id,)
+    ).fetchone()
+    if order is None:
+        return None
+    events = conn.execute(
+        "SELECT status, timestamp FROM ("
+        " SELECT id, status, timestamp FROM status_events_archive WHERE bestelling_id = ?"
+        " UNION ALL SELECT id, status, timestamp FROM status_events WHERE bestelling_id = ?"
+        ") ORDER BY id",
+        (bestelling_id, bestelling_id),
+    ).fetchall()
+    eta = None
+    if order["chauffeur_id"] is not None:
+        # Alleen een actuele (niet verouderde) route levert een ETA
+        row = conn.execute(
+            """
+            SELECT rs.eta FROM route_stops rs
+            JOIN route_plans rp ON rp.chauffeur_id = rs.chauffeur_id AND rp.dag = rs.dag AND rp.stale = 0
+            WHERE rs.chauffeur_id = ? AND rs.dag = COALESCE(?, '') AND rs.bestelling_id = ?
+            """,
+            (order["chauffeur_id"], order["datum_dag"], bestelling_id),
+        ).fetchone()
+        eta = row["eta"] if row else None
+    return {
+        "id": order["id"],
+        "status": order["status"],
+        "datum": order["datum"],
+        "eta": eta,
+        "events": [dict(event) for event in events],
+    }
+
+
+def _cached_track(kind: str, bestelling_id: int, build) -> tuple[str, str, bool]:
+    """Haalt de JSON- of HTML-tekst uit track_cache; bouwt opnieuw bij een nieuw event of na de TTL.
+
+    Geeft (tekst, etag, hit); lege tekst betekent dat de bestelling niet bestaat.
+    De ETag wordt één keer per opbouw berekend en staat mee in de cache.
+    """
+    with pool.connection() as conn:
+        version = _track_version(conn, bestelling_id)
+        entry = track_cache.get((kind, bestelling_id), version)
+        if entry is not None:
+            return (*entry, True)
+        body = build(conn)
+    entry = (body, hashlib.sha1(body.encode("utf-8")).hexdigest()[:24])
+    track_cache.put((kind, bestelling_id), version, entry)
+    return (*entry, False)
+
+
+def _track_response(etag: str, hit: bool, mimetype: str, render) -> Response:
+    """304 als de client deze versie al heeft; anders render() als body."""
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = Response(render(), mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return response
+
+
+@app.route("/api/track/<int:bestelling_id>")
+def api_track(bestelling_id: int):
+    def build(conn):
+        order = _track_data(conn, bestelling_id)
+        return app.json.dumps(order) if order else ""
+
+    body, etag, hit = _cached_track("json", bestelling_id, build)
+    if not body:
+        abort(404)
+    return _track_response(etag, hit, "application/json", lambda: body)
+
+
+@app.route("/track/<int:bestelling_id>")
+def track(bestelling_id: int):
+    def build(conn):
+        order = _track_data(conn, bestelling_id)
+        return render_template("_track_status.html", order=order) if order else ""
+
+    fragment, etag, hit = _cached_track("html", bestelling_id, build)
+    if not fragment:
+        abort(404)
+    # De pagina rond het fragment is vast, dus de ETag van het fragment volstaat
+    return _track_response(
+        etag, hit, "text/html",
+        lambda: render_template("track.html", current_page="tracking", fragment=Markup(fragment)),
+    )
+
+
+# ---------- Live tracking (server-sent events) ----------
+
+def _last_event_id() -> int | None:
+    value = request.headers.get("Last-Event-ID", "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: status\ndata: {json.dumps(event)}\n\n"
+
+
+def _event_stream(sub: feed.Subscription, backlog: Iterable[dict]):
+    """Eerst de gemiste events, daarna wat de gedeelde feed doorgeeft."""
+    seen_id = 0
+    try:
+        yield f"retry: {int(feed.POLL_INTERVAL_S * 4000)}\n\n"
+        for event in backlog:
+            seen_id = event["id"]
+            yield _sse(event)
+        while not sub.overflowed:
+            event = sub.get(timeout=SSE_HEARTBEAT_S)
+            if event is None:
+                yield ": ping\n\n"
+            elif event["id"] > seen_id:
+                # Kan al in de backlog gezeten hebben (abonnement loopt vóór de backlog-query)
+                seen_id = event["id"]
+                yield _sse(event)
+        # Te ver achter: client verbindt opnieuw met Last-Event-ID en haalt de rest in
+    finally:
+        change_feed.unsubscribe(sub)
+
+
+def _sse_response(sub: feed.Subscription, backlog: Iterable[dict]) -> Response:
+    return Response(
+        stream_with_context(_event_stream(sub, backlog)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/tracking/<int:bestelling_id>/stream")
+def tracking_stream(bestelling_id: int):
+    last_id = _last_event_id() or 0
+    with pool.connection() as conn:
+        if conn.execute("SELECT 1 FROM bestellingen WHERE id = ?", (bestelling_id,)).fetchone() is None:
+            abort(404)
+        sub = change_feed.subscribe(bestelling_id)
+        try:
+            # Historie van deze bestelling (of alles na Last-Event-ID bij herverbinden)
+            backlog = [
+                dict(row)
+                for row in conn.execute(
+                    f"SELECT {feed.EVENT_COLUMNS} FROM ("
+                    f" SELECT {feed.EVENT_COLUMNS} FROM status_events_archive WHERE bestelling_id = ?"
+                    f" UNION ALL SELECT {feed.EVENT_COLUMNS} FROM status_events WHERE bestelling_id = ?"
+                    ") WHERE id > ? ORDER BY id",
+                    (bestelling_id, bestelling_id, last_id),
+                )
+            ]
+        except Exception:
+            change_feed.unsubscribe(sub)
+            raise
+    return _sse_response(sub, backlog)
+
+
+def _events_after(last_id: int):
+    """Alle status_events na last_id, per pagina gelezen tot de backlog bijgewerkt is."""
+    while True:
+        with pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {feed.EVENT_COLUMNS} FROM status_events WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, SSE_BACKLOG_PAGE_SIZE),
+            ).fetchall()
+        for row in rows:
+            yield dict(row)
+        if len(rows) < SSE_BACKLOG_PAGE_SIZE:
+            return
+        last_id = rows[-1]["id"]
+
+
+@app.route("/tracking/stream")
+@api_login_required
+def tracking_stream_all():
+    last_id = _last_event_id()
+    sub = change_feed.subscribe()
+    # Lazy: de verbinding wordt per pagina geleend, niet voor de hele stream
+    backlog = _events_after(last_id) if last_id is not None else ()
+    return _sse_response(sub, backlog)
+
+
 if __name__ == "__main__":
-    import os
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
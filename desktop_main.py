@@ -3,16 +3,763 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import csv
 import datetime
-from itertools import combinations
+import gzip
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 import shutil
 import os
 import sys
 
+from quickdelivery import routing, schema
+
+
+# Opstarten tot het loginscherm (warme start); bewaakt door tests/test_startup.py
+STARTUP_BUDGET_MS = 500
+# Andere database gebruiken (tests, tweede omgeving); zelfde variabele als app.py
+DB_PATH_ENV = "QUICKDELIVERY_DB"
+
+# Database worker: pollinterval voor resultaten en verversen van de statusregel
+DB_WORKER_POLL_MS = 20
+DB_STATS_INTERVAL_MS = 1000
+
+# Centrale refresh-timer: kort interval na een wijziging, daarna uitlopend tot het maximum
+REFRESH_MIN_MS = 1000
+REFRESH_MAX_MS = 16000
+LIVE_KLANT_PAGES = ("klant_dashboard", "klant_bestellingen")
+
+# Aantal bestellingen waarvan de eventgeschiedenis in het geheugen blijft
+EVENT_CACHE_SIZE = 256
+
+# Aantal rijen per pagina in de bestellingen tabellen
+PAGE_SIZE = 200
+# Bestellingen in de recente-events lijst van de klant
+KLANT_RECENT_LIMIT = 10
+SEARCH_DEBOUNCE_MS = 150
+
+# Status events van afgesloten bestellingen gaan na zoveel dagen naar het archief
+STATUS_EVENT_RETENTION_DAYS = 90
+RETENTION_CHUNK_SIZE = 500
+RETENTION_STEP_MS = 50
+RETENTION_INTERVAL_MS = 60 * 60 * 1000
+CLOSED_STATUSES = schema.CLOSED_STATUSES
+# Routedagen vanaf vandaag; '' zijn bestellingen zonder datum
+UPCOMING_DAG_SQL = "({col} >= date('now', 'localtime') OR {col} = '')"
+DATE_PRESETS = ("Alle", "Vandaag", "Deze week", "Vorige week", "Deze maand", "Vorige maand", "Aangepast")
+KPI_HIST_BUCKET_MIN = 5
+# Bestellingen met chauffeursnaam; gedeeld door de lijst- en de enkele lookup
+BESTELLING_SELECT_SQL = (
+    "SELECT b.id, b.klant, b.ophaal, b.aflever, b.datum, b.status, b.chauffeur_id, "
+    "COALESCE(c.naam, '') AS chauffeur_naam "
+    "FROM bestellingen b LEFT JOIN chauffeurs c ON c.id = b.chauffeur_id"
+)
+# KPI rollup van gewijzigde dagen: per stap een chunk dagen in de DB worker
+KPI_ROLLUP_CHUNK_DAYS = 50
+KPI_ROLLUP_STEP_MS = 50
+KPI_ROLLUP_INTERVAL_MS = 60 * 1000
+
+# Achtergrondtextuur: één tegel wordt gerenderd en over het venster herhaald
+TEXTURE_TILE_SIZE = 400
+TEXTURE_STEP = 5
+
+# Exports: bestandstype volgt uit de extensie, rijen worden per batch geschreven
+EXPORT_BATCH_SIZE = 2000
+EXPORT_FILETYPES = [
+    ("CSV files", "*.csv"),
+    ("CSV (gzip)", "*.csv.gz"),
+    ("JSON Lines", "*.jsonl"),
+    ("JSON Lines (gzip)", "*.jsonl.gz"),
+    ("All files", "*.*"),
+]
+
+# Imports: rijen per transactie en herkende kolomnamen (kleine letters)
+IMPORT_CHUNK_SIZE = 5000
+BESTELLING_STATUSES = schema.BESTELLING_STATUSES
+KLANT_ID_FOR_NAME_SQL = schema.KLANT_ID_FOR_NAME_SQL
+IMPORT_COLUMNS = {
+    "klanten": {
+        "naam": ("naam", "klant", "name"),
+        "adres": ("adres", "address"),
+        "contact": ("contact", "email", "telefoon"),
+    },
+    "bestellingen": {
+        "klant": ("klant", "klantnaam"),
+        "ophaal": ("ophaal", "ophaaladres"),
+        "aflever": ("aflever", "afleveradres"),
+        "datum": ("datum", "date"),
+        "status": ("status",),
+        "chauffeur": ("chauffeur", "chauffeur id", "chauffeur_id"),
+    },
+}
+
+# Pagina's blijven bestaan; per pagina de tabellen waarvan ze afhangt en
+# de tabellen die met een lichte refresh (zonder rebuild) bij te werken zijn
+TRACKED_TABLES = schema.TRACKED_TABLES
+PAGE_DEPENDENCIES = {
+    "dashboard": (),
+    "klanten": ("klanten",),
+    "chauffeurs": ("chauffeurs",),
+    "bestellingen": ("bestellingen", "klanten", "chauffeurs"),
+    "planning": ("bestellingen",),
+    "tracking": ("bestellingen", "chauffeurs", "status_events"),
+    "chauffeur_dashboard": ("bestellingen", "status_events"),
+    "chauffeur_leveringen": ("bestellingen", "status_events"),
+    "chauffeur_route": ("bestellingen",),
+    "manager_dashboard": ("bestellingen", "chauffeurs", "status_events"),
+    "manager_prestaties": ("bestellingen", "chauffeurs", "status_events"),
+    "manager_users": ("users", "chauffeurs", "klanten"),
+    "manager_rapporten": ("bestellingen", "chauffeurs", "status_events"),
+    "klant_dashboard": ("bestellingen", "status_events"),
+    "klant_bestellingen": ("bestellingen", "status_events"),
+    "klant_tracking": ("bestellingen", "status_events"),
+}
+
+
+def reconcile_tree(tree: ttk.Treeview, rows) -> None:
+    """Werk een Treeview bij naar rows = [(iid, values, tags), ...] met zo min mogelijk Tk calls.
+
+    Nieuwe rijen worden toegevoegd, gewijzigde rijen bijgewerkt en verdwenen
+    rijen verwijderd. Selectie en scrollpositie blijven daardoor behouden.
+    """
+    new_rows = [(str(iid), tuple(values), tuple(tags)) for iid, values, tags in rows]
+    state = getattr(tree, "_reconcile_state", None)
+    if state is None:
+        # Eerste keer: bestaande rijen (zonder bekende inhoud) weggooien
+        children = tree.get_children()
+        if children:
+            tree.delete(*children)
+        state = {"order": [], "rows": {}}
+        tree._reconcile_state = state
+
+    old_order: list[str] = state["order"]
+    old_rows: dict[str, tuple] = state["rows"]
+    new_ids = [iid for iid, _values, _tags in new_rows]
+    new_set = set(new_ids)
+
+    removed = [iid for iid in old_order if iid not in new_set]
+    if removed:
+        tree.delete(*removed)
+
+    kept_order = [iid for iid in old_order if iid in new_set]
+    kept_new_order = [iid for iid in new_ids if iid in old_rows]
+    reorder = kept_order != kept_new_order
+
+    rows_by_id: dict[str, tuple] = {}
+    for index, (iid, values, tags) in enumerate(new_rows):
+        rows_by_id[iid] = (values, tags)
+        old = old_rows.get(iid)
+        if old is None:
+            tree.insert("", index, iid=iid, values=values, tags=tags)
+            continue
+        if old != (values, tags):
+            tree.item(iid, values=values, tags=tags)
+        if reorder:
+            tree.move(iid, "", index)
+
+    state["order"] = new_ids
+    state["rows"] = rows_by_id
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview die alleen de zichtbare rijen tekent en rijen op aanvraag ophaalt.
+
+    fetch_rows(offset, limit, after_key=None, before_key=None) geeft een lijst
+    (key, values, tags) op volgorde van key terug en count_rows() het totaal
+    aantal rijen. Rijen worden per blok gecached. Een blok naast een blok uit
+    de cache wordt op key opgehaald (key > after_key of key < before_key);
+    alleen een sprong zonder buurblok gebruikt offset.
+    """
+
+    def __init__(
+        self,
+        master,
+        columns: tuple[str, ...],
+        fetch_rows,
+        count_rows,
+        height: int = 10,
+        block_size: int = 100,
+        max_blocks: int = 8,
+    ) -> None:
+        super().__init__(master)
+        self.fetch_rows = fetch_rows
+        self.count_rows = count_rows
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self._total = 0
+        self._first = 0
+        self._visible = height
+        self._header_h: int | None = None
+        self._blocks: OrderedDict[int, list[tuple]] = OrderedDict()
+        self._selected_key: str | None = None
+        self._select_callbacks: list = []
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda _e: self._scroll_to(self._first - 3))
+        self.tree.bind("<Button-5>", lambda _e: self._scroll_to(self._first + 3))
+        self.tree.bind("<Up>", lambda _e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda _e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda _e: self._move_selection(-self._visible))
+        self.tree.bind("<Next>", lambda _e: self._move_selection(self._visible))
+        self.tree.bind("<Home>", lambda _e: self._move_selection(-self._total))
+        self.tree.bind("<End>", lambda _e: self._move_selection(self._total))
+
+    def bind_select(self, callback) -> None:
+        """Callback wanneer een andere rij geselecteerd wordt."""
+        self._select_callbacks.append(callback)
+
+    def selected_key(self) -> str | None:
+        return self._selected_key
+
+    def refresh(
+        self,
+        reset: bool = False,
+        total: int | None = None,
+        first_block: list | None = None,
+        blocks: dict[int, list] | None = None,
+    ) -> None:
+        """Leeg de cache, tel opnieuw en teken het zichtbare venster.
+
+        Met total/first_block kan een elders (bv. in de achtergrond) berekend
+        resultaat meegegeven worden; first_block hoort bij offset 0 en blocks
+        bevat blokken per bloknummer (zie visible_blocks).
+        """
+        self._blocks.clear()
+        self._total = max(0, int(self.count_rows() if total is None else total))
+        if reset:
+            self._first = 0
+        if first_block is not None:
+            self._blocks[0] = list(first_block)
+        for block_no, block in (blocks or {}).items():
+            self._blocks[block_no] = list(block)
+        self._render()
+
+    def visible_blocks(self) -> range:
+        """Bloknummers die nodig zijn om het huidige venster te tekenen."""
+        last = self._first + max(1, self._visible) - 1
+        return range(self._first // self.block_size, last // self.block_size + 1)
+
+    def _row_at(self, index: int) -> tuple | None:
+        block_no, pos = divmod(index, self.block_size)
+        block = self._blocks.get(block_no)
+        if block is None:
+            block = self._fetch_block(block_no)
+            self._blocks[block_no] = block
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block_no)
+        return block[pos] if pos < len(block) else None
+
+    def _fetch_block(self, block_no: int) -> list[tuple]:
+        offset = block_no * self.block_size
+        previous = self._blocks.get(block_no - 1)
+        following = self._blocks.get(block_no + 1)
+        if previous:
+            return list(self.fetch_rows(offset, self.block_size, after_key=previous[-1][0]))
+        if following:
+            return list(self.fetch_rows(offset, self.block_size, before_key=following[0][0]))
+        return list(self.fetch_rows(offset, self.block_size))
+
+    def _clamp_first(self, first: int) -> int:
+        return max(0, min(first, self._total - self._visible))
+
+    def _render(self) -> None:
+        self._first = self._clamp_first(self._first)
+        last = min(self._total, self._first + self._visible)
+
+        rows = []
+        for index in range(self._first, last):
+            row = self._row_at(index)
+            if row is None:
+                break
+            rows.append(row)
+
+        reconcile_tree(self.tree, rows)
+
+        if self._selected_key is not None and self.tree.exists(self._selected_key):
+            self.tree.selection_set(self._selected_key)
+            self.tree.focus(self._selected_key)
+
+        if self._total > 0:
+            self.scrollbar.set(self._first / self._total, last / self._total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll_to(self, first: int) -> None:
+        first = self._clamp_first(first)
+        if first != self._first:
+            self._first = first
+            self._render()
+
+    def _on_scrollbar(self, *args) -> None:
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._total))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                step *= self._visible
+            self._scroll_to(self._first + step)
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        delta = event.delta if abs(event.delta) < 120 else event.delta // 120
+        self._scroll_to(self._first - delta * 3)
+        return "break"
+
+    def _on_configure(self, _event: tk.Event | None = None) -> None:
+        rowheight = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+        children = self.tree.get_children()
+        if self._header_h is None and children:
+            bbox = self.tree.bbox(children[0])
+            if bbox:
+                self._header_h = int(bbox[1])
+        header = self._header_h if self._header_h is not None else rowheight
+        visible = max(1, (self.tree.winfo_height() - header) // rowheight)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_tree_select(self, _event: tk.Event | None = None) -> None:
+        selected = self.tree.selection()
+        if not selected:
+            # Geselecteerde rij is uit beeld gescrolld; selectie blijft bewaard
+            return
+        key = selected[0]
+        if key == self._selected_key:
+            return
+        self._selected_key = key
+        for callback in self._select_callbacks:
+            callback()
+
+    def _move_selection(self, delta: int) -> str:
+        children = self.tree.get_children()
+        if self._selected_key in children:
+            index = self._first + children.index(self._selected_key)
+        else:
+            index = self._first - 1 if delta > 0 else self._first + len(children)
+        index = max(0, min(self._total - 1, index + delta))
+        if index < 0:
+            return "break"
+
+        if index < self._first:
+            self._first = index
+        elif index >= self._first + self._visible:
+            self._first = index - self._visible + 1
+        row = self._row_at(index)
+        self._render()
+        if row is not None:
+            self.tree.selection_set(str(row[0]))
+            self.tree.focus(str(row[0]))
+        return "break"
+
+
+def texture_tile_rows(size: int, base: str) -> list[list[str]]:
+    """Kleuren per pixel (rij voor rij) van de stippeltextuur, zonder Tk."""
+    dot1 = "#EDE0D8"
+    dot2 = "#E7D6CC"
+
+    rows: list[list[str]] = []
+    for cell_y in range(0, size, TEXTURE_STEP):
+        # Per cel: 1 = dot1 (x..x+1, y..y+1), 2 = dot2 (x+1..x+2, y+1..y+2)
+        kinds = []
+        for x in range(0, size, TEXTURE_STEP):
+            n = (x * 1103515245 + cell_y * 12345 + 67890) & 0xFFFFFFFF
+            r = (n >> 16) & 0xFF
+            kinds.append((x, 1 if r < 55 else 2 if r < 80 else 0))
+
+        for dy in range(min(TEXTURE_STEP, size - cell_y)):
+            row = [base] * size
+            for x, kind in kinds:
+                if kind == 1 and dy < 2:
+                    row[x:x + 2] = [dot1, dot1]
+                elif kind == 2 and 1 <= dy < 3:
+                    row[x + 1:x + 3] = [dot2, dot2]
+            rows.append(row[:size])
+    return rows
+
+
+def _row_batches(rows, size: int):
+    """Rijen per batch; een cursor wordt met fetchmany gelezen."""
+    if hasattr(rows, "fetchmany"):
+        while True:
+            batch = rows.fetchmany(size)
+            if not batch:
+                return
+            yield batch
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_export(path: str, columns: list[tuple[str, str]], rows, job: "BackgroundJob") -> int | None:
+    """Schrijf rijen streaming naar CSV of JSON Lines (optioneel gzip).
+
+    columns is een lijst (key, kop): de kop gaat in de CSV header, de key in
+    JSON Lines. Er wordt eerst naar path + ".part" geschreven; bij annuleren
+    verdwijnt dat bestand weer. Geeft het aantal rijen terug, of None.
+    """
+    compressed = path.endswith(".gz")
+    jsonl = path.removesuffix(".gz").endswith(".jsonl")
+    keys = [key for key, _label in columns]
+    part = path + ".part"
+
+    opener = gzip.open if compressed else open
+    written = 0
+    try:
+        with opener(part, "wt", newline="", encoding="utf-8") as f:
+            writer = None
+            if not jsonl:
+                writer = csv.writer(f)
+                writer.writerow([label for _key, label in columns])
+            for batch in _row_batches(rows, EXPORT_BATCH_SIZE):
+                if job.cancelled.is_set():
+                    break
+                if writer is not None:
+                    writer.writerows(batch)
+                else:
+                    f.writelines(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + "\n" for row in batch)
+                written += len(batch)
+                job.progress(written)
+    except (OSError, sqlite3.Error):
+        # Half geschreven bestand niet laten staan
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+    if job.cancelled.is_set():
+        os.remove(part)
+        return None
+    os.replace(part, path)
+    return written
+
+
+class BackgroundJob:
+    """Langlopende taak in een eigen thread met een eigen databaseverbinding.
+
+    work(job) draait in de thread en meldt voortgang via job.progress().
+    cancel() zet job.cancelled en onderbreekt een lopende query.
+    """
+
+    def __init__(self, db_path: Path, work) -> None:
+        self.db_path = db_path
+        self.work = work
+        self.conn: sqlite3.Connection | None = None
+        self.done = 0
+        self.total: int | None = None
+        self.result = None
+        self.error: Exception | None = None
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def progress(self, done: int, total: int | None = None) -> None:
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        if self.conn is not None:
+            self.conn.interrupt()
+
+    def _run(self) -> None:
+        try:
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.result = self.work(self)
+        except Exception as exc:
+            # Elke fout hoort in het foutvenster; anders sluit de voortgang zonder melding
+            if not self.cancelled.is_set():
+                self.error = exc
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+            self.finished.set()
+
+
+class DbWorker:
+    """Eén thread met een eigen databaseverbinding voor werk buiten de Tk thread.
+
+    submit(work) zet work(conn) in de wachtrij en geeft een Future terug;
+    run(work, on_done) levert het resultaat via after() af op de Tk thread.
+    Opdrachten lopen na elkaar, dus schrijfacties zijn vanzelf geserialiseerd.
+    pending en de latency velden zijn bedoeld voor de statusregel.
+    """
+
+    def __init__(self, widget: tk.Misc, db_path: Path, poll_ms: int = DB_WORKER_POLL_MS) -> None:
+        self.widget = widget
+        self.db_path = db_path
+        self.poll_ms = poll_ms
+        self.pending = 0
+        self.completed = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="db-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, work) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self.pending += 1
+        self._queue.put((work, future, time.perf_counter()))
+        return future
+
+    def run(self, work, on_done=None, on_error=None) -> Future:
+        """Voer work(conn) uit in de worker en roep on_done(result) aan op de Tk thread."""
+        future = self.submit(work)
+        self.widget.after(self.poll_ms, lambda: self._poll(future, on_done, on_error))
+        return future
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+
+    def _poll(self, future: Future, on_done, on_error) -> None:
+        if self._closed:
+            return
+        if not future.done():
+            self.widget.after(self.poll_ms, lambda: self._poll(future, on_done, on_error))
+            return
+        try:
+            result = future.result()
+        except sqlite3.Error as exc:
+            if on_error is None:
+                raise
+            on_error(exc)
+            return
+        if on_done is not None:
+            on_done(result)
+
+    def _loop(self) -> None:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                work, future, submitted = item
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = work(conn)
+                    except Exception as exc:
+                        if conn.in_transaction:
+                            conn.rollback()
+                        future.set_exception(exc)
+                    else:
+                        future.set_result(result)
+                latency = (time.perf_counter() - submitted) * 1000
+                with self._lock:
+                    self.pending -= 1
+                    self.completed += 1
+                    self.last_latency_ms = latency
+                    self.avg_latency_ms = latency if self.completed == 1 else self.avg_latency_ms * 0.9 + latency * 0.1
+        finally:
+            conn.close()
+
+
+class EventCache:
+    """LRU cache van eventlijsten per bestelling, met hit/miss tellers.
+
+    Lijsten worden gedeeld teruggegeven en mogen niet gewijzigd worden.
+    invalidate() mag vanuit elke thread aangeroepen worden.
+    """
+
+    def __init__(self, max_items: int = EVENT_CACHE_SIZE) -> None:
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[int, list[dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> list[dict] | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: int, value: list[dict]) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: int) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+class SearchController:
+    """Zoeken tijdens het typen zonder de UI te blokkeren.
+
+    schedule() wacht SEARCH_DEBOUNCE_MS op verdere invoer en voert run(conn)
+    daarna uit in een achtergrondthread met een eigen databaseverbinding.
+    Een nieuwere aanvraag voor dezelfde key annuleert de vorige (ook een
+    lopende query); alleen het laatste resultaat gaat via apply(result)
+    terug naar de Tk thread.
+    """
+
+    def __init__(self, widget: tk.Misc, db_path: Path, delay_ms: int = SEARCH_DEBOUNCE_MS, poll_ms: int = 25) -> None:
+        self.widget = widget
+        self.db_path = db_path
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="zoeken")
+        self._conn: sqlite3.Connection | None = None
+        self._generations: dict[str, int] = {}
+        self._timers: dict[str, str] = {}
+        self._tokens: dict[str, object] = {}
+        self._running: tuple[str, int] | None = None
+        self._closed = False
+
+    def schedule(self, key: str, run, apply, token=None) -> None:
+        """Plan een zoekopdracht; token (bv. de filters) voorkomt dubbel werk bij ongewijzigde invoer."""
+        if self._closed:
+            return
+        if token is not None and key not in self._timers and self._tokens.get(key) == token:
+            return
+        self._tokens[key] = token
+        gen = self.cancel(key, forget_token=False)
+        self._timers[key] = self.widget.after(self.delay_ms, lambda: self._submit(key, gen, run, apply))
+
+    def cancel(self, key: str, forget_token: bool = True) -> int:
+        """Maak lopende en geplande zoekopdrachten voor key ongeldig."""
+        gen = self._generations.get(key, 0) + 1
+        self._generations[key] = gen
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            try:
+                self.widget.after_cancel(timer)
+            except tk.TclError:
+                pass
+        if forget_token:
+            self._tokens.pop(key, None)
+        running = self._running
+        if running is not None and running[0] == key and self._conn is not None:
+            self._conn.interrupt()
+        return gen
+
+    def cancel_all(self) -> None:
+        for key in list(self._generations):
+            self.cancel(key)
+
+    def close(self) -> None:
+        self._closed = True
+        self.cancel_all()
+        if self._conn is not None:
+            self._conn.interrupt()
+        self._executor.submit(self._close_connection)
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, key: str, gen: int, run, apply) -> None:
+        self._timers.pop(key, None)
+        if self._closed or self._generations.get(key) != gen:
+            return
+        future = self._executor.submit(self._run, key, gen, run)
+        self._poll(key, gen, future, apply)
+
+    def _poll(self, key: str, gen: int, future, apply) -> None:
+        if self._closed or self._generations.get(key) != gen:
+            future.cancel()
+            return
+        if not future.done():
+            self.widget.after(self.poll_ms, lambda: self._poll(key, gen, future, apply))
+            return
+        try:
+            result = future.result()
+        except sqlite3.Error:
+            return
+        if self._generations.get(key) == gen:
+            apply(result)
+
+    def _run(self, key: str, gen: int, run):
+        # Draait in de zoekthread
+        if self._generations.get(key) != gen:
+            return None
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+        self._running = (key, gen)
+        try:
+            return run(self._conn)
+        finally:
+            self._running = None
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Page:
+    """Een opgebouwde pagina: frame, eigen widgets en pagers, en hoe hij bijgewerkt wordt.
+
+    De widgets staan alleen als attribuut op de app zolang de pagina zichtbaar
+    is (attach/detach), zodat hasattr-controles op een andere pagina falen.
+    on_show(stale_tables) werkt een bestaande pagina bij na wijzigingen in die
+    tabellen en geeft False terug als de pagina opnieuw opgebouwd moet worden.
+    """
+
+    def __init__(self, name: str, frame: ttk.Frame, on_show=None) -> None:
+        self.name = name
+        self.frame = frame
+        self.on_show = on_show
+        self.widgets: dict[str, tk.Misc | tk.Variable] = {}
+        self.pagers: dict[str, dict] = {}
+        self.versions: tuple = ()
+
+    def attach(self, app: "QuickDeliveryApp") -> None:
+        app.__dict__.update(self.widgets)
+        app._pagers.update(self.pagers)
+
+    def detach(self, app: "QuickDeliveryApp") -> None:
+        for key, widget in self.widgets.items():
+            if app.__dict__.get(key) is widget:
+                del app.__dict__[key]
+        for key, pager in self.pagers.items():
+            if app._pagers.get(key) is pager:
+                del app._pagers[key]
+
 
 class QuickDeliveryApp(tk.Tk):
     def __init__(self) -> None:
+        self._startup_started = self._startup_last = time.perf_counter()
+        self._startup_timings: list[tuple[str, float]] = []
         super().__init__()
+        self._mark_startup("tk")
 
         self.title("QuickDelivery - Desktopapplicatie")
         self.geometry("900x600")
@@ -30,10 +777,10 @@ class QuickDeliveryApp(tk.Tk):
         self.brand_accent = "#F07C7C"
         self.brand_accent_dark = "#E45F73"
         self._init_styles()
+        self._mark_startup("styles")
 
         self._init_background_texture()
-
-        self._ensure_logo_asset()
+        self._mark_startup("texture")
 
         # Hoofdcontainer
         self.columnconfigure(0, weight=1)
@@ -42,19 +789,53 @@ class QuickDeliveryApp(tk.Tk):
 
         # Klanten en bestellingen
         self.klanten_data: list[dict] = []
-        self.bestellingen_data: list[dict] = []
 
         self.current_user_email: str | None = None
         self.current_role: str | None = None
+        self.current_chauffeur_id: int | None = None
+        self.current_klant_id: int | None = None
+
+        # Paginanavigatie per tabel
+        self._pagers: dict[str, dict] = {}
+        # Pagina die nu door _build_page opgebouwd wordt
+        self._building_page: Page | None = None
 
         # Database
-        db_path = self.script_dir / "quickdelivery.db"
+        db_path = Path(os.environ.get(DB_PATH_ENV) or self.script_dir / "quickdelivery.db")
+        self.db_path = db_path
         self.db_conn = sqlite3.connect(str(db_path))
         self.db_conn.row_factory = sqlite3.Row
-        self._init_database()
-        self._apply_db_migrations()
-        self._ensure_seed_users()
-        self._load_data_from_database()
+        # WAL: lezers (UI, zoekthread, worker) wachten niet op een schrijvende thread
+        self.db_conn.execute("PRAGMA journal_mode = WAL")
+        # Schema, migraties en seed alleen als de database nog niet bij is
+        schema.migrate(self.db_conn)
+        # Ook bij een warme start (zonder migratie) de FTS index gebruiken
+        self._fts_enabled = schema.detect_search_index(self.db_conn)
+        self._mark_startup("database")
+        # Data wordt pas na het inloggen geladen
+
+        # Zoeken tijdens het typen gebeurt in de achtergrond
+        self.search = SearchController(self, db_path)
+        # Overig databasewerk dat de UI niet mag blokkeren
+        self.db = DbWorker(self, db_path)
+        self.after(DB_STATS_INTERVAL_MS, self._update_db_stats)
+
+        # Eventgeschiedenis per bestelling; geleegd als status_events elders wijzigt
+        self.event_cache = EventCache()
+        self._event_cache_signature = None
+        self._event_cache_version = None
+
+        # Eén timer voor live verversen van de zichtbare pagina
+        self._refresh_job = None
+        self._refresh_interval_ms = REFRESH_MIN_MS
+        self._refresh_signature = None
+        self._live_versions: dict[str, tuple] = {}
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Archiveren van oude status events, in kleine stappen op de achtergrond
+        self.after(5000, self._run_event_retention)
+        # KPI tabel bijwerken voor de rapporten, ook op de achtergrond
+        self.after(3000, self._run_kpi_rollup)
 
         # Dummy orders voor planning
         self.dummy_orders: list[dict] = [
@@ -70,6 +851,41 @@ class QuickDeliveryApp(tk.Tk):
 
         # Start met login
         self.show_page("login")
+        self._mark_startup("widgets")
+
+        # Eerst het loginscherm tonen, daarna pas de logo-check (kan een dialoog openen)
+        self.after_idle(self._finish_startup)
+
+    def _mark_startup(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._startup_timings.append((phase, now - self._startup_last))
+        self._startup_last = now
+
+    def _finish_startup(self) -> None:
+        self._mark_startup("first_idle")
+        self.startup_ms = (self._startup_last - self._startup_started) * 1000
+        self._ensure_logo_asset()
+
+    def startup_report(self) -> str:
+        phases = ", ".join(f"{name}={secs * 1000:.0f}ms" for name, secs in self._startup_timings)
+        return f"{getattr(self, 'startup_ms', 0):.0f}ms (budget {STARTUP_BUDGET_MS}ms) - {phases}"
+
+    def _on_close(self) -> None:
+        self.search.close()
+        self.db.close()
+        self.destroy()
+
+    def _update_db_stats(self) -> None:
+        """Wachtrij en latency van de database worker in de header tonen."""
+        if hasattr(self, "lbl_db_stats") and self.lbl_db_stats.winfo_exists():
+            self.lbl_db_stats.configure(
+                text=(
+                    f"DB wachtrij: {self.db.pending} · laatste {self.db.last_latency_ms:.0f} ms"
+                    f" · gem. {self.db.avg_latency_ms:.0f} ms"
+                    f" · events cache {self.event_cache.hits}/{self.event_cache.hits + self.event_cache.misses}"
+                )
+            )
+        self.after(DB_STATS_INTERVAL_MS, self._update_db_stats)
 
     def _is_valid_iso_date(self, value: str) -> bool:
         """Validate Dutch date format DD-MM-YYYY."""
@@ -104,10 +920,10 @@ class QuickDeliveryApp(tk.Tk):
 
     def _init_background_texture(self) -> None:
         self._bg_texture_img = None
+        self._bg_texture_tile = None
         self._bg_texture_job = None
-        self._bg_texture_last_size = (0, 0)
 
-        self._bg_label = tk.Label(self, bd=0, highlightthickness=0)
+        self._bg_label = tk.Label(self, bd=0, highlightthickness=0, anchor="nw")
         self._bg_label.place(x=0, y=0, relwidth=1, relheight=1)
         self._bg_label.lower()
 
@@ -122,31 +938,32 @@ class QuickDeliveryApp(tk.Tk):
                 pass
         self._bg_texture_job = self.after(120, self._redraw_texture)
 
+    def _render_texture_tile(self) -> tk.PhotoImage:
+        """Render de stippeltextuur voor één tegel in één bulk put (een rij per Tcl lijst)."""
+        size = TEXTURE_TILE_SIZE
+        tile = tk.PhotoImage(width=size, height=size)
+        tile.put(" ".join("{" + " ".join(row) + "}" for row in texture_tile_rows(size, self.brand_bg)))
+        return tile
+
     def _redraw_texture(self) -> None:
         self._bg_texture_job = None
 
         w = max(1, int(self.winfo_width()))
         h = max(1, int(self.winfo_height()))
-        if (w, h) == getattr(self, "_bg_texture_last_size", (0, 0)):
+        img = self._bg_texture_img
+        if img is not None and w <= img.width() and h <= img.height():
+            # Bestaande afbeelding is groot genoeg; het label knipt af
             return
-        self._bg_texture_last_size = (w, h)
 
-        base = self.brand_bg
-        dot1 = "#EDE0D8"
-        dot2 = "#E7D6CC"
+        if self._bg_texture_tile is None:
+            self._bg_texture_tile = self._render_texture_tile()
 
+        # Meteen schermvullend maken, zodat vergroten/maximaliseren daarna niets meer kost
+        w = max(w, int(self.winfo_screenwidth()))
+        h = max(h, int(self.winfo_screenheight()))
         img = tk.PhotoImage(width=w, height=h)
-        img.put(base, to=(0, 0, w, h))
-
-        step = 5
-        for y in range(0, h, step):
-            for x in range(0, w, step):
-                n = (x * 1103515245 + y * 12345 + 67890) & 0xFFFFFFFF
-                r = (n >> 16) & 0xFF
-                if r < 55:
-                    img.put(dot1, to=(x, y, x + 2, y + 2))
-                elif r < 80:
-                    img.put(dot2, to=(x + 1, y + 1, x + 3, y + 3))
+        # Tk herhaalt de bron als het doelgebied groter is dan de tegel
+        img.tk.call(img, "copy", self._bg_texture_tile, "-to", 0, 0, w, h)
 
         self._bg_texture_img = img
         self._bg_label.configure(image=self._bg_texture_img)
@@ -180,6 +997,14 @@ class QuickDeliveryApp(tk.Tk):
             shutil.copyfile(src, logo_path)
         except OSError:
             messagebox.showerror("Fout", "Kon het logo niet kopiëren naar assets/quickdelivery_logo.png")
+            return
+
+        # Header opnieuw opbouwen zodat het gekozen logo meteen zichtbaar is
+        if hasattr(self, "_header"):
+            self._header.destroy()
+            self._create_header()
+            if self.current_role:
+                self.btn_logout.grid()
 
     def _init_styles(self) -> None:
         self.configure(background=self.brand_bg)
@@ -255,206 +1080,40 @@ class QuickDeliveryApp(tk.Tk):
         self._tracking_auto_refresh_enabled = False
         self._tracking_auto_refresh_ms = 2000
         self._tracking_simulate_enabled = False
+        self._klant_auto_refresh_enabled = False
 
+    # Routeheuristiek staat in quickdelivery.routing (ook gebruikt door de nachtelijke planning)
     def _estimate_distance_km(self, a: str, b: str) -> float:
-        aa = (a or "").strip().lower()
-        bb = (b or "").strip().lower()
-        if not aa or not bb:
-            return 10.0
-        if aa == bb:
-            return 0.0
-        # Afstand schatting op basis van adres
-        a_tokens = {t for t in aa.replace(",", " ").split() if t}
-        b_tokens = {t for t in bb.replace(",", " ").split() if t}
-        common = len(a_tokens & b_tokens)
-        base = 12.0
-        dist = base - (common * 2.5)
-        # Begrenzing
-        if dist < 1.0:
-            dist = 1.0
-        if dist > 25.0:
-            dist = 25.0
-        return dist
+        return routing.estimate_distance_km(a, b)
 
     def _route_length(self, stops: list[dict]) -> float:
-        if len(stops) < 2:
-            return 0.0
-        total = 0.0
-        for i in range(len(stops) - 1):
-            total += self._estimate_distance_km(stops[i]["adres"], stops[i + 1]["adres"])
-        return total
+        return routing.route_length(stops)
 
     def _nearest_neighbor_route(self, stops: list[dict]) -> list[dict]:
-        if not stops:
-            return []
-        remaining = stops[1:]
-        route = [stops[0]]
-        while remaining:
-            last = route[-1]
-            best_idx = 0
-            best_d = float("inf")
-            for idx, cand in enumerate(remaining):
-                d = self._estimate_distance_km(last["adres"], cand["adres"])
-                if d < best_d:
-                    best_d = d
-                    best_idx = idx
-            route.append(remaining.pop(best_idx))
-        return route
+        return routing.nearest_neighbor_route(stops)
 
     def _two_opt(self, route: list[dict], max_passes: int = 50) -> list[dict]:
-        if len(route) < 4:
-            return route
-
-        best = route[:]
-        best_len = self._route_length(best)
-
-        improved = True
-        passes = 0
-        while improved and passes < max_passes:
-            improved = False
-            passes += 1
-            # Segment grenzen
-            for i, j in combinations(range(1, len(best) - 1), 2):
-                if j <= i:
-                    continue
-                candidate = best[:i] + list(reversed(best[i:j + 1])) + best[j + 1 :]
-                cand_len = self._route_length(candidate)
-                if cand_len + 1e-6 < best_len:
-                    best = candidate
-                    best_len = cand_len
-                    improved = True
-                    break
-            # Herstart na verbetering
-        return best
+        return routing.two_opt(route, max_passes)
 
     def _get_planning_stops_from_bestellingen(self) -> list[dict]:
         # Stops op basis van afleveradressen
-        status_filter = "Alle"
+        filters = {"status": "Alle"}
         if hasattr(self, "combo_plan_status"):
-            status_filter = self.combo_plan_status.get() or "Alle"
+            filters["status"] = self.combo_plan_status.get() or "Alle"
+        filters["datum_van"], filters["datum_tot"] = self._get_date_range("plan_date")
 
         stops: list[dict] = []
-        for best in self.bestellingen_data:
-            if status_filter != "Alle" and best.get("status") != status_filter:
-                continue
+        for best in self._query_bestellingen(filters):
             adres = (best.get("aflever") or "").strip()
             if not adres:
                 continue
             stops.append({"id": best["id"], "klant": best.get("klant") or "", "adres": adres})
         return stops
 
-    def _init_database(self) -> None:
-        cur = self.db_conn.cursor()
-
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS klanten (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                naam TEXT NOT NULL,
-                adres TEXT NOT NULL,
-                contact TEXT
-            )
-            """
-        )
-
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS bestellingen (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                klant TEXT NOT NULL,
-                ophaal TEXT NOT NULL,
-                aflever TEXT NOT NULL,
-                datum TEXT,
-                status TEXT
-            )
-            """
-        )
-
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS chauffeurs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                naam TEXT NOT NULL,
-                voertuig TEXT,
-                beschikbaar INTEGER NOT NULL DEFAULT 1
-            )
-            """
-        )
-
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS status_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bestelling_id INTEGER NOT NULL,
-                status TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                opmerking TEXT,
-                FOREIGN KEY(bestelling_id) REFERENCES bestellingen(id)
-            )
-            """
-        )
-
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT NOT NULL UNIQUE,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                chauffeur_id INTEGER,
-                FOREIGN KEY(chauffeur_id) REFERENCES chauffeurs(id)
-            )
-            """
-        )
-
-        self.db_conn.commit()
-
-    def _ensure_seed_users(self) -> None:
-        cur = self.db_conn.cursor()
-        cur.execute(
-            "INSERT OR IGNORE INTO users (email, password, role) VALUES (?, ?, ?)",
-            ("planner@gmail.com", "wachtwoord", "planner"),
-        )
-        cur.execute(
-            "INSERT OR IGNORE INTO users (email, password, role) VALUES (?, ?, ?)",
-            ("chaffeur@gmail.com", "wachtwoord", "chauffeur"),
-        )
-        cur.execute(
-            "INSERT OR IGNORE INTO users (email, password, role) VALUES (?, ?, ?)",
-            ("klant@gmail.com", "wachtwoord", "klant"),
-        )
-        cur.execute(
-            "INSERT OR IGNORE INTO users (email, password, role) VALUES (?, ?, ?)",
-            ("manager@gmail.com", "wachtwoord", "manager"),
-        )
-        self.db_conn.commit()
-
-        # Test chauffeur
-        row = cur.execute("SELECT id FROM chauffeurs WHERE naam = 'Test Chauffeur'").fetchone()
-        if not row:
-            cur.execute("INSERT INTO chauffeurs (naam, voertuig, beschikbaar) VALUES (?, ?, ?)", ("Test Chauffeur", "Bestelbus", 1))
-            self.db_conn.commit()
-            row = cur.execute("SELECT id FROM chauffeurs WHERE naam = 'Test Chauffeur'").fetchone()
-        if row:
-            cur.execute("UPDATE users SET chauffeur_id = ? WHERE lower(email) = 'chaffeur@gmail.com' AND (chauffeur_id IS NULL OR chauffeur_id != ?)", (row[0], row[0]))
-            self.db_conn.commit()
-
-        # Test klanten
-        test_klanten = [
-            ("Klant 1", "Hoofdstraat 10, Amsterdam", "06-12345671"),
-            ("Klant 2", "Kerkstraat 25, Rotterdam", "06-12345672"),
-            ("Klant 3", "Marktplein 5, Utrecht", "06-12345673"),
-        ]
-        for naam, adres, contact in test_klanten:
-            existing = cur.execute("SELECT id FROM klanten WHERE naam = ?", (naam,)).fetchone()
-            if not existing:
-                cur.execute("INSERT INTO klanten (naam, adres, contact) VALUES (?, ?, ?)", (naam, adres, contact))
-        self.db_conn.commit()
-
     def _get_user_by_email(self, email: str) -> dict | None:
         cur = self.db_conn.cursor()
         row = cur.execute(
-            "SELECT id, email, password, role, chauffeur_id FROM users WHERE lower(email) = lower(?)",
+            "SELECT id, email, password, role, chauffeur_id, klant_id FROM users WHERE lower(email) = lower(?)",
             (email,),
         ).fetchone()
         if not row:
@@ -465,45 +1124,640 @@ class QuickDeliveryApp(tk.Tk):
             "password": row[2],
             "role": row[3],
             "chauffeur_id": row[4],
+            "klant_id": row[5],
         }
 
-    def _apply_db_migrations(self) -> None:
-        # Database migratie
+    def _update_route_plans(
+        self, chauffeur_id: int | None = None, upcoming_only: bool = False, conn: sqlite3.Connection | None = None
+    ) -> int:
+        """Herbereken alle verouderde routes (optioneel voor één chauffeur); geeft het aantal terug.
+
+        upcoming_only slaat dagen vóór vandaag over (routes zonder datum tellen wel mee).
+        """
+        conn = conn or self.db_conn
+        cur = conn.cursor()
+        sql = "SELECT chauffeur_id, dag FROM route_plans WHERE stale = 1"
+        params: tuple = ()
+        if chauffeur_id is not None:
+            sql += " AND chauffeur_id = ?"
+            params = (chauffeur_id,)
+        if upcoming_only:
+            sql += f" AND {UPCOMING_DAG_SQL.format(col='dag')}"
+        plans = cur.execute(sql, params).fetchall()
+
+        for ch_id, dag in plans:
+            orders = [
+                dict(row)
+                for row in cur.execute(
+                    f"""
+                    SELECT id, klant, aflever FROM bestellingen
+                    WHERE chauffeur_id = ? AND COALESCE(datum_dag, '') = ?
+                      AND COALESCE(status, '') NOT IN {CLOSED_STATUSES}
+                    ORDER BY id
+                    """,
+                    (ch_id, dag),
+                )
+            ]
+            stops = routing.compute_route_stops(orders)
+            with conn:
+                cur.execute("DELETE FROM route_stops WHERE chauffeur_id = ? AND dag = ?", (ch_id, dag))
+                if not stops:
+                    cur.execute("DELETE FROM route_plans WHERE chauffeur_id = ? AND dag = ?", (ch_id, dag))
+                    continue
+                cur.executemany(
+                    "INSERT INTO route_stops (chauffeur_id, dag, volgorde, bestelling_id, eta, afstand_km) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(ch_id, dag, st["volgorde"], st["bestelling_id"], st["eta"], st["afstand_km"]) for st in stops],
+                )
+                cur.execute(
+                    "UPDATE route_plans SET stale = 0, berekend_op = datetime('now', 'localtime') WHERE chauffeur_id = ? AND dag = ?",
+                    (ch_id, dag),
+                )
+        return len(plans)
+
+    def _kpi_rollup_chunk(self, conn: sqlite3.Connection, chunk_size: int = KPI_ROLLUP_CHUNK_DAYS) -> int:
+        """Herbereken de KPI rijen van maximaal chunk_size gewijzigde dagen; geeft het aantal dagen terug."""
+        cur = conn.cursor()
+        days = [r[0] for r in cur.execute("SELECT dag FROM kpi_dirty_days LIMIT ?", (chunk_size,))]
+        if not days:
+            return 0
+        marks = ", ".join("?" for _ in days)
+        # Bestellingen zonder geldige datum staan onder de lege dag
+        day_filter = f"b.datum_dag IN ({marks})"
+        if "" in days:
+            day_filter = f"({day_filter} OR b.datum_dag IS NULL)"
+        with conn:
+            # Eerst de dagen claimen, zodat wijzigingen tijdens de berekening opnieuw gemarkeerd worden
+            cur.execute(f"DELETE FROM kpi_dirty_days WHERE dag IN ({marks})", days)
+            rows = cur.execute(
+                f"""
+                SELECT COALESCE(b.datum_dag, '') AS dag, COALESCE(b.chauffeur_id, 0) AS chauffeur_id, b.status,
+                       b.ophaal, b.aflever,
+                       (
+                           SELECT (julianday(MAX(ts)) - julianday(MIN(ts))) * 1440
+                           FROM (
+                               SELECT timestamp AS ts FROM status_events WHERE bestelling_id = b.id
+                               UNION ALL
+                               SELECT timestamp FROM status_events_archive WHERE bestelling_id = b.id
+                           )
+                           HAVING COUNT(*) >= 2
+                       ) AS levertijd
+                FROM bestellingen b
+                WHERE {day_filter}
+                """,
+                days,
+            ).fetchall()
+
+            kpis: dict[tuple[str, int], dict] = {}
+            for r in rows:
+                k = kpis.setdefault(
+                    (r["dag"], r["chauffeur_id"]),
+                    {"bestellingen": 0, "Afgeleverd": 0, "Geannuleerd": 0, "Onderweg": 0, "Gepland": 0,
+                     "levertijden": [], "km": 0.0},
+                )
+                k["bestellingen"] += 1
+                status = r["status"] or ""
+                if status in k:
+                    k[status] += 1
+                if status == "Afgeleverd":
+                    k["km"] += self._estimate_distance_km(r["ophaal"], r["aflever"])
+                    if r["levertijd"] is not None and r["levertijd"] > 0:
+                        k["levertijden"].append(float(r["levertijd"]))
+
+            cur.execute(f"DELETE FROM chauffeur_daily_kpi WHERE dag IN ({marks})", days)
+            cur.executemany(
+                """
+                INSERT INTO chauffeur_daily_kpi (
+                    dag, chauffeur_id, bestellingen, afgeleverd, geannuleerd, onderweg, gepland,
+                    levertijd_som, levertijd_aantal, levertijd_p90, levertijd_hist, km
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        dag,
+                        ch_id,
+                        k["bestellingen"],
+                        k["Afgeleverd"],
+                        k["Geannuleerd"],
+                        k["Onderweg"],
+                        k["Gepland"],
+                        sum(k["levertijden"]),
+                        len(k["levertijden"]),
+                        self._percentile(k["levertijden"], 90),
+                        json.dumps(self._minutes_histogram(k["levertijden"])),
+                        round(k["km"], 1),
+                    )
+                    for (dag, ch_id), k in kpis.items()
+                ],
+            )
+        return len(days)
+
+    def _run_kpi_rollup(self) -> None:
+        """Eén KPI-stap in de DB worker; zolang er gewijzigde dagen zijn volgt snel de volgende stap.
+
+        De rapporten lezen alleen chauffeur_daily_kpi en wachten dus nooit op de rollup.
+        """
+
+        def done(days: int) -> None:
+            self.after(KPI_ROLLUP_STEP_MS if days else KPI_ROLLUP_INTERVAL_MS, self._run_kpi_rollup)
+
+        # Database bezet of andere fout: volgende ronde opnieuw proberen
+        self.db.run(self._kpi_rollup_chunk, done, lambda _exc: self.after(KPI_ROLLUP_INTERVAL_MS, self._run_kpi_rollup))
+
+    def _percentile(self, values: list[float], pct: float) -> float | None:
+        """Percentiel volgens de nearest-rank methode."""
+        if not values:
+            return None
+        ordered = sorted(values)
+        rank = max(1, -(-len(ordered) * pct // 100))
+        return ordered[int(rank) - 1]
+
+    def _minutes_histogram(self, minutes: list[float]) -> dict[str, int]:
+        hist: dict[str, int] = {}
+        for m in minutes:
+            bucket = str(int(m // KPI_HIST_BUCKET_MIN))
+            hist[bucket] = hist.get(bucket, 0) + 1
+        return hist
+
+    def _histogram_percentile(self, hist: dict[str, int], pct: float) -> float | None:
+        """Percentiel uit een samengevoegd histogram (bovengrens van de bucket)."""
+        total = sum(hist.values())
+        if not total:
+            return None
+        needed = -(-total * pct // 100)
+        seen = 0
+        for bucket in sorted(hist, key=int):
+            seen += hist[bucket]
+            if seen >= needed:
+                return (int(bucket) + 1) * KPI_HIST_BUCKET_MIN
+        return None
+
+    def _format_minutes(self, minutes: float | None) -> str:
+        if minutes is None:
+            return "-"
+        if minutes < 60:
+            return f"{int(minutes)} min"
+        return f"{minutes / 60:.1f} uur"
+
+    def _archive_closed_events_chunk(
+        self, conn: sqlite3.Connection, after_id: int, retention_days: int = STATUS_EVENT_RETENTION_DAYS
+    ) -> int | None:
+        """Archiveer de events van afgesloten bestellingen in het volgende venster van bestellingen.
+
+        Een bestelling telt als afgesloten als de status Afgeleverd/Geannuleerd is
+        en het laatste event ouder is dan retention_days. Per stap worden
+        RETENTION_CHUNK_SIZE bestellingen na after_id bekeken (primaire sleutel,
+        laatste event via idx_status_events_bestelling), nooit de hele
+        status_events tabel. Geeft de after_id voor de volgende stap, of None
+        als alle bestellingen bekeken zijn.
+        """
+        placeholders = ", ".join("?" for _ in CLOSED_STATUSES)
+        window = conn.execute(
+            f"""
+            SELECT b.id, b.status IN ({placeholders}) AND (
+                SELECT e.timestamp FROM status_events e WHERE e.bestelling_id = b.id ORDER BY e.id DESC LIMIT 1
+            ) < datetime('now', 'localtime', ?) AS archiveren
+            FROM bestellingen b
+            WHERE b.id > ?
+            ORDER BY b.id
+            LIMIT ?
+            """,
+            (*CLOSED_STATUSES, f"-{int(retention_days)} days", after_id, RETENTION_CHUNK_SIZE),
+        ).fetchall()
+        ids = [row[0] for row in window if row[1]]
+        if ids:
+            id_list = ", ".join("?" for _ in ids)
+            with conn:
+                conn.execute(
+                    f"""
+                    INSERT OR REPLACE INTO status_events_archive (id, bestelling_id, status, timestamp, opmerking)
+                    SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events
+                    WHERE bestelling_id IN ({id_list})
+                    """,
+                    ids,
+                )
+                conn.execute(f"DELETE FROM status_events WHERE bestelling_id IN ({id_list})", ids)
+        if len(window) < RETENTION_CHUNK_SIZE:
+            return None
+        return window[-1][0]
+
+    def _purge_orphan_events_chunk(self, conn: sqlite3.Connection) -> int:
+        """Verwijder één chunk events waarvan de bestelling niet meer bestaat (beide tiers)."""
+        removed = 0
+        with conn:
+            for table in ("status_events", "status_events_archive"):
+                cur = conn.execute(
+                    f"""
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT e.id FROM {table} e
+                        LEFT JOIN bestellingen b ON b.id = e.bestelling_id
+                        WHERE b.id IS NULL
+                        LIMIT ?
+                    )
+                    """,
+                    (RETENTION_CHUNK_SIZE,),
+                )
+                removed += cur.rowcount
+        return removed
+
+    def _run_event_retention(self, after_id: int | None = None) -> None:
+        """Eén retentiestap in de DB worker, zodat de Tk thread nooit op de queries wacht.
+
+        Een ronde begint met het opruimen van wees-events (after_id None) en
+        loopt daarna in vensters door alle bestellingen; daarna wacht de
+        volgende ronde RETENTION_INTERVAL_MS.
+        """
+
+        def work(conn: sqlite3.Connection) -> tuple[bool, int | None]:
+            if after_id is None:
+                # Wees-events eerst; zolang er iets verwijderd wordt nog een chunk
+                return False, None if self._purge_orphan_events_chunk(conn) else 0
+            next_after = self._archive_closed_events_chunk(conn, after_id)
+            return next_after is None, next_after
+
+        def done(result: tuple[bool, int | None]) -> None:
+            finished, next_after = result
+            if finished:
+                self.after(RETENTION_INTERVAL_MS, self._run_event_retention)
+            else:
+                self.after(RETENTION_STEP_MS, lambda: self._run_event_retention(next_after))
+
+        # Database bezet of andere fout: volgende ronde opnieuw proberen
+        self.db.run(work, done, lambda _exc: self.after(RETENTION_INTERVAL_MS, self._run_event_retention))
+
+    def _get_table_versions(self, tables) -> tuple:
+        if not tables:
+            return ()
+        placeholders = ",".join("?" for _ in tables)
+        rows = self.db_conn.execute(
+            f"SELECT name, version FROM table_versions WHERE name IN ({placeholders})", tuple(tables)
+        ).fetchall()
+        versions = {row[0]: row[1] for row in rows}
+        return tuple(versions.get(t, 0) for t in tables)
+
+    def _fts_query(self, term: str, column: str | None = None) -> str:
+        """Zet een zoekterm om naar een FTS5 prefix-query (alle woorden moeten matchen)."""
+        parts = []
+        for word in (term or "").split():
+            if not any(ch.isalnum() for ch in word):
+                continue
+            phrase = '"' + word.replace('"', '""') + '"*'
+            parts.append(f"{column} : {phrase}" if column else phrase)
+        return " AND ".join(parts)
+
+    def _search_bestelling_ids(self, term: str, column: str | None = None) -> set[int] | None:
+        """Bestelling ids die matchen op de zoekterm, of None als de index niet beschikbaar is."""
+        if not getattr(self, "_fts_enabled", False):
+            return None
+        query = self._fts_query(term, column)
+        if not query:
+            return set()
         cur = self.db_conn.cursor()
-        cols = cur.execute("PRAGMA table_info(bestellingen)").fetchall()
-        existing = {c[1] for c in cols}
-        if "chauffeur_id" not in existing:
-            cur.execute("ALTER TABLE bestellingen ADD COLUMN chauffeur_id INTEGER")
-            self.db_conn.commit()
+        try:
+            rows = cur.execute("SELECT rowid FROM bestellingen_fts WHERE bestellingen_fts MATCH ?", (query,)).fetchall()
+        except sqlite3.OperationalError:
+            return set()
+        return {r[0] for r in rows}
+
+    def _search_klant_ids(self, term: str, conn: sqlite3.Connection | None = None) -> set[int] | None:
+        """Klant ids die matchen op de zoekterm, of None als de index niet beschikbaar is."""
+        if not getattr(self, "_fts_enabled", False):
+            return None
+        query = self._fts_query(term)
+        if not query:
+            return set()
+        cur = (conn or self.db_conn).cursor()
+        try:
+            rows = cur.execute("SELECT rowid FROM klanten_fts WHERE klanten_fts MATCH ?", (query,)).fetchall()
+        except sqlite3.OperationalError:
+            return set()
+        return {r[0] for r in rows}
+
+    def _parse_filter_date(self, value: str) -> str | None:
+        """DD-MM-JJJJ of YYYY-MM-DD naar YYYY-MM-DD, of None als het geen geldige datum is."""
+        v = (value or "").strip()
+        for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
+            try:
+                return datetime.datetime.strptime(v, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        return None
+
+    def _date_preset_range(self, preset: str, today: datetime.date | None = None) -> tuple[str, str] | None:
+        """Van/tot (YYYY-MM-DD) voor een periodekeuze zoals 'Deze week'."""
+        today = today or datetime.date.today()
+        if preset == "Vandaag":
+            start = end = today
+        elif preset == "Deze week":
+            start = today - datetime.timedelta(days=today.weekday())
+            end = start + datetime.timedelta(days=6)
+        elif preset == "Vorige week":
+            start = today - datetime.timedelta(days=today.weekday() + 7)
+            end = start + datetime.timedelta(days=6)
+        elif preset == "Deze maand":
+            start = today.replace(day=1)
+            end = (start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+        elif preset == "Vorige maand":
+            end = today.replace(day=1) - datetime.timedelta(days=1)
+            start = end.replace(day=1)
+        else:
+            return None
+        return start.isoformat(), end.isoformat()
+
+    def _build_date_range_filter(self, parent, prefix: str, on_change) -> ttk.Frame:
+        """Periodekeuze plus Van/Tot velden (DD-MM-JJJJ) als self.<prefix>_preset/_van/_tot."""
+        frame = ttk.Frame(parent)
+
+        combo = ttk.Combobox(frame, state="readonly", values=list(DATE_PRESETS), width=12)
+        combo.set("Alle")
+        combo.grid(row=0, column=0, sticky="w")
+        ttk.Label(frame, text="Van:").grid(row=0, column=1, sticky="w", padx=(8, 4))
+        entry_van = ttk.Entry(frame, width=11)
+        entry_van.grid(row=0, column=2, sticky="w")
+        ttk.Label(frame, text="Tot:").grid(row=0, column=3, sticky="w", padx=(8, 4))
+        entry_tot = ttk.Entry(frame, width=11)
+        entry_tot.grid(row=0, column=4, sticky="w")
+
+        def preset_selected(_event=None) -> None:
+            entry_van.delete(0, tk.END)
+            entry_tot.delete(0, tk.END)
+            period = self._date_preset_range(combo.get())
+            if period:
+                entry_van.insert(0, self._convert_date_from_db(period[0]))
+                entry_tot.insert(0, self._convert_date_from_db(period[1]))
+            on_change()
+
+        def typed(_event=None) -> None:
+            if combo.get() != "Aangepast":
+                combo.set("Aangepast")
+            on_change()
+
+        combo.bind("<<ComboboxSelected>>", preset_selected)
+        entry_van.bind("<KeyRelease>", typed)
+        entry_tot.bind("<KeyRelease>", typed)
+
+        setattr(self, f"{prefix}_preset", combo)
+        setattr(self, f"{prefix}_van", entry_van)
+        setattr(self, f"{prefix}_tot", entry_tot)
+        return frame
+
+    def _get_date_range(self, prefix: str) -> tuple[str | None, str | None]:
+        """Geldige grenzen uit de Van/Tot velden; een half ingetypte datum wordt genegeerd."""
+        van = getattr(self, f"{prefix}_van", None)
+        tot = getattr(self, f"{prefix}_tot", None)
+        return (
+            self._parse_filter_date(van.get()) if van is not None else None,
+            self._parse_filter_date(tot.get()) if tot is not None else None,
+        )
+
+    def _bestellingen_where(self, filters: dict) -> tuple[str, list]:
+        """Bouw een geparametriseerde WHERE clause voor de bestellingen filters."""
+        clauses: list[str] = []
+        params: list = []
+
+        status = filters.get("status") or "Alle"
+        if status != "Alle":
+            clauses.append("b.status = ?")
+            params.append(status)
+
+        chauffeur = filters.get("chauffeur") or "Alle"
+        if chauffeur == "(Geen)":
+            clauses.append("b.chauffeur_id IS NULL")
+        elif chauffeur != "Alle":
+            try:
+                wanted_id = int(chauffeur.split(":", 1)[0])
+            except ValueError:
+                wanted_id = None
+            if wanted_id:
+                clauses.append("b.chauffeur_id = ?")
+                params.append(wanted_id)
+
+        datum = (filters.get("datum") or "").strip()
+        if datum:
+            # Eén dag; ongeldige invoer vergelijkt nog met de ruwe tekst
+            dag = self._parse_filter_date(datum)
+            if dag:
+                clauses.append("b.datum_dag = ?")
+                params.append(dag)
+            else:
+                clauses.append("b.datum = ?")
+                params.append(datum)
+
+        # Periode (YYYY-MM-DD, grenzen inclusief) via de index op datum_dag
+        if filters.get("datum_van"):
+            clauses.append("b.datum_dag >= ?")
+            params.append(filters["datum_van"])
+        if filters.get("datum_tot"):
+            clauses.append("b.datum_dag <= ?")
+            params.append(filters["datum_tot"])
+
+        # Afbakening per rol (klant ziet alleen eigen bestellingen)
+        if "klant_id" in filters:
+            clauses.append("b.klant_id = ?")
+            params.append(filters["klant_id"])
+        if "chauffeur_id" in filters:
+            clauses.append("b.chauffeur_id = ?")
+            params.append(filters["chauffeur_id"])
+
+        term = (filters.get("term") or "").strip().lower()
+        if term:
+            column = filters.get("term_column")
+            if getattr(self, "_fts_enabled", False):
+                match = "b.id IN (SELECT rowid FROM bestellingen_fts WHERE bestellingen_fts MATCH ?)"
+                params.append(self._fts_query(term, column) or '""')
+            elif column == "klant":
+                match = "lower(b.klant) LIKE ?"
+                params.append(f"%{term}%")
+            else:
+                match = (
+                    "lower(b.klant || ' ' || b.ophaal || ' ' || b.aflever || ' ' || COALESCE(b.datum, '') || ' ' || "
+                    "COALESCE(b.status, '') || ' ' || COALESCE(c.naam, '')) LIKE ?"
+                )
+                params.append(f"%{term}%")
+            if filters.get("term_id"):
+                # Zoeken op bestelnummer
+                match = f"({match} OR CAST(b.id AS TEXT) LIKE ?)"
+                params.append(f"%{term}%")
+            clauses.append(match)
+
+        return (" AND ".join(clauses) if clauses else "1"), params
+
+    def _query_bestellingen(
+        self,
+        filters: dict,
+        after_id: int | None = None,
+        limit: int | None = None,
+        before_id: int | None = None,
+        conn: sqlite3.Connection | None = None,
+    ) -> list[dict]:
+        """Bestellingen op volgorde van id, gefilterd in SQL.
+
+        Keyset paginering: after_id geeft de rijen na dat id, before_id de
+        laatste limit rijen vóór dat id (ook oplopend teruggegeven).
+        """
+        where, params = self._bestellingen_where(filters)
+        sql = f"{BESTELLING_SELECT_SQL} WHERE {where}"
+        if after_id is not None:
+            sql += " AND b.id > ?"
+            params.append(after_id)
+        if before_id is not None:
+            sql += " AND b.id < ?"
+            params.append(before_id)
+        sql += " ORDER BY b.id DESC" if before_id is not None else " ORDER BY b.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        cur = (conn or self.db_conn).cursor()
+        try:
+            rows = cur.execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            return []
+        if before_id is not None:
+            rows.reverse()
+        return [self._bestelling_dict(r) for r in rows]
+
+    def _bestelling_dict(self, r: sqlite3.Row) -> dict:
+        return {
+            "id": r["id"],
+            "klant": r["klant"],
+            "ophaal": r["ophaal"],
+            "aflever": r["aflever"],
+            "datum": r["datum"],
+            "status": r["status"],
+            "chauffeur_id": r["chauffeur_id"],
+            "chauffeur_naam": r["chauffeur_naam"],
+        }
+
+    def _bestelling_id_at(self, filters: dict, offset: int, conn: sqlite3.Connection | None = None) -> int | None:
+        """Id op positie offset binnen de filters: het anker voor een sprong in een virtuele tabel."""
+        where, params = self._bestellingen_where(filters)
+        sql = "SELECT b.id FROM bestellingen b"
+        if "c.naam" in where:
+            sql += " LEFT JOIN chauffeurs c ON c.id = b.chauffeur_id"
+        cur = (conn or self.db_conn).cursor()
+        try:
+            row = cur.execute(f"{sql} WHERE {where} ORDER BY b.id LIMIT 1 OFFSET ?", params + [offset]).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def _count_bestellingen(self, filters: dict, conn: sqlite3.Connection | None = None) -> int:
+        where, params = self._bestellingen_where(filters)
+        sql = "SELECT COUNT(*) FROM bestellingen b"
+        if "c.naam" in where:
+            sql += " LEFT JOIN chauffeurs c ON c.id = b.chauffeur_id"
+        cur = (conn or self.db_conn).cursor()
+        try:
+            row = cur.execute(f"{sql} WHERE {where}", params).fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return int(row[0]) if row else 0
+
+    def _get_bestelling(self, bestelling_id: int) -> dict | None:
+        row = self.db_conn.execute(f"{BESTELLING_SELECT_SQL} WHERE b.id = ?", (bestelling_id,)).fetchone()
+        return self._bestelling_dict(row) if row else None
+
+    def _build_pager(self, parent, key: str, refresh) -> ttk.Frame:
+        """Paginanavigatie (vorige/volgende) onder een tabel."""
+        frame = ttk.Frame(parent)
+        frame.columnconfigure(1, weight=1)
+
+        btn_prev = ttk.Button(frame, text="< Vorige", command=lambda: self._pager_step(key, -1, refresh))
+        btn_prev.grid(row=0, column=0, sticky="w")
+        lbl = ttk.Label(frame, text="Pagina 1")
+        lbl.grid(row=0, column=1)
+        btn_next = ttk.Button(frame, text="Volgende >", command=lambda: self._pager_step(key, 1, refresh))
+        btn_next.grid(row=0, column=2, sticky="e")
+
+        pager = {
+            "starts": [None],
+            "index": 0,
+            "last_id": None,
+            "has_next": False,
+            "label": lbl,
+            "prev": btn_prev,
+            "next": btn_next,
+        }
+        self._pagers[key] = pager
+        if self._building_page is not None:
+            self._building_page.pagers[key] = pager
+        return frame
+
+    def _pager_after_id(self, key: str, reset: bool = False) -> int | None:
+        pager = self._pagers.get(key)
+        if not pager:
+            return None
+        if reset:
+            pager["starts"] = [None]
+            pager["index"] = 0
+        return pager["starts"][pager["index"]]
+
+    def _pager_page_rows(self, key: str, rows: list[dict]) -> list[dict]:
+        """Knip de extra rij (voor 'heeft volgende') af en werk de knoppen bij."""
+        has_next = len(rows) > PAGE_SIZE
+        rows = rows[:PAGE_SIZE]
+        pager = self._pagers.get(key)
+        if not pager:
+            return rows
+        pager["has_next"] = has_next
+        pager["last_id"] = rows[-1]["id"] if rows else None
+        pager["label"].configure(text=f"Pagina {pager['index'] + 1}")
+        pager["prev"].state(["!disabled"] if pager["index"] > 0 else ["disabled"])
+        pager["next"].state(["!disabled"] if has_next else ["disabled"])
+        return rows
+
+    def _pager_step(self, key: str, delta: int, refresh) -> None:
+        pager = self._pagers.get(key)
+        if not pager:
+            return
+        if delta > 0:
+            if not pager["has_next"] or pager["last_id"] is None:
+                return
+            del pager["starts"][pager["index"] + 1:]
+            pager["starts"].append(pager["last_id"])
+            pager["index"] += 1
+        elif pager["index"] > 0:
+            pager["index"] -= 1
+        refresh()
+
+    def _role_scope_filters(self) -> dict:
+        """Filters die de bestellingen beperken tot wat de ingelogde rol mag zien."""
+        if self.current_role == "chauffeur":
+            return {"chauffeur_id": self.current_chauffeur_id or 0}
+        if self.current_role == "klant":
+            return {"klant_id": self.current_klant_id or 0}
+        return {}
 
     def _load_data_from_database(self) -> None:
+        """Laad klanten en chauffeurs voor de ingelogde rol.
+
+        Bestellingen worden niet in het geheugen gehouden: tabellen pagineren via
+        _query_bestellingen en de klantpagina's gebruiken _klant_overview.
+        """
         self.klanten_data.clear()
-        self.bestellingen_data.clear()
         self.chauffeurs_data: list[dict] = []
 
         cur = self.db_conn.cursor()
+        klant_sql = "SELECT id, naam, adres, contact FROM klanten ORDER BY id"
+        klant_params: tuple = ()
+        chauffeur_sql = "SELECT id, naam, voertuig, beschikbaar FROM chauffeurs ORDER BY id"
+        chauffeur_params: tuple = ()
+        if self.current_role == "chauffeur":
+            klant_sql = None
+            chauffeur_sql = "SELECT id, naam, voertuig, beschikbaar FROM chauffeurs WHERE id = ?"
+            chauffeur_params = (self.current_chauffeur_id or 0,)
+        elif self.current_role == "klant":
+            klant_sql = "SELECT id, naam, adres, contact FROM klanten WHERE id = ?"
+            klant_params = (self.current_klant_id or 0,)
+            chauffeur_sql = None
+
+        if klant_sql:
+            for row in cur.execute(klant_sql, klant_params):
+                self.klanten_data.append(
+                    {"id": row["id"], "naam": row["naam"], "adres": row["adres"], "contact": row["contact"]}
+                )
 
-        for row in cur.execute("SELECT id, naam, adres, contact FROM klanten ORDER BY id"):
-            self.klanten_data.append(
-                {"id": row["id"], "naam": row["naam"], "adres": row["adres"], "contact": row["contact"]}
-            )
-
-        for row in cur.execute(
-            "SELECT id, klant, ophaal, aflever, datum, status, chauffeur_id FROM bestellingen ORDER BY id"
-        ):
-            self.bestellingen_data.append(
-                {
-                    "id": row["id"],
-                    "klant": row["klant"],
-                    "ophaal": row["ophaal"],
-                    "aflever": row["aflever"],
-                    "datum": row["datum"],
-                    "status": row["status"],
-                    "chauffeur_id": row["chauffeur_id"],
-                }
-            )
-
-        for row in cur.execute("SELECT id, naam, voertuig, beschikbaar FROM chauffeurs ORDER BY id"):
+        for row in cur.execute(chauffeur_sql, chauffeur_params) if chauffeur_sql else ():
             self.chauffeurs_data.append(
                 {
                     "id": row["id"],
@@ -513,24 +1767,80 @@ class QuickDeliveryApp(tk.Tk):
                 }
             )
 
-    def _now_iso(self) -> str:
+    def _klant_overview(self, recent_limit: int = KLANT_RECENT_LIMIT) -> dict:
+        """Aantallen per status, de eerste lopende bestellingen en de recentste, alleen voor de eigen klant."""
+        where, params = self._bestellingen_where(self._role_scope_filters())
         cur = self.db_conn.cursor()
+        # Via idx_bestellingen_klant_id (klant_id, id); nooit de volledige lijst in het geheugen
+        counts = dict(cur.execute(f"SELECT b.status, COUNT(*) FROM bestellingen b WHERE {where} GROUP BY b.status", params).fetchall())
+        first: dict[str, dict | None] = {}
+        for status in ("Onderweg", "Gepland"):
+            row = cur.execute(
+                f"SELECT b.id, b.aflever FROM bestellingen b WHERE {where} AND b.status = ? ORDER BY b.id LIMIT 1",
+                [*params, status],
+            ).fetchone()
+            first[status] = dict(row) if row else None
+        recent = [
+            dict(row)
+            for row in cur.execute(
+                f"SELECT b.id, b.klant, b.aflever, b.status FROM bestellingen b WHERE {where} ORDER BY b.id LIMIT ?",
+                [*params, recent_limit],
+            )
+        ]
+        return {"counts": counts, "total": sum(counts.values()), "first": first, "recent": recent}
+
+    def _now_iso(self, conn: sqlite3.Connection | None = None) -> str:
+        cur = (conn or self.db_conn).cursor()
         row = cur.execute("SELECT datetime('now','localtime')").fetchone()
         return row[0] if row else ""
 
-    def _log_status_event(self, bestelling_id: int, status: str, opmerking: str | None = None) -> None:
-        cur = self.db_conn.cursor()
-        cur.execute(
+    def _log_status_event(
+        self, bestelling_id: int, status: str, opmerking: str | None = None, conn: sqlite3.Connection | None = None
+    ) -> None:
+        conn = conn or self.db_conn
+        conn.execute(
             "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking) VALUES (?, ?, ?, ?)",
-            (bestelling_id, status, self._now_iso(), opmerking or ""),
+            (bestelling_id, status, self._now_iso(conn), opmerking or ""),
         )
-        self.db_conn.commit()
-
-    def _get_status_events_for_bestelling(self, bestelling_id: int) -> list[dict]:
-        cur = self.db_conn.cursor()
+        conn.commit()
+        self.event_cache.invalidate(int(bestelling_id))
+
+    def _check_event_cache_watermark(self) -> None:
+        """Leeg de event cache als status_events buiten _log_status_event om gewijzigd is.
+
+        Draait eens per refresh tick en bij het tonen van een pagina, niet per lookup.
+        """
+        # Alleen als er sinds de vorige keer iets gecommit is de versieteller lezen
+        data_version = self.db_conn.execute("PRAGMA data_version").fetchone()[0]
+        signature = (data_version, self.db_conn.total_changes)
+        if signature == self._event_cache_signature:
+            return
+        self._event_cache_signature = signature
+        version = self._get_table_versions(("status_events",))[0]
+        if version != self._event_cache_version:
+            self._event_cache_version = version
+            self.event_cache.clear()
+
+    def _get_status_events_for_bestelling(
+        self, bestelling_id: int, conn: sqlite3.Connection | None = None
+    ) -> list[dict]:
+        """Alle events van een bestelling, nieuwste eerst (live tabel en archief samen).
+
+        Komt uit de event cache als die er is; anders draait de query op conn
+        (standaard de hoofdverbinding, vanuit de worker diens verbinding).
+        """
+        cached = self.event_cache.get(int(bestelling_id))
+        if cached is not None:
+            return cached
+        cur = (conn or self.db_conn).cursor()
         rows = cur.execute(
-            "SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events WHERE bestelling_id = ? ORDER BY id DESC",
-            (bestelling_id,),
+            """
+            SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events WHERE bestelling_id = ?
+            UNION ALL
+            SELECT id, bestelling_id, status, timestamp, opmerking FROM status_events_archive WHERE bestelling_id = ?
+            ORDER BY id DESC
+            """,
+            (bestelling_id, bestelling_id),
         ).fetchall()
         events: list[dict] = []
         for r in rows:
@@ -543,11 +1853,53 @@ class QuickDeliveryApp(tk.Tk):
                     "opmerking": r["opmerking"],
                 }
             )
+        self.event_cache.put(int(bestelling_id), events)
+        return events
+
+    def _get_recent_status_events(
+        self, bestelling_ids: list[int], per_order: int = 3, conn: sqlite3.Connection | None = None
+    ) -> dict[int, list[dict]]:
+        """De laatste per_order events per bestelling (nieuwste eerst), in één query voor alle ids."""
+        ids = [int(i) for i in bestelling_ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" for _ in ids)
+        cur = (conn or self.db_conn).cursor()
+        rows = cur.execute(
+            f"""
+            SELECT id, bestelling_id, status, timestamp, opmerking
+            FROM (
+                SELECT ev.*, ROW_NUMBER() OVER (PARTITION BY ev.bestelling_id ORDER BY ev.id DESC) AS rn
+                FROM (
+                    SELECT id, bestelling_id, status, timestamp, opmerking
+                    FROM status_events WHERE bestelling_id IN ({placeholders})
+                    UNION ALL
+                    SELECT id, bestelling_id, status, timestamp, opmerking
+                    FROM status_events_archive WHERE bestelling_id IN ({placeholders})
+                ) AS ev
+            )
+            WHERE rn <= ?
+            ORDER BY bestelling_id, id DESC
+            """,
+            (*ids, *ids, per_order),
+        ).fetchall()
+        events: dict[int, list[dict]] = {i: [] for i in ids}
+        for r in rows:
+            events[r["bestelling_id"]].append(
+                {
+                    "id": r["id"],
+                    "bestelling_id": r["bestelling_id"],
+                    "status": r["status"],
+                    "timestamp": r["timestamp"],
+                    "opmerking": r["opmerking"],
+                }
+            )
         return events
 
     def _create_header(self) -> None:
         header = ttk.Frame(self, padding=(16, 8), style="App.TFrame")
         header.grid(row=0, column=0, sticky="ew")
+        self._header = header
 
         header.columnconfigure(1, weight=1)
         header.columnconfigure(2, weight=0)
@@ -599,6 +1951,9 @@ class QuickDeliveryApp(tk.Tk):
         title_label.grid(row=0, column=1, sticky="w")
         subtitle_label.grid(row=1, column=1, sticky="w")
 
+        self.lbl_db_stats = ttk.Label(header, text="", style="Header.TLabel", foreground="#8A817C")
+        self.lbl_db_stats.grid(row=1, column=2, sticky="e", padx=(0, 12))
+
         self.btn_logout = ttk.Button(header, text="Uitloggen", command=self._logout)
         self.btn_logout.grid(row=0, column=2, rowspan=2, sticky="e")
         self.btn_logout.grid_remove()
@@ -674,60 +2029,51 @@ class QuickDeliveryApp(tk.Tk):
         content_wrapper.columnconfigure(0, weight=1)
         content_wrapper.rowconfigure(0, weight=1)
 
-        self.content = ttk.Frame(content_wrapper, padding=16, relief="groove", style="Surface.TFrame")
-        self.content.grid(row=0, column=0, sticky="nsew")
+        self._content_host = ttk.Frame(content_wrapper, padding=16, relief="groove", style="Surface.TFrame")
+        self._content_host.grid(row=0, column=0, sticky="nsew")
 
-        self.content.columnconfigure(0, weight=1)
-        self.content.rowconfigure(0, weight=1)
+        self._content_host.columnconfigure(0, weight=1)
+        self._content_host.rowconfigure(0, weight=1)
 
-    def show_page(self, page_name: str) -> None:
-        self.content.columnconfigure(0, weight=1)
-        for i in range(0, 10):
-            self.content.rowconfigure(i, weight=0)
-
-        for child in self.content.winfo_children():
-            child.destroy()
+        # Elke pagina krijgt een eigen frame in de host; self.content wijst naar de actieve pagina
+        self._pages: dict[str, Page] = {}
+        self._shown_page: Page | None = None
+        self._active_page = None
+        self.content = self._content_host
 
+    def show_page(self, page_name: str) -> None:
         if page_name != "login" and not self.current_role:
             page_name = "login"
 
+        # Zoekresultaten horen bij de pagina die nu verdwijnt
+        self.search.cancel_all()
+
         if page_name == "login":
-            self._build_login_page()
-        elif page_name == "dashboard":
-            self._build_dashboard_page()
-        elif page_name == "klanten":
-            self._build_klanten_page()
-        elif page_name == "chauffeurs":
-            self._build_chauffeurs_page()
-        elif page_name == "bestellingen":
-            self._build_bestellingen_page()
-        elif page_name == "planning":
-            self._build_planning_page()
-        elif page_name == "tracking":
-            self._build_tracking_page()
-        # Chauffeur pages
-        elif page_name == "chauffeur_dashboard":
-            self._build_chauffeur_dashboard_page()
-        elif page_name == "chauffeur_leveringen":
-            self._build_chauffeur_leveringen_page()
-        elif page_name == "chauffeur_route":
-            self._build_chauffeur_route_page()
-        # Manager pages
-        elif page_name == "manager_dashboard":
-            self._build_manager_dashboard_page()
-        elif page_name == "manager_prestaties":
-            self._build_manager_prestaties_page()
-        elif page_name == "manager_users":
-            self._build_manager_users_page()
-        elif page_name == "manager_rapporten":
-            self._build_manager_rapporten_page()
-        # Klant pages
-        elif page_name == "klant_dashboard":
-            self._build_klant_dashboard_page()
-        elif page_name == "klant_bestellingen":
-            self._build_klant_bestellingen_page()
-        elif page_name == "klant_tracking":
-            self._build_klant_tracking_page()
+            # Uitloggen/inloggen: pagina's horen bij de vorige gebruiker
+            self._destroy_pages()
+
+        deps = PAGE_DEPENDENCIES.get(page_name, ())
+        versions = self._get_table_versions(deps)
+        page = self._pages.get(page_name)
+        self._check_event_cache_watermark()
+
+        if page is not None and page.versions != versions:
+            stale = {t for t, old, new in zip(deps, page.versions, versions) if old != new}
+            self._activate_page(page)
+            if page.on_show is not None and page.on_show(stale):
+                page.versions = versions
+            else:
+                self._discard_page(page)
+                page = None
+
+        if page is None:
+            page = self._build_page(page_name)
+            page.versions = versions
+            if page_name != "login":
+                self._pages[page_name] = page
+        self._activate_page(page)
+        self._active_page = page_name
+        self._ensure_refresh_scheduler()
 
         self._set_active_nav(page_name)
 
@@ -737,6 +2083,201 @@ class QuickDeliveryApp(tk.Tk):
             else:
                 self.btn_logout.grid_remove()
 
+    def _activate_page(self, page: Page) -> None:
+        previous = self._shown_page
+        if previous is not None and previous is not page:
+            previous.detach(self)
+            if self._pages.get(previous.name) is not previous:
+                # Niet bewaard (login of vervangen): weg ermee
+                previous.frame.destroy()
+        for child in self._content_host.winfo_children():
+            if child is not page.frame:
+                child.grid_remove()
+        page.frame.grid()
+        self.content = page.frame
+        page.attach(self)
+        self._shown_page = page
+
+    def _discard_page(self, page: Page) -> None:
+        page.detach(self)
+        page.frame.destroy()
+        if self._pages.get(page.name) is page:
+            del self._pages[page.name]
+        if self._shown_page is page:
+            self._shown_page = None
+
+    def _destroy_pages(self) -> None:
+        if self._shown_page is not None:
+            self._shown_page.detach(self)
+            self._shown_page = None
+        for page in self._pages.values():
+            page.detach(self)
+        for child in self._content_host.winfo_children():
+            child.destroy()
+        self._pages.clear()
+
+    def _page_handlers(self, page_name: str) -> tuple:
+        """(builder, on_show) per pagina; zonder on_show wordt een verouderde pagina opnieuw opgebouwd."""
+        return {
+            "login": (self._build_login_page, None),
+            "dashboard": (self._build_dashboard_page, None),
+            "klanten": (self._build_klanten_page, self._on_show_klanten_page),
+            "chauffeurs": (self._build_chauffeurs_page, self._on_show_chauffeurs_page),
+            "bestellingen": (self._build_bestellingen_page, self._on_show_bestellingen_page),
+            "planning": (self._build_planning_page, self._on_show_planning_page),
+            "tracking": (self._build_tracking_page, self._on_show_tracking_page),
+            # Chauffeur pages
+            "chauffeur_dashboard": (self._build_chauffeur_dashboard_page, None),
+            "chauffeur_leveringen": (self._build_chauffeur_leveringen_page, self._on_show_chauffeur_leveringen_page),
+            "chauffeur_route": (self._build_chauffeur_route_page, None),
+            # Manager pages
+            "manager_dashboard": (self._build_manager_dashboard_page, None),
+            "manager_prestaties": (self._build_manager_prestaties_page, self._on_show_manager_prestaties_page),
+            "manager_users": (self._build_manager_users_page, self._on_show_manager_users_page),
+            "manager_rapporten": (self._build_manager_rapporten_page, None),
+            # Klant pages
+            "klant_dashboard": (self._build_klant_dashboard_page, None),
+            "klant_bestellingen": (self._build_klant_bestellingen_page, self._on_show_klant_bestellingen_page),
+            "klant_tracking": (self._build_klant_tracking_page, None),
+        }.get(page_name, (lambda: None, None))
+
+    def _build_page(self, page_name: str) -> Page:
+        frame = ttk.Frame(self._content_host, style="Surface.TFrame")
+        frame.grid(row=0, column=0, sticky="nsew")
+        frame.columnconfigure(0, weight=1)
+
+        build, on_show = self._page_handlers(page_name)
+        page = Page(page_name, frame, on_show)
+        self.content = frame
+        # __setattr__ en _build_pager noteren widgets en pagers van de builder op de pagina
+        self._building_page = page
+        try:
+            build()
+        finally:
+            self._building_page = None
+        return page
+
+    def __setattr__(self, name: str, value) -> None:
+        page = self.__dict__.get("_building_page")
+        if page is not None and name != "content" and isinstance(value, (tk.Misc, tk.Variable)):
+            page.widgets[name] = value
+        super().__setattr__(name, value)
+
+    def _live_page(self) -> str | None:
+        """De zichtbare pagina als die live bijgewerkt moet worden (auto-refresh of simulatie aan)."""
+        page = self._active_page
+        if page == "tracking" and (self._tracking_auto_refresh_enabled or self._tracking_simulate_enabled):
+            return page
+        if page in LIVE_KLANT_PAGES and self._klant_auto_refresh_enabled:
+            return page
+        return None
+
+    def _ensure_refresh_scheduler(self) -> None:
+        """Start de refresh-timer als er een live pagina is en hij nog niet loopt; nooit een tweede timer."""
+        self._refresh_interval_ms = REFRESH_MIN_MS
+        if self._refresh_job is None and self._live_page():
+            self._refresh_job = self.after(REFRESH_MIN_MS, self._refresh_tick)
+
+    def _refresh_tick(self) -> None:
+        self._refresh_job = None
+        page = self._live_page()
+        if page is None:
+            # Timer stopt; show_page of een vinkje start hem weer
+            return
+        self._check_event_cache_watermark()
+
+        if page == "tracking" and self._tracking_simulate_enabled:
+            # Simulatie schrijft elke tick; verversen zodra de worker klaar is
+            simulate_id = self._selected_tracking_id()
+            if simulate_id:
+                self.db.run(
+                    lambda conn: self._simulate_status_step(simulate_id, conn),
+                    lambda _result: self._refresh_live_page_if_changed(),
+                )
+            else:
+                self._refresh_live_page_if_changed()
+            interval = self._tracking_auto_refresh_ms
+        elif self._refresh_live_page_if_changed():
+            interval = REFRESH_MIN_MS
+        else:
+            interval = min(self._refresh_interval_ms * 2, REFRESH_MAX_MS)
+
+        self._refresh_interval_ms = interval
+        self._refresh_job = self.after(interval, self._refresh_tick)
+
+    def _refresh_live_page_if_changed(self) -> bool:
+        page = self._live_page()
+        if page is None:
+            return False
+        # data_version wijzigt bij commits van andere verbindingen (worker, zoekthread,
+        # andere processen), total_changes bij commits op de eigen verbinding
+        data_version = self.db_conn.execute("PRAGMA data_version").fetchone()[0]
+        signature = (page, data_version, self.db_conn.total_changes)
+        if signature == self._refresh_signature:
+            return False
+        self._refresh_signature = signature
+
+        versions = self._get_table_versions(PAGE_DEPENDENCIES.get(page, ()))
+        if self._live_versions.get(page) == versions:
+            return False
+        self._live_versions[page] = versions
+
+        if page == "tracking":
+            self._refresh_tracking_live()
+        else:
+            self._refresh_klant_bestellingen()
+            self._refresh_klant_eventlog()
+        return True
+
+    # on_show per pagina: bijwerken zonder de widgets opnieuw op te bouwen.
+    # Keuzelijsten (klanten, chauffeurs) worden alleen bij het opbouwen gevuld.
+
+    def _on_show_klanten_page(self, stale_tables: set[str]) -> bool:
+        self._load_data_from_database()
+        self._refresh_klanten_table()
+        return True
+
+    def _on_show_chauffeurs_page(self, stale_tables: set[str]) -> bool:
+        self._load_data_from_database()
+        self._refresh_chauffeurs_table()
+        return True
+
+    def _on_show_bestellingen_page(self, stale_tables: set[str]) -> bool:
+        if not stale_tables <= {"bestellingen"}:
+            return False
+        self._refresh_bestellingen_table()
+        return True
+
+    def _on_show_planning_page(self, stale_tables: set[str]) -> bool:
+        self._refresh_planning_table()
+        return True
+
+    def _on_show_tracking_page(self, stale_tables: set[str]) -> bool:
+        if "chauffeurs" in stale_tables:
+            return False
+        self._refresh_tracking_table()
+        self._refresh_eventlog_table()
+        return True
+
+    def _on_show_chauffeur_leveringen_page(self, stale_tables: set[str]) -> bool:
+        self._refresh_chauffeur_deliveries()
+        return True
+
+    def _on_show_manager_prestaties_page(self, stale_tables: set[str]) -> bool:
+        self._refresh_manager_stats()
+        return True
+
+    def _on_show_manager_users_page(self, stale_tables: set[str]) -> bool:
+        if not stale_tables <= {"users"}:
+            return False
+        self._refresh_manager_users()
+        return True
+
+    def _on_show_klant_bestellingen_page(self, stale_tables: set[str]) -> bool:
+        self._refresh_klant_bestellingen()
+        self._refresh_klant_eventlog()
+        return True
+
     def _set_active_nav(self, active_page: str) -> None:
         for page_name, btn in getattr(self, "nav_buttons", {}).items():
             btn.configure(style="NavActive.TButton" if page_name == active_page else "Nav.TButton")
@@ -789,6 +2330,8 @@ class QuickDeliveryApp(tk.Tk):
         self.current_user_email = user.get("email")
         self.current_role = user.get("role")
         self.current_chauffeur_id = user.get("chauffeur_id")
+        self.current_klant_id = user.get("klant_id")
+        self._load_data_from_database()
         self._rebuild_navigation()
 
         if self.current_role == "planner":
@@ -806,6 +2349,7 @@ class QuickDeliveryApp(tk.Tk):
         self.current_user_email = None
         self.current_role = None
         self.current_chauffeur_id = None
+        self.current_klant_id = None
         self._rebuild_navigation()
         self.show_page("login")
 
@@ -829,7 +2373,6 @@ class QuickDeliveryApp(tk.Tk):
         left_panel.columnconfigure(0, weight=1)
 
         # Dashboard summary
-        self._load_data_from_database()
         deliveries = self._get_chauffeur_deliveries_sorted()
         active = [d for d in deliveries if not d.get("is_done")]
         done = [d for d in deliveries if d.get("is_done")]
@@ -931,92 +2474,85 @@ class QuickDeliveryApp(tk.Tk):
         self._refresh_chauffeur_deliveries()
 
     def _get_chauffeur_deliveries_sorted(self) -> list[dict]:
-        """Get deliveries for current chauffeur, sorted by optimized route order with ETA."""
+        """Leveringen van de huidige chauffeur: opgeslagen route per dag vanaf vandaag, daarna de afgeronde."""
         if not self.current_chauffeur_id:
             return []
 
-        # Filter bestellingen voor deze chauffeur
-        my_orders = [b for b in self.bestellingen_data if b.get("chauffeur_id") == self.current_chauffeur_id]
-        if not my_orders:
-            return []
+        rows = self.db_conn.execute(
+            f"""
+            SELECT rs.dag, rs.volgorde, rs.eta, b.id, b.klant, b.aflever, b.status, 0 AS is_done
+            FROM route_stops rs JOIN bestellingen b ON b.id = rs.bestelling_id
+            WHERE rs.chauffeur_id = ? AND {UPCOMING_DAG_SQL.format(col='rs.dag')}
+            UNION ALL
+            SELECT NULL, NULL, NULL, b.id, b.klant, b.aflever, b.status, 1 FROM bestellingen b
+            WHERE b.chauffeur_id = ? AND b.status IN {CLOSED_STATUSES}
+            ORDER BY is_done, dag, volgorde, id
+            """,
+            (self.current_chauffeur_id, self.current_chauffeur_id),
+        ).fetchall()
 
-        # Separate active vs completed
-        active = [b for b in my_orders if b.get("status") not in ("Afgeleverd", "Geannuleerd")]
-        completed = [b for b in my_orders if b.get("status") in ("Afgeleverd", "Geannuleerd")]
-
-        # Build stops for route optimization (active only)
-        stops = []
-        for b in active:
-            adres = (b.get("aflever") or "").strip()
-            if adres:
-                stops.append({"id": b["id"], "klant": b.get("klant", ""), "adres": adres, "order": b})
-
-        # Optimize route
-        if stops:
-            initial = self._nearest_neighbor_route(stops)
-            optimized = self._two_opt(initial)
-        else:
-            optimized = []
+        return [
+            {
+                "volgorde": row["volgorde"] if not row["is_done"] else "-",
+                "dag": row["dag"] or "",
+                "id": row["id"],
+                "klant": row["klant"] or "",
+                "adres": row["aflever"] or "",
+                "eta": row["eta"] if not row["is_done"] else "-",
+                "status": row["status"] or "",
+                "is_done": bool(row["is_done"]),
+            }
+            for row in rows
+        ]
 
-        # Bereken ETA
-        result = []
-        current_time_minutes = 8 * 60  # 08:00
-        prev_adres = "Depot"
-
-        for idx, stop in enumerate(optimized):
-            dist = self._estimate_distance_km(prev_adres, stop["adres"])
-            travel_min = int((dist / 30) * 60)
-            current_time_minutes += travel_min
-            eta_h = current_time_minutes // 60
-            eta_m = current_time_minutes % 60
-            eta_str = f"{eta_h:02d}:{eta_m:02d}"
-
-            order = stop["order"]
-            result.append({
-                "volgorde": idx + 1,
-                "id": order["id"],
-                "klant": order.get("klant", ""),
-                "adres": stop["adres"],
-                "eta": eta_str,
-                "status": order.get("status", ""),
-                "is_done": False,
-            })
+    def _refresh_chauffeur_deliveries(self) -> None:
+        if not hasattr(self, "chauffeur_tree"):
+            return
 
-            current_time_minutes += 5
-            prev_adres = stop["adres"]
+        deliveries = self._get_chauffeur_deliveries_sorted()
 
-        # Add completed at the end
-        for b in completed:
-            result.append({
-                "volgorde": "-",
-                "id": b["id"],
-                "klant": b.get("klant", ""),
-                "adres": b.get("aflever", ""),
-                "eta": "-",
-                "status": b.get("status", ""),
-                "is_done": True,
-            })
+        reconcile_tree(
+            self.chauffeur_tree,
+            [
+                (
+                    d["id"],
+                    (d["volgorde"], d["id"], d["klant"], d["adres"], d["eta"], d["status"]),
+                    ("delivered",) if d["is_done"] else (),
+                )
+                for d in deliveries
+            ],
+        )
+        self._schedule_chauffeur_route_update()
 
-        return result
+    def _schedule_chauffeur_route_update(self) -> None:
+        """Verouderde routes van deze chauffeur in de DB worker herberekenen en daarna opnieuw tonen.
 
-    def _refresh_chauffeur_deliveries(self) -> None:
-        if not hasattr(self, "chauffeur_tree"):
+        De stale-vlag in route_plans is de enige aanleiding: zonder verouderde
+        route (vanaf vandaag) gebeurt er niets, en er loopt er hooguit één tegelijk.
+        """
+        chauffeur_id = self.current_chauffeur_id
+        if not chauffeur_id or getattr(self, "_route_update_pending", False):
+            return
+        stale = self.db_conn.execute(
+            f"SELECT 1 FROM route_plans WHERE chauffeur_id = ? AND stale = 1 AND {UPCOMING_DAG_SQL.format(col='dag')} LIMIT 1",
+            (chauffeur_id,),
+        ).fetchone()
+        if not stale:
             return
 
-        for row in self.chauffeur_tree.get_children():
-            self.chauffeur_tree.delete(row)
+        def done(count: int) -> None:
+            self._route_update_pending = False
+            if count and self.current_chauffeur_id == chauffeur_id:
+                self._refresh_chauffeur_deliveries()
 
-        self._load_data_from_database()
-        deliveries = self._get_chauffeur_deliveries_sorted()
+        def failed(_exc: Exception) -> None:
+            # Bijv. database bezet; de volgende verversing probeert het opnieuw
+            self._route_update_pending = False
 
-        for d in deliveries:
-            tags = ("delivered",) if d["is_done"] else ()
-            self.chauffeur_tree.insert(
-                "",
-                tk.END,
-                values=(d["volgorde"], d["id"], d["klant"], d["adres"], d["eta"], d["status"]),
-                tags=tags,
-            )
+        self._route_update_pending = True
+        self.db.run(
+            lambda conn: self._update_route_plans(chauffeur_id, upcoming_only=True, conn=conn), done, failed
+        )
 
     def _chauffeur_update_status(self, new_status: str) -> None:
         if not hasattr(self, "chauffeur_tree"):
@@ -1032,12 +2568,12 @@ class QuickDeliveryApp(tk.Tk):
         if not best_id:
             return
 
-        cur = self.db_conn.cursor()
-        cur.execute("UPDATE bestellingen SET status = ? WHERE id = ?", (new_status, best_id))
-        self.db_conn.commit()
-        self._log_status_event(best_id, new_status, "Chauffeur update")
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute("UPDATE bestellingen SET status = ? WHERE id = ?", (new_status, best_id))
+            # Status en event in één commit
+            self._log_status_event(best_id, new_status, "Chauffeur update", conn=conn)
 
-        self._refresh_chauffeur_deliveries()
+        self.db.run(work, lambda _result: self._refresh_chauffeur_deliveries(), self._show_db_error)
 
     def _build_chauffeur_leveringen_page(self) -> None:
         """Pagina met alle leveringen voor de chauffeur."""
@@ -1099,7 +2635,6 @@ class QuickDeliveryApp(tk.Tk):
         title.grid(row=0, column=0, sticky="w", pady=(0, 12))
 
         # Route info
-        self._load_data_from_database()
         deliveries = self._get_chauffeur_deliveries_sorted()
         active = [d for d in deliveries if not d.get("is_done")]
 
@@ -1241,7 +2776,7 @@ class QuickDeliveryApp(tk.Tk):
         right_panel.columnconfigure(0, weight=1)
         right_panel.rowconfigure(0, weight=1)
 
-        columns = ("chauffeur", "totaal", "afgeleverd", "onderweg", "gepland", "gem_levertijd")
+        columns = ("chauffeur", "totaal", "afgeleverd", "onderweg", "gepland", "gem_levertijd", "p90_levertijd", "km")
         self.manager_tree = ttk.Treeview(right_panel, columns=columns, show="headings", height=14)
         self.manager_tree.heading("chauffeur", text="Chauffeur")
         self.manager_tree.heading("totaal", text="Totaal")
@@ -1249,6 +2784,8 @@ class QuickDeliveryApp(tk.Tk):
         self.manager_tree.heading("onderweg", text="Onderweg")
         self.manager_tree.heading("gepland", text="Gepland")
         self.manager_tree.heading("gem_levertijd", text="Gem. tijd")
+        self.manager_tree.heading("p90_levertijd", text="P90 tijd")
+        self.manager_tree.heading("km", text="Km")
 
         self.manager_tree.column("chauffeur", width=140, anchor="w")
         self.manager_tree.column("totaal", width=60, anchor="center")
@@ -1256,6 +2793,8 @@ class QuickDeliveryApp(tk.Tk):
         self.manager_tree.column("onderweg", width=80, anchor="center")
         self.manager_tree.column("gepland", width=60, anchor="center")
         self.manager_tree.column("gem_levertijd", width=80, anchor="center")
+        self.manager_tree.column("p90_levertijd", width=80, anchor="center")
+        self.manager_tree.column("km", width=60, anchor="center")
 
         scrollbar = ttk.Scrollbar(right_panel, orient="vertical", command=self.manager_tree.yview)
         self.manager_tree.configure(yscrollcommand=scrollbar.set)
@@ -1278,7 +2817,7 @@ class QuickDeliveryApp(tk.Tk):
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
 
-        columns = ("chauffeur", "totaal", "afgeleverd", "onderweg", "gepland", "gem_levertijd")
+        columns = ("chauffeur", "totaal", "afgeleverd", "onderweg", "gepland", "gem_levertijd", "p90_levertijd", "km")
         self.manager_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=16)
         self.manager_tree.heading("chauffeur", text="Chauffeur")
         self.manager_tree.heading("totaal", text="Totaal")
@@ -1286,6 +2825,8 @@ class QuickDeliveryApp(tk.Tk):
         self.manager_tree.heading("onderweg", text="Onderweg")
         self.manager_tree.heading("gepland", text="Gepland")
         self.manager_tree.heading("gem_levertijd", text="Gem. tijd")
+        self.manager_tree.heading("p90_levertijd", text="P90 tijd")
+        self.manager_tree.heading("km", text="Km")
 
         self.manager_tree.column("chauffeur", width=180, anchor="w")
         self.manager_tree.column("totaal", width=80, anchor="center")
@@ -1293,6 +2834,8 @@ class QuickDeliveryApp(tk.Tk):
         self.manager_tree.column("onderweg", width=100, anchor="center")
         self.manager_tree.column("gepland", width=80, anchor="center")
         self.manager_tree.column("gem_levertijd", width=100, anchor="center")
+        self.manager_tree.column("p90_levertijd", width=100, anchor="center")
+        self.manager_tree.column("km", width=80, anchor="center")
 
         scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.manager_tree.yview)
         self.manager_tree.configure(yscrollcommand=scrollbar.set)
@@ -1326,8 +2869,14 @@ class QuickDeliveryApp(tk.Tk):
         self.combo_manager_user_role.set("klant")
         self.combo_manager_user_role.grid(row=2, column=1, sticky="ew", padx=(8, 12), pady=4)
 
+        ttk.Label(form_frame, text="Klant (bij rol klant):").grid(row=3, column=0, sticky="w", padx=12, pady=4)
+        klant_options = ["(Geen)"] + [f"{k['id']}: {k['naam']}" for k in self.klanten_data]
+        self.combo_manager_user_klant = ttk.Combobox(form_frame, state="readonly", values=klant_options)
+        self.combo_manager_user_klant.set("(Geen)")
+        self.combo_manager_user_klant.grid(row=3, column=1, sticky="ew", padx=(8, 12), pady=4)
+
         btn_create = ttk.Button(form_frame, text="Account Aanmaken", command=self._manager_create_user)
-        btn_create.grid(row=3, column=0, columnspan=2, sticky="e", padx=12, pady=(8, 12))
+        btn_create.grid(row=4, column=0, columnspan=2, sticky="e", padx=12, pady=(8, 12))
 
         # List of existing users
         list_frame = ttk.LabelFrame(self.content, text="Bestaande Gebruikers")
@@ -1381,20 +2930,35 @@ class QuickDeliveryApp(tk.Tk):
             messagebox.showerror("Account bestaat al", "Dit e-mailadres is al geregistreerd.")
             return
 
+        klant_id = None
+        klant_value = self.combo_manager_user_klant.get() if hasattr(self, "combo_manager_user_klant") else ""
+        if role == "klant" and klant_value and klant_value != "(Geen)":
+            try:
+                klant_id = int(klant_value.split(":", 1)[0])
+            except ValueError:
+                klant_id = None
+
         # Account aanmaken
-        cur = self.db_conn.cursor()
-        cur.execute(
-            "INSERT INTO users (email, password, role) VALUES (?, ?, ?)",
-            (email, pw, role),
-        )
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT INTO users (email, password, role, klant_id) VALUES (?, ?, ?, ?)",
+                (email, pw, role, klant_id),
+            )
+            conn.commit()
+
+        self.db.run(work, lambda _result: self._after_manager_create_user(email, role), self._show_db_error)
 
+    def _after_manager_create_user(self, email: str, role: str) -> None:
         messagebox.showinfo("Succes", f"Account aangemaakt voor {email} met rol {role}.")
-        
+        if not (hasattr(self, "entry_manager_user_email") and self.entry_manager_user_email.winfo_exists()):
+            return
+
         # Formulier leegmaken
         self.entry_manager_user_email.delete(0, tk.END)
         self.entry_manager_user_password.delete(0, tk.END)
         self.combo_manager_user_role.set("klant")
+        if hasattr(self, "combo_manager_user_klant"):
+            self.combo_manager_user_klant.set("(Geen)")
         
         self._refresh_manager_users()
 
@@ -1422,24 +2986,20 @@ class QuickDeliveryApp(tk.Tk):
         if not messagebox.askyesno("Bevestigen", f"Weet je zeker dat je het account {email} wilt verwijderen?"):
             return
 
-        cur = self.db_conn.cursor()
-        cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            conn.commit()
 
-        self._refresh_manager_users()
+        self.db.run(work, lambda _result: self._refresh_manager_users(), self._show_db_error)
 
     def _refresh_manager_users(self) -> None:
         if not hasattr(self, "manager_users_tree"):
             return
 
-        for row in self.manager_users_tree.get_children():
-            self.manager_users_tree.delete(row)
-
         cur = self.db_conn.cursor()
         rows = cur.execute("SELECT id, email, role FROM users ORDER BY role, email").fetchall()
 
-        for row in rows:
-            self.manager_users_tree.insert("", tk.END, values=(row[0], row[1], row[2]))
+        reconcile_tree(self.manager_users_tree, [(row[0], (row[0], row[1], row[2]), ()) for row in rows])
 
     def _build_manager_rapporten_page(self) -> None:
         """Pagina met rapporten en export opties voor de manager."""
@@ -1492,154 +3052,448 @@ class QuickDeliveryApp(tk.Tk):
         ttk.Label(stats_frame, text="Succes ratio:", font=("Segoe UI", 11)).grid(row=5, column=0, sticky="w", padx=12, pady=(12, 12))
         ttk.Label(stats_frame, text=f"{success_rate}%", font=("Segoe UI", 14, "bold"), foreground=color).grid(row=5, column=1, sticky="e", padx=12, pady=(12, 12))
 
-    def _export_all_bestellingen_csv(self) -> None:
-        """Export alle bestellingen naar CSV."""
-        self._load_data_from_database()
-        if not self.bestellingen_data:
-            messagebox.showinfo("Export", "Geen bestellingen om te exporteren.")
+        # Maandoverzicht uit de KPI tabel
+        self.content.rowconfigure(3, weight=1)
+        month_frame = ttk.LabelFrame(self.content, text="Per maand (laatste 12 maanden)")
+        month_frame.grid(row=3, column=0, sticky="nsew", pady=(12, 0))
+        month_frame.columnconfigure(0, weight=1)
+        month_frame.rowconfigure(0, weight=1)
+
+        columns = ("maand", "bestellingen", "afgeleverd", "geannuleerd", "gem_levertijd", "p90_levertijd", "km")
+        month_tree = ttk.Treeview(month_frame, columns=columns, show="headings", height=8)
+        for col, text, width in (
+            ("maand", "Maand", 90),
+            ("bestellingen", "Bestellingen", 100),
+            ("afgeleverd", "Afgeleverd", 90),
+            ("geannuleerd", "Geannuleerd", 90),
+            ("gem_levertijd", "Gem. tijd", 90),
+            ("p90_levertijd", "P90 tijd", 90),
+            ("km", "Km", 70),
+        ):
+            month_tree.heading(col, text=text)
+            month_tree.column(col, width=width, anchor="w" if col == "maand" else "center")
+
+        month_scroll = ttk.Scrollbar(month_frame, orient="vertical", command=month_tree.yview)
+        month_tree.configure(yscrollcommand=month_scroll.set)
+        month_tree.grid(row=0, column=0, sticky="nsew", padx=(12, 0), pady=12)
+        month_scroll.grid(row=0, column=1, sticky="ns", padx=(0, 12), pady=12)
+
+        reconcile_tree(
+            month_tree,
+            [
+                (m["maand"], tuple(m[col] for col in columns), ())
+                for m in self._calculate_monthly_report()
+            ],
+        )
+
+    def _run_background_job(self, title: str, work, on_done) -> BackgroundJob:
+        """Start een BackgroundJob met een voortgangsvenster en een Annuleren knop."""
+        job = BackgroundJob(self.db_path, work)
+
+        win = tk.Toplevel(self)
+        win.title(title)
+        win.transient(self)
+        win.resizable(False, False)
+        win.columnconfigure(0, weight=1)
+
+        lbl = ttk.Label(win, text="Bezig...")
+        lbl.grid(row=0, column=0, sticky="w", padx=16, pady=(16, 8))
+        bar = ttk.Progressbar(win, length=320, mode="indeterminate")
+        bar.grid(row=1, column=0, sticky="ew", padx=16)
+        bar.start(15)
+        btn_cancel = ttk.Button(win, text="Annuleren", command=job.cancel)
+        btn_cancel.grid(row=2, column=0, sticky="e", padx=16, pady=16)
+        win.protocol("WM_DELETE_WINDOW", job.cancel)
+
+        def poll() -> None:
+            if not job.finished.is_set():
+                if job.total:
+                    if str(bar.cget("mode")) != "determinate":
+                        bar.stop()
+                        bar.configure(mode="determinate", maximum=job.total)
+                    bar.configure(value=job.done)
+                    lbl.configure(text=f"{job.done} van {job.total} rijen")
+                elif job.done:
+                    lbl.configure(text=f"{job.done} rijen")
+                if job.cancelled.is_set():
+                    lbl.configure(text="Annuleren...")
+                    btn_cancel.state(["disabled"])
+                self.after(100, poll)
+                return
+
+            win.destroy()
+            if job.cancelled.is_set():
+                return
+            if job.error is not None:
+                messagebox.showerror("Fout", f"{title} is mislukt: {job.error}")
+                return
+            on_done(job.result)
+
+        job.start()
+        self.after(100, poll)
+        return job
+
+    def _run_export(self, title: str, columns: list[tuple[str, str]], open_rows) -> None:
+        """Vraag een bestand en exporteer in de achtergrond.
+
+        open_rows(conn) draait in de exportthread en geeft (rijen, totaal) terug;
+        rijen mag een cursor zijn.
+        """
+        path = filedialog.asksaveasfilename(title=title, defaultextension=".csv", filetypes=EXPORT_FILETYPES)
+        if not path:
             return
 
-        path = filedialog.asksaveasfilename(
-            title="Exporteer bestellingen naar CSV",
-            defaultextension=".csv",
+        def work(job: BackgroundJob) -> int | None:
+            rows, total = open_rows(job.conn)
+            job.progress(0, total)
+            return write_export(path, columns, rows, job)
+
+        self._run_background_job(
+            title,
+            work,
+            lambda written: messagebox.showinfo("Export", f"{written} rijen geëxporteerd naar {Path(path).name}."),
+        )
+
+    def _import_csv(self, kind: str) -> None:
+        """Importeer klanten of bestellingen uit een CSV bestand (in de achtergrond)."""
+        path = filedialog.askopenfilename(
+            title=f"Importeer {kind} uit CSV",
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
         )
         if not path:
             return
 
+        def done(result: dict) -> None:
+            self._load_data_from_database()
+            if kind == "klanten":
+                self._refresh_klanten_table()
+            else:
+                self._refresh_bestellingen_table()
+                self._refresh_tracking_table()
+            text = f"{result['imported']} {kind} geïmporteerd."
+            if result["rejected"]:
+                text += f"\n{result['rejected']} rijen afgewezen, zie {Path(result['report']).name}."
+            messagebox.showinfo("Import", text)
+
+        self._run_background_job(f"Importeer {kind}", lambda job: self._import_rows(kind, path, job), done)
+
+    def _import_rows(self, kind: str, path: str, job: BackgroundJob) -> dict:
+        """Lees de CSV streaming en schrijf per IMPORT_CHUNK_SIZE rijen in één transactie.
+
+        Draait in de importthread. Afgewezen rijen komen met de reden in
+        <bestand>.afgewezen.csv. Al vastgelegde chunks blijven staan bij annuleren.
+        """
+        conn = job.conn
+        conn.isolation_level = None
+        chauffeurs: dict[str, int] = {}
+        for ch_id, naam in conn.execute("SELECT id, naam FROM chauffeurs"):
+            chauffeurs[str(ch_id)] = ch_id
+            chauffeurs.setdefault(naam.strip().lower(), ch_id)
+        dates: dict[str, str | None] = {}
+
+        report_path = str(Path(path).with_suffix("")) + ".afgewezen.csv"
+        report = None
+        imported = rejected = 0
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader, [])]
+            index = {}
+            for field, names in IMPORT_COLUMNS[kind].items():
+                index[field] = next((header.index(n) for n in names if n in header), None)
+
+            try:
+                while not job.cancelled.is_set():
+                    chunk = [(reader.line_num, row) for row in islice(reader, IMPORT_CHUNK_SIZE)]
+                    if not chunk:
+                        break
+                    good = []
+                    for line_no, row in chunk:
+                        values = {
+                            field: (row[i].strip() if i is not None and i < len(row) else "")
+                            for field, i in index.items()
+                        }
+                        if kind == "klanten":
+                            parsed = self._parse_import_klant(values)
+                        else:
+                            parsed = self._parse_import_bestelling(values, chauffeurs, dates)
+                        if isinstance(parsed, str):
+                            if report is None:
+                                report = open(report_path, "w", newline="", encoding="utf-8")
+                                report_writer = csv.writer(report)
+                                report_writer.writerow(["regel", "reden"] + header)
+                            report_writer.writerow([line_no, parsed] + row)
+                            rejected += 1
+                        else:
+                            good.append(parsed)
+
+                    if good:
+                        if kind == "klanten":
+                            self._insert_klanten_chunk(conn, good)
+                        else:
+                            self._insert_bestellingen_chunk(conn, good)
+                    imported += len(good)
+                    job.progress(imported + rejected)
+            finally:
+                if report is not None:
+                    report.close()
+
+        return {"imported": imported, "rejected": rejected, "report": report_path}
+
+    def _parse_import_klant(self, values: dict) -> tuple | str:
+        if not values["naam"] or not values["adres"]:
+            return "naam en adres zijn verplicht"
+        return (values["naam"], values["adres"], values["contact"])
+
+    def _parse_import_bestelling(self, values: dict, chauffeurs: dict[str, int], dates: dict) -> tuple | str:
+        if not values["klant"] or not values["ophaal"] or not values["aflever"]:
+            return "klant, ophaal en aflever zijn verplicht"
+
+        datum = values["datum"]
+        if datum not in dates:
+            # Zelfde regels als het formulier (DD-MM-JJJJ), plus de opgeslagen notatie uit exports
+            if self._is_valid_iso_date(datum):
+                dates[datum] = self._convert_date_to_db(datum)
+            else:
+                try:
+                    dates[datum] = datetime.datetime.strptime(datum, "%Y-%m-%d").strftime("%Y-%m-%d")
+                except ValueError:
+                    dates[datum] = None
+        db_datum = dates[datum]
+        if db_datum is None:
+            return f"ongeldige datum: {datum}"
+
+        status = values["status"].capitalize() or "Gepland"
+        if status not in BESTELLING_STATUSES:
+            return f"onbekende status: {values['status']}"
+
+        chauffeur_id = None
+        chauffeur = values["chauffeur"]
+        if chauffeur and chauffeur != "(Geen)":
+            # "12" of "12: Naam" is een id; alles anders (ook "2Fast Koeriers") een naam
+            prefix = chauffeur.split(":", 1)[0].strip()
+            key = prefix if prefix.isdigit() else chauffeur.strip().lower()
+            chauffeur_id = chauffeurs.get(key)
+            if chauffeur_id is None:
+                return f"onbekende chauffeur: {chauffeur}"
+
+        return (values["klant"], values["ophaal"], values["aflever"], db_datum, status, chauffeur_id)
+
+    def _insert_klanten_chunk(self, conn: sqlite3.Connection, rows: list[tuple]) -> None:
+        conn.execute("BEGIN IMMEDIATE")
         try:
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["ID", "Klant", "Ophaaladres", "Afleveradres", "Datum", "Status", "Chauffeur ID"])
-                for b in self.bestellingen_data:
-                    w.writerow([
-                        b.get("id", ""),
-                        b.get("klant", ""),
-                        b.get("ophaal", ""),
-                        b.get("aflever", ""),
-                        b.get("datum", ""),
-                        b.get("status", ""),
-                        b.get("chauffeur_id", ""),
-                    ])
-        except OSError:
-            messagebox.showerror("Fout", "Kon het CSV bestand niet opslaan.")
+            conn.executemany("INSERT INTO klanten (naam, adres, contact) VALUES (?, ?, ?)", rows)
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _insert_bestellingen_chunk(self, conn: sqlite3.Connection, rows: list[tuple]) -> None:
+        """Bestellingen plus hun 'Aangemaakt' status events in één transactie."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Met de schrijflock in handen krijgen de nieuwe rijen opeenvolgende ids na de hoogste tot nu toe
+            first_id = 1 + conn.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'bestellingen'), 0), "
+                "COALESCE((SELECT MAX(id) FROM bestellingen), 0))"
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status, chauffeur_id, klant_id) "
+                f"VALUES (?, ?, ?, ?, ?, ?, {KLANT_ID_FOR_NAME_SQL})",
+                [(*row, row[0]) for row in rows],
+            )
+            now = conn.execute("SELECT datetime('now','localtime')").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking) VALUES (?, ?, ?, ?)",
+                [(first_id + i, row[4], now, "Aangemaakt (import)") for i, row in enumerate(rows)],
+            )
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _export_all_bestellingen_csv(self) -> None:
+        """Export alle bestellingen naar CSV (of JSON Lines / gzip)."""
+        if not self.db_conn.execute("SELECT 1 FROM bestellingen LIMIT 1").fetchone():
+            messagebox.showinfo("Export", "Geen bestellingen om te exporteren.")
             return
 
-        messagebox.showinfo("Export", "CSV export is opgeslagen.")
+        def open_rows(conn: sqlite3.Connection):
+            total = conn.execute("SELECT COUNT(*) FROM bestellingen").fetchone()[0]
+            cur = conn.execute(
+                "SELECT id, klant, ophaal, aflever, COALESCE(datum, ''), COALESCE(status, ''), "
+                "COALESCE(chauffeur_id, '') FROM bestellingen ORDER BY id"
+            )
+            return cur, total
+
+        self._run_export(
+            "Exporteer bestellingen",
+            [
+                ("id", "ID"),
+                ("klant", "Klant"),
+                ("ophaal", "Ophaaladres"),
+                ("aflever", "Afleveradres"),
+                ("datum", "Datum"),
+                ("status", "Status"),
+                ("chauffeur_id", "Chauffeur ID"),
+            ],
+            open_rows,
+        )
 
     def _calculate_manager_stats(self) -> dict:
-        self._load_data_from_database()
-
-        totaal = len(self.bestellingen_data)
-        afgeleverd = sum(1 for b in self.bestellingen_data if b.get("status") == "Afgeleverd")
-        onderweg = sum(1 for b in self.bestellingen_data if b.get("status") == "Onderweg")
-        gepland = sum(1 for b in self.bestellingen_data if b.get("status") == "Gepland")
-        geannuleerd = sum(1 for b in self.bestellingen_data if b.get("status") == "Geannuleerd")
+        cur = self.db_conn.cursor()
+        per_status = {r[0]: r[1] for r in cur.execute("SELECT status, COUNT(*) FROM bestellingen GROUP BY status")}
 
         return {
-            "totaal": totaal,
-            "afgeleverd": afgeleverd,
-            "onderweg": onderweg,
-            "gepland": gepland,
-            "geannuleerd": geannuleerd,
+            "totaal": sum(per_status.values()),
+            "afgeleverd": per_status.get("Afgeleverd", 0),
+            "onderweg": per_status.get("Onderweg", 0),
+            "gepland": per_status.get("Gepland", 0),
+            "geannuleerd": per_status.get("Geannuleerd", 0),
         }
 
-    def _calculate_chauffeur_performance(self) -> list[dict]:
-        chauffeur_map = {c["id"]: c["naam"] for c in getattr(self, "chauffeurs_data", [])}
+    def _calculate_chauffeur_performance(self, dag_van: str | None = None, dag_tot: str | None = None) -> list[dict]:
+        """Prestaties per chauffeur uit de dagelijkse KPI tabel (optioneel binnen een periode)."""
+        clauses: list[str] = []
+        params: list = []
+        if dag_van:
+            clauses.append("k.dag >= ?")
+            params.append(dag_van)
+        if dag_tot:
+            clauses.append("k.dag <= ?")
+            params.append(dag_tot)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        cur = self.db_conn.cursor()
+        rows = cur.execute(
+            f"""
+            SELECT COALESCE(c.id, 0) AS chauffeur_id, c.naam, k.bestellingen, k.afgeleverd, k.onderweg,
+                   k.gepland, k.levertijd_som, k.levertijd_aantal, k.levertijd_hist, k.km
+            FROM chauffeur_daily_kpi k
+            LEFT JOIN chauffeurs c ON c.id = k.chauffeur_id
+            {where}
+            """,
+            params,
+        ).fetchall()
 
         # Groepeer per chauffeur
-        perf: dict[int | None, dict] = {}
-        for best in self.bestellingen_data:
-            ch_id = best.get("chauffeur_id")
-            if ch_id not in perf:
-                perf[ch_id] = {"totaal": 0, "afgeleverd": 0, "onderweg": 0, "gepland": 0, "levertijden": []}
-            perf[ch_id]["totaal"] += 1
-            status = best.get("status", "")
-            if status == "Afgeleverd":
-                perf[ch_id]["afgeleverd"] += 1
-                # Bereken levertijd
-                events = self._get_status_events_for_bestelling(best["id"])
-                if len(events) >= 2:
-                    # Tijd tussen eerste en laatste event
-                    try:
-                        first = events[-1]["timestamp"]
-                        last = events[0]["timestamp"]
-                        t1 = datetime.datetime.fromisoformat(first)
-                        t2 = datetime.datetime.fromisoformat(last)
-                        delta_min = (t2 - t1).total_seconds() / 60
-                        if delta_min > 0:
-                            perf[ch_id]["levertijden"].append(delta_min)
-                    except (ValueError, TypeError):
-                        pass
-            elif status == "Onderweg":
-                perf[ch_id]["onderweg"] += 1
-            elif status == "Gepland":
-                perf[ch_id]["gepland"] += 1
+        perf: dict[int, dict] = {}
+        for r in rows:
+            data = perf.setdefault(
+                r["chauffeur_id"],
+                {"naam": r["naam"], "totaal": 0, "afgeleverd": 0, "onderweg": 0, "gepland": 0,
+                 "levertijd_som": 0.0, "levertijd_aantal": 0, "hist": {}, "km": 0.0},
+            )
+            data["totaal"] += r["bestellingen"]
+            data["afgeleverd"] += r["afgeleverd"]
+            data["onderweg"] += r["onderweg"]
+            data["gepland"] += r["gepland"]
+            data["levertijd_som"] += r["levertijd_som"]
+            data["levertijd_aantal"] += r["levertijd_aantal"]
+            data["km"] += r["km"]
+            for bucket, count in json.loads(r["levertijd_hist"] or "{}").items():
+                data["hist"][bucket] = data["hist"].get(bucket, 0) + count
 
         # Resultaat
         result = []
         for ch_id, data in perf.items():
-            naam = chauffeur_map.get(ch_id, "(Geen chauffeur)") if ch_id else "(Geen chauffeur)"
-            gem_levertijd = "-"
-            if data["levertijden"]:
-                avg = sum(data["levertijden"]) / len(data["levertijden"])
-                if avg < 60:
-                    gem_levertijd = f"{int(avg)} min"
-                else:
-                    gem_levertijd = f"{avg / 60:.1f} uur"
+            if not data["totaal"]:
+                continue
+            avg = data["levertijd_som"] / data["levertijd_aantal"] if data["levertijd_aantal"] else None
             result.append({
-                "chauffeur": naam,
+                "chauffeur_id": ch_id,
+                "chauffeur": data["naam"] if ch_id else "(Geen chauffeur)",
                 "totaal": data["totaal"],
                 "afgeleverd": data["afgeleverd"],
                 "onderweg": data["onderweg"],
                 "gepland": data["gepland"],
-                "gem_levertijd": gem_levertijd,
+                "gem_levertijd": self._format_minutes(avg),
+                "p90_levertijd": self._format_minutes(self._histogram_percentile(data["hist"], 90)),
+                "km": round(data["km"], 1),
             })
 
         # Sorteer op totaal
         result.sort(key=lambda x: x["totaal"], reverse=True)
         return result
 
+    def _calculate_monthly_report(self, months: int = 12) -> list[dict]:
+        """Maandtotalen over de laatste maanden, rechtstreeks uit de KPI tabel."""
+        cur = self.db_conn.cursor()
+        rows = cur.execute(
+            """
+            SELECT substr(dag, 1, 7) AS maand, SUM(bestellingen) AS bestellingen, SUM(afgeleverd) AS afgeleverd,
+                   SUM(geannuleerd) AS geannuleerd, SUM(levertijd_som) AS levertijd_som,
+                   SUM(levertijd_aantal) AS levertijd_aantal, SUM(km) AS km, group_concat(levertijd_hist, '|') AS hists
+            FROM chauffeur_daily_kpi
+            WHERE dag >= date('now', 'localtime', 'start of month', ?)
+            GROUP BY maand
+            ORDER BY maand DESC
+            """,
+            (f"-{int(months) - 1} months",),
+        ).fetchall()
+
+        report = []
+        for r in rows:
+            hist: dict[str, int] = {}
+            for part in (r["hists"] or "").split("|"):
+                for bucket, count in json.loads(part or "{}").items():
+                    hist[bucket] = hist.get(bucket, 0) + count
+            avg = r["levertijd_som"] / r["levertijd_aantal"] if r["levertijd_aantal"] else None
+            report.append({
+                "maand": r["maand"],
+                "bestellingen": r["bestellingen"],
+                "afgeleverd": r["afgeleverd"],
+                "geannuleerd": r["geannuleerd"],
+                "gem_levertijd": self._format_minutes(avg),
+                "p90_levertijd": self._format_minutes(self._histogram_percentile(hist, 90)),
+                "km": round(r["km"] or 0, 1),
+            })
+        return report
+
     def _refresh_manager_stats(self) -> None:
         if not hasattr(self, "manager_tree"):
             return
 
-        for row in self.manager_tree.get_children():
-            self.manager_tree.delete(row)
-
         perf = self._calculate_chauffeur_performance()
-        for p in perf:
-            self.manager_tree.insert(
-                "",
-                tk.END,
-                values=(p["chauffeur"], p["totaal"], p["afgeleverd"], p["onderweg"], p["gepland"], p["gem_levertijd"]),
-            )
+        reconcile_tree(
+            self.manager_tree,
+            [
+                (
+                    p["chauffeur_id"],
+                    (
+                        p["chauffeur"],
+                        p["totaal"],
+                        p["afgeleverd"],
+                        p["onderweg"],
+                        p["gepland"],
+                        p["gem_levertijd"],
+                        p["p90_levertijd"],
+                        p["km"],
+                    ),
+                    (),
+                )
+                for p in perf
+            ],
+        )
 
     def _export_manager_csv(self) -> None:
+        # Komt uit de KPI tabel: één rij per chauffeur, dus klein genoeg om vooraf te berekenen
         perf = self._calculate_chauffeur_performance()
         if not perf:
             messagebox.showinfo("Export", "Geen data om te exporteren.")
             return
 
-        path = filedialog.asksaveasfilename(
-            title="Exporteer prestaties naar CSV",
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-        )
-        if not path:
-            return
-
-        try:
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["Chauffeur", "Totaal", "Afgeleverd", "Onderweg", "Gepland", "Gem. levertijd"])
-                for p in perf:
-                    w.writerow([p["chauffeur"], p["totaal"], p["afgeleverd"], p["onderweg"], p["gepland"], p["gem_levertijd"]])
-        except OSError:
-            messagebox.showerror("Fout", "Kon het CSV bestand niet opslaan.")
-            return
-
-        messagebox.showinfo("Export", "CSV export is opgeslagen.")
+        columns = [
+            ("chauffeur", "Chauffeur"),
+            ("totaal", "Totaal"),
+            ("afgeleverd", "Afgeleverd"),
+            ("onderweg", "Onderweg"),
+            ("gepland", "Gepland"),
+            ("gem_levertijd", "Gem. levertijd"),
+            ("p90_levertijd", "P90 levertijd"),
+            ("km", "Km"),
+        ]
+        rows = [tuple(p[key] for key, _label in columns) for p in perf]
+        self._run_export("Exporteer prestaties", columns, lambda _conn: (rows, len(rows)))
 
     def _build_klant_dashboard_page(self) -> None:
         self.content.columnconfigure(0, weight=1)
@@ -1656,12 +3510,8 @@ class QuickDeliveryApp(tk.Tk):
         main_frame.rowconfigure(0, weight=1)
 
         # Dashboard summary
-        self._load_data_from_database()
-        all_orders = self.bestellingen_data
-        active = [b for b in all_orders if b.get("status") in ("Gepland", "Onderweg")]
-        delivered = [b for b in all_orders if b.get("status") == "Afgeleverd"]
-        onderweg = [b for b in all_orders if b.get("status") == "Onderweg"]
-        gepland = [b for b in all_orders if b.get("status") == "Gepland"]
+        overview = self._klant_overview()
+        counts = overview["counts"]
 
         # LEFT PANEL - Stats & Info
         left_panel = ttk.Frame(main_frame)
@@ -1674,29 +3524,29 @@ class QuickDeliveryApp(tk.Tk):
         stats_card.columnconfigure(1, weight=1)
 
         ttk.Label(stats_card, text="Totaal bestellingen:", font=("Segoe UI", 10)).grid(row=0, column=0, sticky="w", padx=12, pady=(8, 2))
-        ttk.Label(stats_card, text=str(len(all_orders)), font=("Segoe UI", 12, "bold")).grid(row=0, column=1, sticky="e", padx=12, pady=(8, 2))
+        ttk.Label(stats_card, text=str(overview["total"]), font=("Segoe UI", 12, "bold")).grid(row=0, column=1, sticky="e", padx=12, pady=(8, 2))
 
         ttk.Label(stats_card, text="Gepland:", font=("Segoe UI", 10)).grid(row=1, column=0, sticky="w", padx=12, pady=2)
-        ttk.Label(stats_card, text=str(len(gepland)), font=("Segoe UI", 12, "bold"), foreground="#666666").grid(row=1, column=1, sticky="e", padx=12, pady=2)
+        ttk.Label(stats_card, text=str(counts.get("Gepland", 0)), font=("Segoe UI", 12, "bold"), foreground="#666666").grid(row=1, column=1, sticky="e", padx=12, pady=2)
 
         ttk.Label(stats_card, text="Onderweg:", font=("Segoe UI", 10)).grid(row=2, column=0, sticky="w", padx=12, pady=2)
-        ttk.Label(stats_card, text=str(len(onderweg)), font=("Segoe UI", 12, "bold"), foreground="#E67E22").grid(row=2, column=1, sticky="e", padx=12, pady=2)
+        ttk.Label(stats_card, text=str(counts.get("Onderweg", 0)), font=("Segoe UI", 12, "bold"), foreground="#E67E22").grid(row=2, column=1, sticky="e", padx=12, pady=2)
 
         ttk.Label(stats_card, text="Bezorgd:", font=("Segoe UI", 10)).grid(row=3, column=0, sticky="w", padx=12, pady=(2, 8))
-        ttk.Label(stats_card, text=str(len(delivered)), font=("Segoe UI", 12, "bold"), foreground="#27AE60").grid(row=3, column=1, sticky="e", padx=12, pady=(2, 8))
+        ttk.Label(stats_card, text=str(counts.get("Afgeleverd", 0)), font=("Segoe UI", 12, "bold"), foreground="#27AE60").grid(row=3, column=1, sticky="e", padx=12, pady=(2, 8))
 
         # Current order highlight
         current_card = ttk.LabelFrame(left_panel, text="Huidige Status")
         current_card.grid(row=1, column=0, sticky="ew", pady=(0, 12))
         current_card.columnconfigure(0, weight=1)
 
-        if onderweg:
-            latest = onderweg[0]
+        if overview["first"]["Onderweg"]:
+            latest = overview["first"]["Onderweg"]
             ttk.Label(current_card, text="Nu onderweg!", font=("Segoe UI", 11, "bold"), foreground="#E67E22").grid(row=0, column=0, sticky="w", padx=12, pady=(8, 4))
             ttk.Label(current_card, text=f"Bestelling #{latest['id']}", font=("Segoe UI", 10)).grid(row=1, column=0, sticky="w", padx=12, pady=2)
             ttk.Label(current_card, text=f"Naar: {latest.get('aflever', '')}", font=("Segoe UI", 10)).grid(row=2, column=0, sticky="w", padx=12, pady=(2, 8))
-        elif gepland:
-            latest = gepland[0]
+        elif overview["first"]["Gepland"]:
+            latest = overview["first"]["Gepland"]
             ttk.Label(current_card, text="Volgende bestelling", font=("Segoe UI", 11, "bold")).grid(row=0, column=0, sticky="w", padx=12, pady=(8, 4))
             ttk.Label(current_card, text=f"Bestelling #{latest['id']}", font=("Segoe UI", 10)).grid(row=1, column=0, sticky="w", padx=12, pady=2)
             ttk.Label(current_card, text="Status: Gepland", font=("Segoe UI", 10), foreground="#666666").grid(row=2, column=0, sticky="w", padx=12, pady=(2, 8))
@@ -1750,7 +3600,7 @@ class QuickDeliveryApp(tk.Tk):
         ttk.Label(search_frame, text="Zoek:").grid(row=0, column=0, sticky="w")
         self.entry_klant_search = ttk.Entry(search_frame)
         self.entry_klant_search.grid(row=0, column=1, sticky="ew", padx=(8, 0))
-        self.entry_klant_search.bind("<KeyRelease>", lambda _e: self._refresh_klant_bestellingen())
+        self.entry_klant_search.bind("<KeyRelease>", lambda _e: self._search_klant_bestellingen())
 
         columns = ("id", "klant", "aflever", "status", "eta")
         self.klant_tree = ttk.Treeview(right_panel, columns=columns, show="headings", height=14)
@@ -1768,8 +3618,11 @@ class QuickDeliveryApp(tk.Tk):
 
         scrollbar = ttk.Scrollbar(right_panel, orient="vertical", command=self.klant_tree.yview)
         self.klant_tree.configure(yscrollcommand=scrollbar.set)
-        self.klant_tree.grid(row=1, column=0, sticky="nsew", padx=(12, 0), pady=(0, 12))
-        scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 12), pady=(0, 12))
+        self.klant_tree.grid(row=1, column=0, sticky="nsew", padx=(12, 0), pady=(0, 6))
+        scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 12), pady=(0, 6))
+
+        pager = self._build_pager(right_panel, "klant", self._refresh_klant_bestellingen)
+        pager.grid(row=2, column=0, columnspan=2, sticky="ew", padx=12, pady=(0, 12))
 
         # Status colors
         self.klant_tree.tag_configure("gepland", foreground="#666666")
@@ -1783,26 +3636,40 @@ class QuickDeliveryApp(tk.Tk):
         self._klant_auto_refresh_enabled = False
         self._refresh_klant_bestellingen()
 
-    def _refresh_klant_bestellingen(self) -> None:
-        if not hasattr(self, "klant_tree"):
-            return
-
-        for row in self.klant_tree.get_children():
-            self.klant_tree.delete(row)
-
-        self._load_data_from_database()
-
+    def _get_klant_filters(self) -> dict:
         term = ""
         if hasattr(self, "entry_klant_search"):
             term = (self.entry_klant_search.get() or "").strip().lower()
+        return {"term": term, "term_column": "klant", "term_id": True, **self._role_scope_filters()}
 
-        for best in self.bestellingen_data:
-            # Filter op zoekterm
-            if term:
-                hay = f"{best.get('id', '')} {best.get('klant', '')}".lower()
-                if term not in hay:
-                    continue
+    def _search_klant_bestellingen(self) -> None:
+        if not hasattr(self, "klant_tree"):
+            return
+        filters = self._get_klant_filters()
+        self.search.schedule(
+            "klant",
+            lambda conn: self._query_bestellingen(filters, limit=PAGE_SIZE + 1, conn=conn),
+            lambda rows: self._show_klant_bestellingen(rows, reset_page=True),
+            token=filters,
+        )
+
+    def _refresh_klant_bestellingen(self, reset_page: bool = False) -> None:
+        if not hasattr(self, "klant_tree"):
+            return
+        self.search.cancel("klant")
+        after_id = self._pager_after_id("klant", reset=reset_page)
+        rows = self._query_bestellingen(self._get_klant_filters(), after_id=after_id, limit=PAGE_SIZE + 1)
+        self._show_klant_bestellingen(rows)
 
+    def _show_klant_bestellingen(self, rows: list[dict], reset_page: bool = False) -> None:
+        if not hasattr(self, "klant_tree"):
+            return
+        if reset_page:
+            self._pager_after_id("klant", reset=True)
+        rows = self._pager_page_rows("klant", rows)
+
+        tree_rows = []
+        for best in rows:
             # Bereken ETA
             status = best.get("status", "")
             if status == "Afgeleverd":
@@ -1817,51 +3684,30 @@ class QuickDeliveryApp(tk.Tk):
             # Tag voor kleuren
             tag = status.lower() if status else "gepland"
 
-            self.klant_tree.insert(
-                "",
-                tk.END,
-                values=(best["id"], best.get("klant", ""), best.get("aflever", ""), status, eta),
-                tags=(tag,),
-            )
+            tree_rows.append((best["id"], (best["id"], best.get("klant", ""), best.get("aflever", ""), status, eta), (tag,)))
+
+        reconcile_tree(self.klant_tree, tree_rows)
 
     def _refresh_klant_eventlog(self) -> None:
         if not hasattr(self, "klant_eventlog_tree"):
             return
 
-        for row in self.klant_eventlog_tree.get_children():
-            self.klant_eventlog_tree.delete(row)
-
-        if not hasattr(self, "klant_tree"):
-            return
-
-        selected = self.klant_tree.selection()
-        if not selected:
-            return
-
-        values = self.klant_tree.item(selected[0], "values")
-        best_id = int(values[0]) if values else None
-        if not best_id:
-            return
-
-        events = self._get_status_events_for_bestelling(best_id)
-        for ev in events:
-            self.klant_eventlog_tree.insert("", tk.END, values=(ev["timestamp"], ev["status"], ev["opmerking"] or ""))
+        events: list[dict] = []
+        selected = self.klant_tree.selection() if hasattr(self, "klant_tree") else ()
+        if selected:
+            values = self.klant_tree.item(selected[0], "values")
+            best_id = int(values[0]) if values else None
+            if best_id:
+                events = self._get_status_events_for_bestelling(best_id)
+
+        reconcile_tree(
+            self.klant_eventlog_tree,
+            [(ev["id"], (ev["timestamp"], ev["status"], ev["opmerking"] or ""), ()) for ev in events],
+        )
 
     def _toggle_klant_auto_refresh(self) -> None:
         self._klant_auto_refresh_enabled = bool(self.var_klant_auto.get()) if hasattr(self, "var_klant_auto") else False
-        if self._klant_auto_refresh_enabled:
-            self._schedule_klant_refresh()
-
-    def _schedule_klant_refresh(self) -> None:
-        if not self._klant_auto_refresh_enabled:
-            return
-        self.after(5000, self._klant_refresh_tick)
-
-    def _klant_refresh_tick(self) -> None:
-        if self._klant_auto_refresh_enabled:
-            self._refresh_klant_bestellingen()
-            self._refresh_klant_eventlog()
-            self._schedule_klant_refresh()
+        self._ensure_refresh_scheduler()
 
     def _build_klant_bestellingen_page(self) -> None:
         """Pagina met alle bestellingen voor de klant."""
@@ -1879,7 +3725,7 @@ class QuickDeliveryApp(tk.Tk):
         ttk.Label(action_frame, text="Zoek:").grid(row=0, column=0, sticky="w")
         self.entry_klant_search = ttk.Entry(action_frame, width=20)
         self.entry_klant_search.grid(row=0, column=1, sticky="ew", padx=(8, 8))
-        self.entry_klant_search.bind("<KeyRelease>", lambda _e: self._refresh_klant_bestellingen())
+        self.entry_klant_search.bind("<KeyRelease>", lambda _e: self._search_klant_bestellingen())
 
         refresh_btn = ttk.Button(action_frame, text="Ververs", command=self._refresh_klant_bestellingen)
         refresh_btn.grid(row=0, column=2)
@@ -1909,6 +3755,9 @@ class QuickDeliveryApp(tk.Tk):
         self.klant_tree.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
 
+        pager = self._build_pager(table_frame, "klant", self._refresh_klant_bestellingen)
+        pager.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(6, 0))
+
         self.klant_tree.tag_configure("gepland", foreground="#666666")
         self.klant_tree.tag_configure("onderweg", foreground="#E67E22")
         self.klant_tree.tag_configure("afgeleverd", foreground="#27AE60")
@@ -1925,23 +3774,20 @@ class QuickDeliveryApp(tk.Tk):
         title.grid(row=0, column=0, sticky="w", pady=(0, 12))
 
         # Current status
-        self._load_data_from_database()
-        all_orders = self.bestellingen_data
-        onderweg = [b for b in all_orders if b.get("status") == "Onderweg"]
-        gepland = [b for b in all_orders if b.get("status") == "Gepland"]
+        overview = self._klant_overview()
 
         status_frame = ttk.LabelFrame(self.content, text="Huidige Status")
         status_frame.grid(row=1, column=0, sticky="ew", pady=(0, 12))
         status_frame.columnconfigure(0, weight=1)
 
-        if onderweg:
-            latest = onderweg[0]
+        if overview["first"]["Onderweg"]:
+            latest = overview["first"]["Onderweg"]
             ttk.Label(status_frame, text="Levering onderweg!", font=("Segoe UI", 14, "bold"), foreground="#E67E22").grid(row=0, column=0, sticky="w", padx=12, pady=(12, 4))
             ttk.Label(status_frame, text=f"Bestelling #{latest['id']}", font=("Segoe UI", 11)).grid(row=1, column=0, sticky="w", padx=12, pady=2)
             ttk.Label(status_frame, text=f"Naar: {latest.get('aflever', '')}", font=("Segoe UI", 11)).grid(row=2, column=0, sticky="w", padx=12, pady=2)
             ttk.Label(status_frame, text="Verwachte aankomst: Binnenkort", font=("Segoe UI", 11, "bold")).grid(row=3, column=0, sticky="w", padx=12, pady=(2, 12))
-        elif gepland:
-            latest = gepland[0]
+        elif overview["first"]["Gepland"]:
+            latest = overview["first"]["Gepland"]
             ttk.Label(status_frame, text="Levering gepland", font=("Segoe UI", 14, "bold"), foreground="#666666").grid(row=0, column=0, sticky="w", padx=12, pady=(12, 4))
             ttk.Label(status_frame, text=f"Bestelling #{latest['id']}", font=("Segoe UI", 11)).grid(row=1, column=0, sticky="w", padx=12, pady=2)
             ttk.Label(status_frame, text="Status: Wacht op chauffeur", font=("Segoe UI", 11)).grid(row=2, column=0, sticky="w", padx=12, pady=(2, 12))
@@ -1971,10 +3817,10 @@ class QuickDeliveryApp(tk.Tk):
         self.klant_tracking_tree.grid(row=0, column=0, sticky="nsew", padx=(12, 0), pady=12)
         ev_scroll.grid(row=0, column=1, sticky="ns", padx=(0, 12), pady=12)
 
-        # Vul de tracking tabel met recente events
-        for best in all_orders[:10]:
-            events = self._get_status_events_for_bestelling(best["id"])
-            for ev in events[:3]:
+        # Vul de tracking tabel met recente events (3 per bestelling, één query)
+        recent = self._get_recent_status_events([best["id"] for best in overview["recent"]], per_order=3)
+        for best in overview["recent"]:
+            for ev in recent.get(best["id"], []):
                 self.klant_tracking_tree.insert("", tk.END, values=(
                     ev["timestamp"],
                     f"#{best['id']}",
@@ -2054,14 +3900,20 @@ class QuickDeliveryApp(tk.Tk):
             messagebox.showwarning("Validatie", "Naam is verplicht voor een chauffeur.")
             return
 
-        cur = self.db_conn.cursor()
-        cur.execute(
-            "INSERT INTO chauffeurs (naam, voertuig, beschikbaar) VALUES (?, ?, ?)",
-            (naam, voertuig, beschikbaar),
-        )
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT INTO chauffeurs (naam, voertuig, beschikbaar) VALUES (?, ?, ?)",
+                (naam, voertuig, beschikbaar),
+            )
+            conn.commit()
 
+        self.db.run(work, lambda _result: self._after_add_chauffeur(), self._show_db_error)
+
+    def _after_add_chauffeur(self) -> None:
         self._load_data_from_database()
+        if not (hasattr(self, "entry_chauffeur_naam") and self.entry_chauffeur_naam.winfo_exists()):
+            return
+
         self.entry_chauffeur_naam.delete(0, tk.END)
         self.entry_chauffeur_voertuig.delete(0, tk.END)
         self.var_chauffeur_beschikbaar.set(1)
@@ -2086,10 +3938,13 @@ class QuickDeliveryApp(tk.Tk):
         if not messagebox.askyesno("Bevestigen", "Weet je zeker dat je deze chauffeur wilt verwijderen?"):
             return
 
-        cur = self.db_conn.cursor()
-        cur.execute("DELETE FROM chauffeurs WHERE id = ?", (chauffeur_id,))
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM chauffeurs WHERE id = ?", (chauffeur_id,))
+            conn.commit()
 
+        self.db.run(work, lambda _result: self._after_chauffeurs_changed(), self._show_db_error)
+
+    def _after_chauffeurs_changed(self) -> None:
         self._load_data_from_database()
         self._refresh_chauffeurs_table()
 
@@ -2097,15 +3952,13 @@ class QuickDeliveryApp(tk.Tk):
         if not hasattr(self, "chauffeurs_tree"):
             return
 
-        for row in self.chauffeurs_tree.get_children():
-            self.chauffeurs_tree.delete(row)
-
-        for ch in getattr(self, "chauffeurs_data", []):
-            self.chauffeurs_tree.insert(
-                "",
-                tk.END,
-                values=(ch["id"], ch["naam"], ch["voertuig"] or "", "Ja" if ch["beschikbaar"] else "Nee"),
-            )
+        reconcile_tree(
+            self.chauffeurs_tree,
+            [
+                (ch["id"], (ch["id"], ch["naam"], ch["voertuig"] or "", "Ja" if ch["beschikbaar"] else "Nee"), ())
+                for ch in getattr(self, "chauffeurs_data", [])
+            ],
+        )
 
     def _build_dashboard_page(self) -> None:
         title = ttk.Label(self.content, text="Dashboard", font=("Segoe UI", 14, "bold"))
@@ -2161,8 +4014,11 @@ class QuickDeliveryApp(tk.Tk):
         edit_button = ttk.Button(button_row, text="Wijzigen", command=self._edit_selected_klant)
         edit_button.grid(row=0, column=1, sticky="w", padx=(8, 0))
 
+        import_button = ttk.Button(button_row, text="Importeer CSV", command=lambda: self._import_csv("klanten"))
+        import_button.grid(row=0, column=2, sticky="e", padx=(0, 8))
+
         add_button = ttk.Button(button_row, text="Toevoegen", command=self._add_klant)
-        add_button.grid(row=0, column=2, sticky="e")
+        add_button.grid(row=0, column=3, sticky="e")
 
         # Tabel
         table_frame = ttk.Frame(self.content)
@@ -2174,7 +4030,7 @@ class QuickDeliveryApp(tk.Tk):
         ttk.Label(search_row, text="Zoek:").grid(row=0, column=0, sticky="w")
         self.entry_klant_search = ttk.Entry(search_row)
         self.entry_klant_search.grid(row=0, column=1, sticky="ew", padx=(8, 0))
-        self.entry_klant_search.bind("<KeyRelease>", lambda _event: self._refresh_klanten_table())
+        self.entry_klant_search.bind("<KeyRelease>", lambda _event: self._search_klanten_table())
 
         columns = ("id", "naam", "adres", "contact")
         self.klanten_tree = ttk.Treeview(
@@ -2255,10 +4111,13 @@ class QuickDeliveryApp(tk.Tk):
         if not messagebox.askyesno("Bevestigen", "Weet je zeker dat je deze klant wilt verwijderen?"):
             return
 
-        cur = self.db_conn.cursor()
-        cur.execute("DELETE FROM klanten WHERE id = ?", (klant_id,))
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM klanten WHERE id = ?", (klant_id,))
+            conn.commit()
+
+        self.db.run(work, lambda _result: self._after_klanten_changed(), self._show_db_error)
 
+    def _after_klanten_changed(self) -> None:
         self._load_data_from_database()
         self._refresh_klanten_table()
 
@@ -2271,24 +4130,30 @@ class QuickDeliveryApp(tk.Tk):
             messagebox.showwarning("Validatie", "Naam en adres zijn verplicht voor een klant.")
             return
 
-        cur = self.db_conn.cursor()
-
         # Check if we are editing an existing klant
         editing_id = getattr(self, "_editing_klant_id", None)
-        if editing_id:
-            cur.execute(
-                "UPDATE klanten SET naam = ?, adres = ?, contact = ? WHERE id = ?",
-                (naam, adres, contact, editing_id),
-            )
-            self._editing_klant_id = None
-        else:
-            cur.execute(
-                "INSERT INTO klanten (naam, adres, contact) VALUES (?, ?, ?)",
-                (naam, adres, contact),
-            )
-        self.db_conn.commit()
 
+        def work(conn: sqlite3.Connection) -> None:
+            if editing_id:
+                conn.execute(
+                    "UPDATE klanten SET naam = ?, adres = ?, contact = ? WHERE id = ?",
+                    (naam, adres, contact, editing_id),
+                )
+            else:
+                conn.execute(
+                    "INSERT INTO klanten (naam, adres, contact) VALUES (?, ?, ?)",
+                    (naam, adres, contact),
+                )
+            conn.commit()
+
+        self.db.run(work, lambda _result: self._after_add_klant(editing_id), self._show_db_error)
+
+    def _after_add_klant(self, editing_id: int | None) -> None:
+        if getattr(self, "_editing_klant_id", None) == editing_id:
+            self._editing_klant_id = None
         self._load_data_from_database()
+        if not (hasattr(self, "entry_klant_naam") and self.entry_klant_naam.winfo_exists()):
+            return
 
         self.entry_klant_naam.delete(0, tk.END)
         self.entry_klant_adres.delete(0, tk.END)
@@ -2296,23 +4161,46 @@ class QuickDeliveryApp(tk.Tk):
 
         self._refresh_klanten_table()
 
-    def _refresh_klanten_table(self) -> None:
+    def _get_klanten_search_term(self) -> str:
+        if not hasattr(self, "entry_klant_search"):
+            return ""
+        return (self.entry_klant_search.get() or "").strip().lower()
+
+    def _search_klanten_table(self) -> None:
         if not hasattr(self, "klanten_tree"):
             return
+        term = self._get_klanten_search_term()
+        self.search.schedule(
+            "klanten",
+            lambda conn: self._search_klant_ids(term, conn=conn) if term else None,
+            lambda term_ids: self._show_klanten_table(term, term_ids),
+            token=term,
+        )
 
-        for row in self.klanten_tree.get_children():
-            self.klanten_tree.delete(row)
+    def _refresh_klanten_table(self) -> None:
+        if not hasattr(self, "klanten_tree"):
+            return
+        self.search.cancel("klanten")
+        term = self._get_klanten_search_term()
+        self._show_klanten_table(term, self._search_klant_ids(term) if term else None)
 
-        term = ""
-        if hasattr(self, "entry_klant_search"):
-            term = (self.entry_klant_search.get() or "").strip().lower()
+    def _show_klanten_table(self, term: str, term_ids: set[int] | None) -> None:
+        if not hasattr(self, "klanten_tree"):
+            return
 
+        tree_rows = []
         for klant in self.klanten_data:
             if term:
-                hay = f"{klant.get('naam','')} {klant.get('adres','')} {klant.get('contact','')}".lower()
-                if term not in hay:
-                    continue
-            self.klanten_tree.insert("", tk.END, values=(klant["id"], klant["naam"], klant["adres"], klant["contact"]))
+                if term_ids is not None:
+                    if klant["id"] not in term_ids:
+                        continue
+                else:
+                    hay = f"{klant.get('naam','')} {klant.get('adres','')} {klant.get('contact','')}".lower()
+                    if term not in hay:
+                        continue
+            tree_rows.append((klant["id"], (klant["id"], klant["naam"], klant["adres"], klant["contact"] or ""), ()))
+
+        reconcile_tree(self.klanten_tree, tree_rows)
 
     def _build_bestellingen_page(self) -> None:
         self.content.columnconfigure(0, weight=1)
@@ -2394,28 +4282,32 @@ class QuickDeliveryApp(tk.Tk):
         )
         self.combo_best_filter_status.set("Alle")
         self.combo_best_filter_status.grid(row=0, column=1, sticky="w", padx=(8, 12))
-        self.combo_best_filter_status.bind("<<ComboboxSelected>>", lambda _event: self._refresh_bestellingen_table())
+        self.combo_best_filter_status.bind("<<ComboboxSelected>>", lambda _event: self._refresh_bestellingen_table(reset_page=True))
 
         ttk.Label(filter_row, text="Chauffeur:").grid(row=0, column=2, sticky="w")
         chauffeur_filter_values = ["Alle", "(Geen)"] + [f"{c['id']}: {c['naam']}" for c in getattr(self, "chauffeurs_data", [])]
         self.combo_best_filter_chauffeur = ttk.Combobox(filter_row, state="readonly", values=chauffeur_filter_values, width=16)
         self.combo_best_filter_chauffeur.set("Alle")
         self.combo_best_filter_chauffeur.grid(row=0, column=3, sticky="w", padx=(8, 12))
-        self.combo_best_filter_chauffeur.bind("<<ComboboxSelected>>", lambda _event: self._refresh_bestellingen_table())
+        self.combo_best_filter_chauffeur.bind("<<ComboboxSelected>>", lambda _event: self._refresh_bestellingen_table(reset_page=True))
 
-        ttk.Label(filter_row, text="Datum:").grid(row=0, column=4, sticky="w")
-        self.entry_best_filter_date = ttk.Entry(filter_row, width=12)
-        self.entry_best_filter_date.grid(row=0, column=5, sticky="w", padx=(8, 12))
-        self.entry_best_filter_date.bind("<KeyRelease>", lambda _event: self._refresh_bestellingen_table())
+        ttk.Label(filter_row, text="Periode:").grid(row=0, column=4, sticky="w")
+        date_filter = self._build_date_range_filter(
+            filter_row, "best_filter_date", lambda: self._refresh_bestellingen_table(reset_page=True)
+        )
+        date_filter.grid(row=0, column=5, sticky="w", padx=(8, 12))
 
         ttk.Label(filter_row, text="Zoek:").grid(row=0, column=6, sticky="w")
         self.entry_best_search = ttk.Entry(filter_row)
         self.entry_best_search.grid(row=0, column=7, sticky="ew", padx=(8, 12))
-        self.entry_best_search.bind("<KeyRelease>", lambda _event: self._refresh_bestellingen_table())
+        self.entry_best_search.bind("<KeyRelease>", lambda _event: self._search_bestellingen_table())
 
         export_btn = ttk.Button(filter_row, text="Export CSV", command=self._export_bestellingen_csv)
         export_btn.grid(row=0, column=8, sticky="e")
 
+        import_btn = ttk.Button(filter_row, text="Importeer CSV", command=lambda: self._import_csv("bestellingen"))
+        import_btn.grid(row=0, column=9, sticky="e", padx=(8, 0))
+
         main_frame = ttk.Frame(table_wrapper)
         main_frame.grid(row=1, column=0, sticky="nsew")
         main_frame.columnconfigure(0, weight=3)
@@ -2450,6 +4342,9 @@ class QuickDeliveryApp(tk.Tk):
         self.bestellingen_tree.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
 
+        pager = self._build_pager(table_frame, "bestellingen", self._refresh_bestellingen_table)
+        pager.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(6, 0))
+
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
 
@@ -2641,19 +4536,31 @@ class QuickDeliveryApp(tk.Tk):
 
         # Convert Dutch date to database format
         db_datum = self._convert_date_to_db(datum) if datum else ""
-        
-        cur = self.db_conn.cursor()
-        cur.execute(
-            "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status, chauffeur_id) VALUES (?, ?, ?, ?, ?, ?)",
-            (klant, ophaal, aflever, db_datum, status, chauffeur_id),
-        )
-        self.db_conn.commit()
 
-        bestelling_id = cur.lastrowid
-        if bestelling_id:
-            self._log_status_event(int(bestelling_id), status, "Aangemaakt")
+        # De gekozen klant, ook als een andere klant dezelfde naam heeft
+        index = self.combo_best_klant.current()
+        klant_id = self.klanten_data[index].get("id") if 0 <= index < len(self.klanten_data) else None
 
-        self._load_data_from_database()
+        def work(conn: sqlite3.Connection) -> None:
+            cur = conn.execute(
+                "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status, chauffeur_id, klant_id) "
+                f"VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, {KLANT_ID_FOR_NAME_SQL}))",
+                (klant, ophaal, aflever, db_datum, status, chauffeur_id, klant_id, klant),
+            )
+            # Bestelling en eerste event in één commit
+            if cur.lastrowid:
+                self._log_status_event(int(cur.lastrowid), status, "Aangemaakt", conn=conn)
+            else:
+                conn.commit()
+
+        self.db.run(work, lambda _result: self._after_add_bestelling(), self._show_db_error)
+
+    def _show_db_error(self, exc: Exception) -> None:
+        messagebox.showerror("Databasefout", f"De wijziging kon niet worden opgeslagen:\n{exc}")
+
+    def _after_add_bestelling(self) -> None:
+        if not (hasattr(self, "combo_best_klant") and self.combo_best_klant.winfo_exists()):
+            return
 
         self.combo_best_klant.set("")
         self.entry_best_ophaal.delete(0, tk.END)
@@ -2685,167 +4592,106 @@ class QuickDeliveryApp(tk.Tk):
         if not messagebox.askyesno("Bevestigen", "Weet je zeker dat je deze bestelling wilt verwijderen?"):
             return
 
-        cur = self.db_conn.cursor()
-        cur.execute("DELETE FROM bestellingen WHERE id = ?", (best_id,))
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM bestellingen WHERE id = ?", (best_id,))
+            conn.commit()
 
-        self._load_data_from_database()
+        self.db.run(work, lambda _result: self._after_delete_bestelling(), self._show_db_error)
+
+    def _after_delete_bestelling(self) -> None:
         self._refresh_bestellingen_table()
         self._refresh_tracking_table()
 
-    def _refresh_bestellingen_table(self) -> None:
-        if not hasattr(self, "bestellingen_tree"):
-            return
-
-        for row in self.bestellingen_tree.get_children():
-            self.bestellingen_tree.delete(row)
-
-        geselecteerde_status = "Alle"
+    def _get_best_filters(self) -> dict:
+        filters = {"status": "Alle", "chauffeur": "Alle", "datum_van": None, "datum_tot": None, "term": ""}
         if hasattr(self, "combo_best_filter_status"):
-            geselecteerde_status = self.combo_best_filter_status.get() or "Alle"
-
-        chauffeur_filter = "Alle"
+            filters["status"] = self.combo_best_filter_status.get() or "Alle"
         if hasattr(self, "combo_best_filter_chauffeur"):
-            chauffeur_filter = self.combo_best_filter_chauffeur.get() or "Alle"
-
-        date_filter = ""
-        if hasattr(self, "entry_best_filter_date"):
-            date_filter = (self.entry_best_filter_date.get() or "").strip()
-
-        term = ""
+            filters["chauffeur"] = self.combo_best_filter_chauffeur.get() or "Alle"
+        filters["datum_van"], filters["datum_tot"] = self._get_date_range("best_filter_date")
         if hasattr(self, "entry_best_search"):
-            term = (self.entry_best_search.get() or "").strip().lower()
-
-        chauffeur_map = {c["id"]: c["naam"] for c in getattr(self, "chauffeurs_data", [])}
-
-        for best in self.bestellingen_data:
-            if geselecteerde_status != "Alle" and best.get("status") != geselecteerde_status:
-                continue
-
-            if date_filter and (best.get("datum") or "") != date_filter:
-                continue
-
-            best_chauffeur_id = best.get("chauffeur_id")
-            chauffeur_name = chauffeur_map.get(best_chauffeur_id, "") if best_chauffeur_id else ""
+            filters["term"] = (self.entry_best_search.get() or "").strip().lower()
+        return filters
 
-            if chauffeur_filter != "Alle":
-                if chauffeur_filter == "(Geen)" and best_chauffeur_id:
-                    continue
-                if chauffeur_filter != "(Geen)":
-                    try:
-                        wanted_id = int(chauffeur_filter.split(":", 1)[0])
-                    except ValueError:
-                        wanted_id = None
-                    if wanted_id and best_chauffeur_id != wanted_id:
-                        continue
+    def _search_bestellingen_table(self) -> None:
+        if not hasattr(self, "bestellingen_tree"):
+            return
+        filters = self._get_best_filters()
+        self.search.schedule(
+            "bestellingen",
+            lambda conn: self._query_bestellingen(filters, limit=PAGE_SIZE + 1, conn=conn),
+            lambda rows: self._show_bestellingen_rows(rows, reset_page=True),
+            token=filters,
+        )
 
-            if term:
-                hay = f"{best.get('klant','')} {best.get('ophaal','')} {best.get('aflever','')} {best.get('datum','')} {best.get('status','')} {chauffeur_name}".lower()
-                if term not in hay:
-                    continue
+    def _refresh_bestellingen_table(self, reset_page: bool = False) -> None:
+        if not hasattr(self, "bestellingen_tree"):
+            return
+        self.search.cancel("bestellingen")
+        after_id = self._pager_after_id("bestellingen", reset=reset_page)
+        rows = self._query_bestellingen(self._get_best_filters(), after_id=after_id, limit=PAGE_SIZE + 1)
+        self._show_bestellingen_rows(rows)
 
-            self.bestellingen_tree.insert(
-                "",
-                tk.END,
-                values=(
+    def _show_bestellingen_rows(self, rows: list[dict], reset_page: bool = False) -> None:
+        if not hasattr(self, "bestellingen_tree"):
+            return
+        if reset_page:
+            self._pager_after_id("bestellingen", reset=True)
+        rows = self._pager_page_rows("bestellingen", rows)
+
+        reconcile_tree(
+            self.bestellingen_tree,
+            [
+                (
                     best["id"],
-                    best["klant"],
-                    best["ophaal"],
-                    best["aflever"],
-                    best["datum"],
-                    best["status"],
-                    chauffeur_name,
-                ),
-            )
+                    (
+                        best["id"],
+                        best["klant"],
+                        best["ophaal"],
+                        best["aflever"],
+                        best["datum"] or "",
+                        best["status"] or "",
+                        best["chauffeur_naam"],
+                    ),
+                    (),
+                )
+                for best in rows
+            ],
+        )
 
         if hasattr(self, "lbl_best_detail_id"):
             self._on_bestelling_selected_in_table()
 
-    def _get_bestellingen_filtered(self) -> list[dict]:
-        geselecteerde_status = "Alle"
-        if hasattr(self, "combo_best_filter_status"):
-            geselecteerde_status = self.combo_best_filter_status.get() or "Alle"
-
-        chauffeur_filter = "Alle"
-        if hasattr(self, "combo_best_filter_chauffeur"):
-            chauffeur_filter = self.combo_best_filter_chauffeur.get() or "Alle"
-
-        date_filter = ""
-        if hasattr(self, "entry_best_filter_date"):
-            date_filter = (self.entry_best_filter_date.get() or "").strip()
-
-        term = ""
-        if hasattr(self, "entry_best_search"):
-            term = (self.entry_best_search.get() or "").strip().lower()
-
-        chauffeur_map = {c["id"]: c["naam"] for c in getattr(self, "chauffeurs_data", [])}
-
-        out: list[dict] = []
-        for best in self.bestellingen_data:
-            if geselecteerde_status != "Alle" and best.get("status") != geselecteerde_status:
-                continue
-            if date_filter and (best.get("datum") or "") != date_filter:
-                continue
-
-            best_chauffeur_id = best.get("chauffeur_id")
-            chauffeur_name = chauffeur_map.get(best_chauffeur_id, "") if best_chauffeur_id else ""
-
-            if chauffeur_filter != "Alle":
-                if chauffeur_filter == "(Geen)" and best_chauffeur_id:
-                    continue
-                if chauffeur_filter != "(Geen)":
-                    try:
-                        wanted_id = int(chauffeur_filter.split(":", 1)[0])
-                    except ValueError:
-                        wanted_id = None
-                    if wanted_id and best_chauffeur_id != wanted_id:
-                        continue
-
-            if term:
-                hay = f"{best.get('klant','')} {best.get('ophaal','')} {best.get('aflever','')} {best.get('datum','')} {best.get('status','')} {chauffeur_name}".lower()
-                if term not in hay:
-                    continue
-
-            item = dict(best)
-            item["chauffeur_naam"] = chauffeur_name
-            out.append(item)
-        return out
-
     def _export_bestellingen_csv(self) -> None:
-        rows = self._get_bestellingen_filtered()
-        if not rows:
+        filters = self._get_best_filters()
+        if not self._query_bestellingen(filters, limit=1):
             messagebox.showinfo("Export", "Geen bestellingen om te exporteren (op basis van je filters/zoekterm).")
             return
 
-        path = filedialog.asksaveasfilename(
-            title="Exporteer bestellingen naar CSV",
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+        def open_rows(conn: sqlite3.Connection):
+            total = self._count_bestellingen(filters, conn=conn)
+            where, params = self._bestellingen_where(filters)
+            cur = conn.execute(
+                "SELECT b.id, b.klant, b.ophaal, b.aflever, COALESCE(b.datum, ''), COALESCE(b.status, ''), "
+                "COALESCE(c.naam, '') FROM bestellingen b LEFT JOIN chauffeurs c ON c.id = b.chauffeur_id "
+                f"WHERE {where} ORDER BY b.id",
+                params,
+            )
+            return cur, total
+
+        self._run_export(
+            "Exporteer bestellingen",
+            [
+                ("id", "id"),
+                ("klant", "klant"),
+                ("ophaal", "ophaal"),
+                ("aflever", "aflever"),
+                ("datum", "datum"),
+                ("status", "status"),
+                ("chauffeur", "chauffeur"),
+            ],
+            open_rows,
         )
-        if not path:
-            return
-
-        try:
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                w.writerow(["id", "klant", "ophaal", "aflever", "datum", "status", "chauffeur"])
-                for b in rows:
-                    w.writerow(
-                        [
-                            b.get("id", ""),
-                            b.get("klant", ""),
-                            b.get("ophaal", ""),
-                            b.get("aflever", ""),
-                            b.get("datum", ""),
-                            b.get("status", ""),
-                            b.get("chauffeur_naam", ""),
-                        ]
-                    )
-        except OSError:
-            messagebox.showerror("Fout", "Kon het CSV bestand niet opslaan.")
-            return
-
-        messagebox.showinfo("Export", "CSV export is opgeslagen.")
 
     def _on_bestelling_selected_in_table(self) -> None:
         if not hasattr(self, "bestellingen_tree"):
@@ -2876,7 +4722,7 @@ class QuickDeliveryApp(tk.Tk):
         if not best_id:
             return
 
-        best = next((b for b in self.bestellingen_data if int(b.get("id")) == best_id), None)
+        best = self._get_bestelling(best_id)
         if not best:
             return
 
@@ -2902,7 +4748,7 @@ class QuickDeliveryApp(tk.Tk):
         if hasattr(self, "combo_best_detail_chauffeur"):
             chauffeur_id = best.get("chauffeur_id")
             if chauffeur_id:
-                name = next((c.get("naam", "") for c in getattr(self, "chauffeurs_data", []) if c.get("id") == chauffeur_id), "")
+                name = best.get("chauffeur_naam", "")
                 self.combo_best_detail_chauffeur.set(f"{chauffeur_id}: {name}" if name else "(Geen)")
             else:
                 self.combo_best_detail_chauffeur.set("(Geen)")
@@ -2924,7 +4770,7 @@ class QuickDeliveryApp(tk.Tk):
         if not best_id:
             return
 
-        best = next((b for b in self.bestellingen_data if int(b.get("id")) == best_id), None)
+        best = self._get_bestelling(best_id)
         if not best:
             return
 
@@ -2933,8 +4779,6 @@ class QuickDeliveryApp(tk.Tk):
             messagebox.showwarning("Validatie", "Kies een status.")
             return
 
-
-        self._load_data_from_database()
         self._refresh_bestellingen_table()
         self._refresh_tracking_table()
         self._refresh_eventlog_table()
@@ -2974,6 +4818,10 @@ class QuickDeliveryApp(tk.Tk):
         self.combo_plan_status.grid(row=0, column=1, sticky="w", padx=(8, 0))
         self.combo_plan_status.bind("<<ComboboxSelected>>", lambda _event: self._refresh_planning_table())
 
+        ttk.Label(filter_frame, text="Periode:").grid(row=0, column=2, sticky="w", padx=(12, 0))
+        date_filter = self._build_date_range_filter(filter_frame, "plan_date", self._refresh_planning_table)
+        date_filter.grid(row=0, column=3, sticky="w", padx=(8, 0))
+
         # Tabel met beschikbare stops (bestellingen)
         table_frame = ttk.Frame(self.content)
         table_frame.grid(row=3, column=0, sticky="nsew")
@@ -3005,8 +4853,11 @@ class QuickDeliveryApp(tk.Tk):
         calc_button = ttk.Button(button_frame, text="Bereken route (optimaliseer)", command=self._calculate_simple_route)
         calc_button.grid(row=0, column=0, sticky="w")
 
+        plan_button = ttk.Button(button_frame, text="Chauffeursroutes bijwerken", command=self._plan_chauffeur_routes)
+        plan_button.grid(row=0, column=1, sticky="w", padx=(8, 0))
+
         self.route_result_label = ttk.Label(button_frame, text="")
-        self.route_result_label.grid(row=1, column=0, sticky="w", pady=(4, 0))
+        self.route_result_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=(4, 0))
 
         self._refresh_planning_table()
 
@@ -3014,18 +4865,16 @@ class QuickDeliveryApp(tk.Tk):
         if not hasattr(self, "planning_tree"):
             return
 
-        for row in self.planning_tree.get_children():
-            self.planning_tree.delete(row)
-
         stops = self._get_planning_stops_from_bestellingen()
         if not stops:
             # fallback: laat dummy data zien als er nog geen bestellingen zijn
-            for order in self.dummy_orders:
-                self.planning_tree.insert("", tk.END, values=(order["id"], order["klant"], order["adres"]))
+            reconcile_tree(
+                self.planning_tree,
+                [(f"demo-{o['id']}", (o["id"], o["klant"], o["adres"]), ()) for o in self.dummy_orders],
+            )
             return
 
-        for s in stops:
-            self.planning_tree.insert("", tk.END, values=(s["id"], s["klant"], s["adres"]))
+        reconcile_tree(self.planning_tree, [(s["id"], (s["id"], s["klant"], s["adres"]), ()) for s in stops])
 
     def _calculate_simple_route(self) -> None:
         stops = self._get_planning_stops_from_bestellingen()
@@ -3047,6 +4896,17 @@ class QuickDeliveryApp(tk.Tk):
         tekst += f"Totale geschatte afstand: {totale_afstand} km."
         self.route_result_label.config(text=tekst)
 
+    def _plan_chauffeur_routes(self) -> None:
+        """Sla de route per chauffeur per dag op voor alle gewijzigde planningen."""
+        self.db.run(lambda conn: self._update_route_plans(conn=conn), self._after_plan_chauffeur_routes, self._show_db_error)
+
+    def _after_plan_chauffeur_routes(self, count: int) -> None:
+        if hasattr(self, "route_result_label") and self.route_result_label.winfo_exists():
+            if count:
+                self.route_result_label.config(text=f"{count} chauffeursroute(s) opnieuw berekend en opgeslagen.")
+            else:
+                self.route_result_label.config(text="Alle chauffeursroutes zijn al actueel.")
+
     def _build_tracking_page(self) -> None:
         self.content.columnconfigure(0, weight=1)
         self.content.rowconfigure(3, weight=1)
@@ -3076,19 +4936,19 @@ class QuickDeliveryApp(tk.Tk):
         )
         self.combo_track_status.set("Alle")
         self.combo_track_status.grid(row=0, column=1, sticky="w", padx=(8, 12))
-        self.combo_track_status.bind("<<ComboboxSelected>>", lambda _event: self._refresh_tracking_table())
+        self.combo_track_status.bind("<<ComboboxSelected>>", lambda _event: self._refresh_tracking_table(reset_page=True))
 
         ttk.Label(control_frame, text="Chauffeur:").grid(row=0, column=2, sticky="w", padx=(12, 0))
         chauffeur_values = ["Alle", "(Geen)"] + [f"{c['id']}: {c['naam']}" for c in getattr(self, "chauffeurs_data", [])]
         self.combo_track_chauffeur = ttk.Combobox(control_frame, state="readonly", values=chauffeur_values, width=16)
         self.combo_track_chauffeur.set("Alle")
         self.combo_track_chauffeur.grid(row=0, column=3, sticky="w", padx=(8, 12))
-        self.combo_track_chauffeur.bind("<<ComboboxSelected>>", lambda _event: self._refresh_tracking_table())
+        self.combo_track_chauffeur.bind("<<ComboboxSelected>>", lambda _event: self._refresh_tracking_table(reset_page=True))
 
         ttk.Label(control_frame, text="Zoek:").grid(row=0, column=4, sticky="w")
         self.entry_track_search = ttk.Entry(control_frame, width=20)
         self.entry_track_search.grid(row=0, column=5, sticky="w", padx=(8, 12))
-        self.entry_track_search.bind("<KeyRelease>", lambda _event: self._refresh_tracking_table())
+        self.entry_track_search.bind("<KeyRelease>", lambda _event: self._search_tracking_table())
 
         ttk.Label(control_frame, text="Update status:").grid(row=0, column=6, sticky="w")
         self.combo_track_update = ttk.Combobox(
@@ -3114,13 +4974,23 @@ class QuickDeliveryApp(tk.Tk):
         self.var_track_sim = tk.IntVar(value=0)
         chk_sim = ttk.Checkbutton(control_frame, text="Simuleer live", variable=self.var_track_sim, command=self._toggle_tracking_sim)
         chk_sim.grid(row=0, column=12, sticky="w", padx=(10, 0))
+        # Nieuwe vinkjes staan uit, dus live verversen ook
+        self._tracking_auto_refresh_enabled = False
+        self._tracking_simulate_enabled = False
 
         # Tabel met bestellingen
         table_frame = ttk.Frame(self.content)
         table_frame.grid(row=3, column=0, sticky="nsew")
 
         columns = ("id", "klant", "ophaal", "aflever", "datum", "status", "chauffeur")
-        self.tracking_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=10)
+        self.tracking_table = VirtualTreeview(
+            table_frame,
+            columns=columns,
+            fetch_rows=self._fetch_tracking_rows,
+            count_rows=lambda: self._count_bestellingen(self._get_track_filters()),
+            height=10,
+        )
+        self.tracking_tree = self.tracking_table.tree
 
         self.tracking_tree.heading("id", text="ID")
         self.tracking_tree.heading("klant", text="Klant")
@@ -3138,16 +5008,12 @@ class QuickDeliveryApp(tk.Tk):
         self.tracking_tree.column("status", width=100, anchor="w")
         self.tracking_tree.column("chauffeur", width=140, anchor="w")
 
-        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tracking_tree.yview)
-        self.tracking_tree.configure(yscrollcommand=scrollbar.set)
-
-        self.tracking_tree.grid(row=0, column=0, sticky="nsew")
-        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tracking_table.grid(row=0, column=0, sticky="nsew")
 
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
 
-        self.tracking_tree.bind("<<TreeviewSelect>>", lambda _event: self._refresh_eventlog_table())
+        self.tracking_table.bind_select(self._refresh_eventlog_table)
 
         eventlog_frame = ttk.Frame(self.content)
         eventlog_frame.grid(row=4, column=0, sticky="nsew", pady=(10, 0))
@@ -3184,14 +5050,9 @@ class QuickDeliveryApp(tk.Tk):
         if not hasattr(self, "tracking_tree"):
             return
 
-        selected = self.tracking_tree.selection()
-        if not selected:
-            messagebox.showinfo("Geen selectie", "Selecteer eerst een bestelling in de tabel.")
-            return
-
-        values = self.tracking_tree.item(selected[0], "values")
-        best_id = int(values[0]) if values else None
+        best_id = self._selected_tracking_id()
         if not best_id:
+            messagebox.showinfo("Geen selectie", "Selecteer eerst een bestelling in de tabel.")
             return
 
         new_status = (self.combo_track_update.get() or "").strip() if hasattr(self, "combo_track_update") else ""
@@ -3201,12 +5062,14 @@ class QuickDeliveryApp(tk.Tk):
 
         note = self.entry_track_note.get().strip() if hasattr(self, "entry_track_note") else ""
 
-        cur = self.db_conn.cursor()
-        cur.execute("UPDATE bestellingen SET status = ? WHERE id = ?", (new_status, best_id))
-        self.db_conn.commit()
+        def work(conn: sqlite3.Connection) -> None:
+            conn.execute("UPDATE bestellingen SET status = ? WHERE id = ?", (new_status, best_id))
+            # Status en event in één commit
+            self._log_status_event(best_id, new_status, note, conn=conn)
 
-        self._log_status_event(best_id, new_status, note)
-        self._load_data_from_database()
+        self.db.run(work, lambda _result: self._after_update_bestelling_status(), self._show_db_error)
+
+    def _after_update_bestelling_status(self) -> None:
         self._refresh_tracking_table()
         self._refresh_bestellingen_table()
         self._refresh_eventlog_table()
@@ -3218,122 +5081,156 @@ class QuickDeliveryApp(tk.Tk):
         if not hasattr(self, "eventlog_tree"):
             return
 
-        for row in self.eventlog_tree.get_children():
-            self.eventlog_tree.delete(row)
+        best_id = self._selected_tracking_id()
+        self._show_eventlog(self._get_status_events_for_bestelling(best_id) if best_id else [])
 
-        if not hasattr(self, "tracking_tree"):
-            return
-
-        selected = self.tracking_tree.selection()
-        if not selected:
-            return
-
-        values = self.tracking_tree.item(selected[0], "values")
-        best_id = int(values[0]) if values else None
-        if not best_id:
-            return
-
-        events = self._get_status_events_for_bestelling(best_id)
-        for ev in events:
-            self.eventlog_tree.insert("", tk.END, values=(ev["timestamp"], ev["status"], ev["opmerking"] or ""))
-
-    def _refresh_tracking_table(self) -> None:
-        if not hasattr(self, "tracking_tree"):
+    def _show_eventlog(self, events: list[dict]) -> None:
+        if not hasattr(self, "eventlog_tree"):
             return
+        reconcile_tree(
+            self.eventlog_tree,
+            [(ev["id"], (ev["timestamp"], ev["status"], ev["opmerking"] or ""), ()) for ev in events],
+        )
 
-        for row in self.tracking_tree.get_children():
-            self.tracking_tree.delete(row)
-
-        geselecteerde_status = "Alle"
+    def _get_track_filters(self) -> dict:
+        filters = {"status": "Alle", "chauffeur": "Alle", "term": ""}
         if hasattr(self, "combo_track_status"):
-            geselecteerde_status = self.combo_track_status.get() or "Alle"
-
-        chauffeur_filter = "Alle"
+            filters["status"] = self.combo_track_status.get() or "Alle"
         if hasattr(self, "combo_track_chauffeur"):
-            chauffeur_filter = self.combo_track_chauffeur.get() or "Alle"
-
-        term = ""
+            filters["chauffeur"] = self.combo_track_chauffeur.get() or "Alle"
         if hasattr(self, "entry_track_search"):
-            term = (self.entry_track_search.get() or "").strip().lower()
-
-        chauffeur_map = {c["id"]: c["naam"] for c in getattr(self, "chauffeurs_data", [])}
-
-        for best in self.bestellingen_data:
-            if geselecteerde_status != "Alle" and best.get("status") != geselecteerde_status:
-                continue
-
-            best_chauffeur_id = best.get("chauffeur_id")
-            best_chauffeur_name = chauffeur_map.get(best_chauffeur_id, "") if best_chauffeur_id else ""
-            if chauffeur_filter != "Alle":
-                if chauffeur_filter == "(Geen)" and best_chauffeur_id:
-                    continue
-                if chauffeur_filter != "(Geen)":
-                    try:
-                        wanted_id = int(chauffeur_filter.split(":", 1)[0])
-                    except ValueError:
-                        wanted_id = None
-                    if wanted_id and best_chauffeur_id != wanted_id:
-                        continue
+            filters["term"] = (self.entry_track_search.get() or "").strip().lower()
+        return filters
 
-            if term:
-                hay = f"{best.get('klant','')} {best.get('ophaal','')} {best.get('aflever','')} {best.get('datum','')} {best.get('status','')} {best_chauffeur_name}".lower()
-                if term not in hay:
-                    continue
+    def _search_tracking_table(self) -> None:
+        if not hasattr(self, "tracking_table"):
+            return
+        filters = self._get_track_filters()
+        block_size = self.tracking_table.block_size
+
+        def run(conn: sqlite3.Connection) -> tuple[int, list[tuple]]:
+            total = self._count_bestellingen(filters, conn=conn)
+            return total, self._tracking_rows(filters, block_size, conn=conn)
+
+        self.search.schedule(
+            "tracking",
+            run,
+            lambda result: self.tracking_table.refresh(reset=True, total=result[0], first_block=result[1]),
+            token=filters,
+        )
 
-            self.tracking_tree.insert(
-                "",
-                tk.END,
-                values=(
+    def _refresh_tracking_table(self, reset_page: bool = False) -> None:
+        if not hasattr(self, "tracking_table"):
+            return
+        self.search.cancel("tracking")
+        self.tracking_table.refresh(reset=reset_page)
+
+    def _fetch_tracking_rows(
+        self, offset: int, limit: int, after_key: int | None = None, before_key: int | None = None
+    ) -> list[tuple]:
+        filters = self._get_track_filters()
+        if after_key is None and before_key is None and offset:
+            # Sprong zonder buurblok: één OFFSET-lookup voor het anker, daarna op id
+            anchor = self._bestelling_id_at(filters, offset)
+            if anchor is None:
+                return []
+            after_key = anchor - 1
+        return self._tracking_rows(filters, limit, after_id=after_key, before_id=before_key)
+
+    def _tracking_blocks(
+        self, filters: dict, block_nos: range, block_size: int, conn: sqlite3.Connection | None = None
+    ) -> dict[int, list[tuple]]:
+        """Opeenvolgende blokken: het eerste via een anker-id, de rest aansluitend op id."""
+        blocks: dict[int, list[tuple]] = {}
+        after_id = None
+        for block_no in block_nos:
+            if after_id is None and block_no > 0:
+                anchor = self._bestelling_id_at(filters, block_no * block_size, conn=conn)
+                if anchor is None:
+                    break
+                after_id = anchor - 1
+            rows = self._tracking_rows(filters, block_size, after_id=after_id, conn=conn)
+            blocks[block_no] = rows
+            if len(rows) < block_size:
+                break
+            after_id = rows[-1][0]
+        return blocks
+
+    def _tracking_rows(
+        self,
+        filters: dict,
+        limit: int,
+        after_id: int | None = None,
+        before_id: int | None = None,
+        conn: sqlite3.Connection | None = None,
+    ) -> list[tuple]:
+        rows = self._query_bestellingen(filters, after_id=after_id, limit=limit, before_id=before_id, conn=conn)
+        return [
+            (
+                best["id"],
+                (
                     best["id"],
                     best["klant"],
                     best["ophaal"],
                     best["aflever"],
-                    best["datum"],
-                    best["status"],
-                    best_chauffeur_name,
+                    best["datum"] or "",
+                    best["status"] or "",
+                    best["chauffeur_naam"],
                 ),
+                (),
             )
+            for best in rows
+        ]
+
+    def _selected_tracking_id(self) -> int | None:
+        if not hasattr(self, "tracking_table"):
+            return None
+        key = self.tracking_table.selected_key()
+        try:
+            return int(key) if key else None
+        except ValueError:
+            return None
 
     def _toggle_tracking_auto(self) -> None:
         self._tracking_auto_refresh_enabled = bool(self.var_track_auto.get()) if hasattr(self, "var_track_auto") else False
-        if self._tracking_auto_refresh_enabled:
-            self._schedule_tracking_tick()
+        self._ensure_refresh_scheduler()
 
     def _toggle_tracking_sim(self) -> None:
         self._tracking_simulate_enabled = bool(self.var_track_sim.get()) if hasattr(self, "var_track_sim") else False
-        if self._tracking_simulate_enabled:
-            self._schedule_tracking_tick()
+        self._ensure_refresh_scheduler()
 
-    def _schedule_tracking_tick(self) -> None:
-        if not (self._tracking_auto_refresh_enabled or self._tracking_simulate_enabled):
+    def _refresh_tracking_live(self) -> None:
+        """Tracking tabel en eventlog verversen via de worker (zichtbaar venster + eventlog)."""
+        if not hasattr(self, "tracking_table"):
             return
-        self.after(self._tracking_auto_refresh_ms, self._tracking_tick)
 
-    def _tracking_tick(self) -> None:
-        if self._tracking_simulate_enabled:
-            self._simulate_one_status_step_for_selected()
+        # Widgets uitlezen op de Tk thread; de queries draaien in de worker
+        filters = self._get_track_filters()
+        block_size = self.tracking_table.block_size
+        wanted_blocks = self.tracking_table.visible_blocks()
+        selected_id = self._selected_tracking_id()
 
-        if self._tracking_auto_refresh_enabled or self._tracking_simulate_enabled:
-            self._load_data_from_database()
-            self._refresh_tracking_table()
-            self._refresh_bestellingen_table()
-            self._refresh_eventlog_table()
-            self._schedule_tracking_tick()
+        def work(conn: sqlite3.Connection):
+            total = self._count_bestellingen(filters, conn=conn)
+            blocks = self._tracking_blocks(filters, wanted_blocks, block_size, conn=conn)
+            events = self._get_status_events_for_bestelling(selected_id, conn=conn) if selected_id else []
+            return total, blocks, events
 
-    def _simulate_one_status_step_for_selected(self) -> None:
-        if not hasattr(self, "tracking_tree"):
-            return
-        selected = self.tracking_tree.selection()
-        if not selected:
-            return
+        def done(result) -> None:
+            # Alleen toepassen als filters en selectie intussen niet veranderd zijn
+            if self._active_page == "tracking" and filters == self._get_track_filters():
+                total, blocks, events = result
+                self.tracking_table.refresh(total=total, blocks=blocks)
+                if self._selected_tracking_id() == selected_id:
+                    self._show_eventlog(events)
 
-        values = self.tracking_tree.item(selected[0], "values")
-        best_id = int(values[0]) if values else None
-        if not best_id:
-            return
+        self.db.run(work, done, lambda _exc: None)
+
+    def _simulate_status_step(self, best_id: int, conn: sqlite3.Connection | None = None) -> None:
+        conn = conn or self.db_conn
 
         # Determine next status
-        cur = self.db_conn.cursor()
+        cur = conn.cursor()
         row = cur.execute("SELECT status FROM bestellingen WHERE id = ?", (best_id,)).fetchone()
         current = row[0] if row else "Gepland"
         next_status = None
@@ -3346,8 +5243,7 @@ class QuickDeliveryApp(tk.Tk):
             return
 
         cur.execute("UPDATE bestellingen SET status = ? WHERE id = ?", (next_status, best_id))
-        self.db_conn.commit()
-        self._log_status_event(best_id, next_status, "Simulatie")
+        self._log_status_event(best_id, next_status, "Simulatie", conn=conn)
 
 
 if __name__ == "__main__":
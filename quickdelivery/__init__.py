@@ -0,0 +1 @@
+"""QuickDelivery kernlogica die zonder Tk draait (routeplanning, database, nachtelijke planning)."""
@@ -0,0 +1,49 @@
+"""Command line: python -m quickdelivery plan --date YYYY-MM-DD
+
+Bedoeld voor cron, bijvoorbeeld elke ochtend om 05:00:
+    0 5 * * * cd /pad/naar/quickdelivery && python3 -m quickdelivery plan
+"""
+
+import argparse
+import datetime
+import sqlite3
+import sys
+
+from . import db
+from .planning import format_report, parse_day, plan_day
+
+
+def _date_arg(value: str) -> str:
+    try:
+        return parse_day(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ongeldige datum {value!r}, verwacht YYYY-MM-DD") from None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m quickdelivery", description="QuickDelivery zonder Tk.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    plan = sub.add_parser("plan", help="Verdeel de open bestellingen van een dag en sla de routes op.")
+    plan.add_argument(
+        "--date",
+        type=_date_arg,
+        default=datetime.date.today().isoformat(),
+        help="dag in YYYY-MM-DD (standaard vandaag)",
+    )
+    plan.add_argument("--db", default=str(db.DEFAULT_DB_PATH), help="pad naar quickdelivery.db")
+    plan.add_argument("--workers", type=int, default=None, help="aantal processen (standaard: aantal CPU's)")
+
+    args = parser.parse_args(argv)
+    if args.command == "plan":
+        try:
+            stats = plan_day(args.db, args.date, workers=args.workers)
+        except (db.SchemaError, sqlite3.Error) as exc:
+            print(f"Planning mislukt: {exc}", file=sys.stderr)
+            return 1
+        print(format_report(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
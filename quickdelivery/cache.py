@@ -0,0 +1,49 @@
+"""Kleine in-process caches voor de webserver."""
+
+import threading
+import time
+from collections import OrderedDict
+
+TRACK_CACHE_SIZE = 1024
+TRACK_CACHE_TTL_S = 30.0
+
+
+class VersionedTTLCache:
+    """LRU cache waarbij elke waarde hoort bij een versie en een vervaltijd.
+
+    get() geeft alleen een waarde terug als de opgegeven versie (bijv. het
+    laatste status_events id) nog gelijk is en de TTL niet verlopen is.
+    Waarden worden gedeeld teruggegeven en mogen niet gewijzigd worden.
+    """
+
+    def __init__(self, max_items: int = TRACK_CACHE_SIZE, ttl: float = TRACK_CACHE_TTL_S) -> None:
+        self.max_items = max_items
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[object, tuple[object, float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] != version or entry[1] <= now:
+                if entry is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, version, value) -> None:
+        with self._lock:
+            self._items[key] = (version, time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,107 @@
+"""Databaseverbinding voor de onderdelen zonder Tk (CLI, server)."""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from .schema import SCHEMA_VERSION
+
+# Standaard dezelfde database als de desktop-app (naast desktop_main.py)
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "quickdelivery.db"
+# Schema (PRAGMA user_version) dat na schema.migrate() aanwezig is
+MIN_SCHEMA_VERSION = SCHEMA_VERSION
+BUSY_TIMEOUT_MS = 5000
+# Maximaal aantal gelijktijdige verbindingen per (gunicorn) worker
+POOL_SIZE = 8
+
+
+class SchemaError(RuntimeError):
+    """De database is niet (volledig) gemigreerd."""
+
+
+def connect(db_path: Path | str = DEFAULT_DB_PATH, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open de database met Row factory, WAL en een busy timeout."""
+    conn = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    return conn
+
+
+def check_schema(conn: sqlite3.Connection, minimum: int = MIN_SCHEMA_VERSION) -> int:
+    version = int(conn.execute("PRAGMA user_version").fetchone()[0])
+    if version < minimum:
+        raise SchemaError(
+            f"Database schema versie {version} is te oud (minimaal {minimum}); migratie niet uitgevoerd."
+        )
+    return version
+
+
+def table_versions(conn: sqlite3.Connection, tables) -> dict:
+    """Wijzigingstellers uit table_versions (bijgehouden door triggers)."""
+    names = list(tables)
+    placeholders = ",".join("?" for _ in names)
+    rows = conn.execute(
+        f"SELECT name, version FROM table_versions WHERE name IN ({placeholders})", names
+    ).fetchall()
+    versions = {row["name"]: row["version"] for row in rows}
+    return {name: versions.get(name, 0) for name in names}
+
+
+class ConnectionPool:
+    """Hergebruikt verbindingen tussen requests binnen één proces.
+
+    Na een fork (gunicorn --preload) begint het kindproces met een lege pool;
+    verbindingen worden nooit tussen processen gedeeld.
+    """
+
+    def __init__(self, db_path: Path | str = DEFAULT_DB_PATH, size: int = POOL_SIZE,
+                 min_schema: int = MIN_SCHEMA_VERSION):
+        self.db_path = db_path
+        self.size = size
+        self.min_schema = min_schema
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = connect(self.db_path, check_same_thread=False)
+        try:
+            check_schema(conn, self.min_schema)
+        except SchemaError:
+            conn.close()
+            raise
+        return conn
+
+    @contextmanager
+    def connection(self):
+        if self._pid != os.getpid():
+            self._reset()
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    # Openstaande transactie nooit meegeven aan de volgende request
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
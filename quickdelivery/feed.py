@@ -0,0 +1,128 @@
+"""Gedeelde wijzigingsfeed voor status_events (voor server-sent events).
+
+Per proces draait één poller-thread met een eigen verbinding. Die kijkt met
+PRAGMA data_version of er iets gecommit is en leest dan alleen de nieuwe
+status_events (id > laatst gezien). Nieuwe events worden uitgedeeld aan de
+wachtrij van elke abonnee; clients voeren zelf geen queries uit.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+
+from quickdelivery import db
+
+POLL_INTERVAL_S = 0.5
+# Trage clients die zoveel events achterlopen worden afgekoppeld
+SUBSCRIBER_QUEUE_SIZE = 256
+EVENT_COLUMNS = "id, bestelling_id, status, timestamp, opmerking"
+
+
+class Subscription:
+    """Wachtrij van één client; bestelling_id None betekent alle bestellingen."""
+
+    def __init__(self, bestelling_id: int | None = None):
+        self.bestelling_id = bestelling_id
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def get(self, timeout: float) -> dict | None:
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ChangeFeed:
+    def __init__(self, db_path: Path | str = db.DEFAULT_DB_PATH, interval: float = POLL_INTERVAL_S):
+        self.db_path = db_path
+        self.interval = interval
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def subscribe(self, bestelling_id: int | None = None) -> Subscription:
+        if self._pid != os.getpid():
+            # Na een fork hoort de thread van de ouder niet bij dit proces
+            self._reset()
+        sub = Subscription(bestelling_id)
+        with self._lock:
+            self._subscribers.add(sub)
+            if self._thread is None or not self._thread.is_alive():
+                # Startpunt vastleggen voordat subscribe terugkeert: wat de
+                # aanroeper daarna als backlog leest overlapt hooguit, er valt
+                # niets tussen backlog en feed
+                last_id = self._max_event_id()
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, args=(last_id,), name="qd-change-feed", daemon=True
+                )
+                self._thread.start()
+        return sub
+
+    def _max_event_id(self) -> int:
+        conn = db.connect(self.db_path)
+        try:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM status_events").fetchone()[0]
+        finally:
+            conn.close()
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def close(self):
+        self._stop.set()
+
+    def _run(self, last_id: int):
+        conn = db.connect(self.db_path)
+        try:
+            data_version = None
+            while not self._stop.wait(self.interval):
+                with self._lock:
+                    if not self._subscribers:
+                        # Geen luisteraars meer: thread stopt, volgende subscribe start hem opnieuw
+                        self._thread = None
+                        return
+                try:
+                    current = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if current == data_version:
+                        continue
+                    data_version = current
+                    rows = conn.execute(
+                        f"SELECT {EVENT_COLUMNS} FROM status_events WHERE id > ? ORDER BY id", (last_id,)
+                    ).fetchall()
+                except sqlite3.Error:
+                    # Bijv. database tijdelijk gelockt; volgende ronde opnieuw
+                    data_version = None
+                    continue
+                if rows:
+                    last_id = rows[-1]["id"]
+                    self._publish([dict(row) for row in rows])
+        finally:
+            conn.close()
+
+    def _publish(self, events: list[dict]):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            for event in events:
+                if sub.bestelling_id is not None and event["bestelling_id"] != sub.bestelling_id:
+                    continue
+                try:
+                    sub.queue.put_nowait(event)
+                except queue.Full:
+                    sub.overflowed = True
+                    self.unsubscribe(sub)
+                    break
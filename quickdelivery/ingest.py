@@ -0,0 +1,234 @@
+"""Bestellingen in bulk inlezen (webshop-koppelingen).
+
+Eerst worden alle records gevalideerd, daarna worden de geldige per chunk in
+één transactie weggeschreven met executemany: bestellingen, de
+"Aangemaakt"-events en de idempotency-sleutels. Een record met een sleutel die
+al eerder verwerkt is levert de bestaande bestelling op in plaats van een
+dubbele. Sleutels gelden per API-gebruiker: twee webshops mogen dezelfde
+sleutel gebruiken zonder elkaars bestellingen terug te krijgen.
+"""
+
+import datetime
+import json
+import sqlite3
+
+from .schema import BESTELLING_STATUSES, KLANT_ID_FOR_NAME_SQL
+
+CHUNK_SIZE = 500
+MAX_RECORDS = 10000
+MAX_FIELD_LENGTH = 500
+MAX_KEY_LENGTH = 200
+TEXT_FIELDS = ("klant", "ophaal", "aflever")
+
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class IngestError(ValueError):
+    """De aanvraag als geheel is onbruikbaar (geen geldige JSON, te veel records)."""
+
+
+class PayloadTooLarge(IngestError):
+    """De body is groter dan toegestaan, ook als er geen Content-Length was (chunked)."""
+
+
+def read_body(stream, max_bytes: int) -> bytes:
+    """Leest de hele body, maar nooit meer dan max_bytes."""
+    parts = []
+    total = 0
+    while True:
+        chunk = stream.read(min(READ_CHUNK_SIZE, max_bytes - total + 1))
+        if not chunk:
+            return b"".join(parts)
+        total += len(chunk)
+        if total > max_bytes:
+            raise PayloadTooLarge(f"Aanvraag groter dan {max_bytes} bytes")
+        parts.append(chunk)
+
+
+def read_lines(stream, max_bytes: int):
+    """Regels uit de body; een regel wordt nooit verder gelezen dan de resterende ruimte."""
+    total = 0
+    while True:
+        line = stream.readline(max_bytes - total + 1)
+        if not line:
+            return
+        total += len(line)
+        if total > max_bytes:
+            raise PayloadTooLarge(f"Aanvraag groter dan {max_bytes} bytes")
+        yield line
+
+
+def parse_json_array(body: bytes) -> list:
+    try:
+        records = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise IngestError(f"Ongeldige JSON: {exc}") from None
+    if not isinstance(records, list):
+        raise IngestError("Verwacht een JSON array met bestellingen")
+    if len(records) > MAX_RECORDS:
+        raise IngestError(f"Maximaal {MAX_RECORDS} bestellingen per aanvraag")
+    return records
+
+
+def parse_ndjson(lines) -> list:
+    """Eén JSON-object per regel; een onleesbare regel wordt een ongeldig record."""
+    records = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if len(records) >= MAX_RECORDS:
+            raise IngestError(f"Maximaal {MAX_RECORDS} bestellingen per aanvraag")
+        try:
+            records.append(json.loads(line))
+        except (ValueError, UnicodeDecodeError) as exc:
+            records.append(_ParseFailure(str(exc)))
+    return records
+
+
+class _ParseFailure:
+    def __init__(self, message: str):
+        self.message = message
+
+
+def _parse_datum(value) -> str | None:
+    """ISO (JJJJ-MM-DD) of DD-MM-JJJJ; opgeslagen als ISO zoals de desktop-app."""
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            return datetime.datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def validate_record(record, chauffeur_ids: set[int]) -> tuple[dict | None, list[str]]:
+    if isinstance(record, _ParseFailure):
+        return None, [f"Ongeldige JSON: {record.message}"]
+    if not isinstance(record, dict):
+        return None, ["Record moet een JSON object zijn"]
+    errors = []
+    clean = {}
+    for field in TEXT_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f"{field} is verplicht")
+        elif len(value) > MAX_FIELD_LENGTH:
+            errors.append(f"{field} is langer dan {MAX_FIELD_LENGTH} tekens")
+        else:
+            clean[field] = value.strip()
+
+    datum = record.get("datum") or ""
+    if not isinstance(datum, str):
+        errors.append("datum moet tekst zijn")
+    elif datum:
+        clean["datum"] = _parse_datum(datum)
+        if clean["datum"] is None:
+            errors.append("datum moet JJJJ-MM-DD of DD-MM-JJJJ zijn")
+    else:
+        clean["datum"] = ""
+
+    status = record.get("status") or "Gepland"
+    if status not in BESTELLING_STATUSES:
+        errors.append(f"status moet een van {', '.join(BESTELLING_STATUSES)} zijn")
+    clean["status"] = status
+
+    chauffeur_id = record.get("chauffeur_id")
+    if chauffeur_id is not None and (
+        isinstance(chauffeur_id, bool) or not isinstance(chauffeur_id, int) or chauffeur_id not in chauffeur_ids
+    ):
+        errors.append("chauffeur_id bestaat niet")
+    clean["chauffeur_id"] = chauffeur_id
+
+    key = record.get("idempotency_key")
+    if key is not None and (not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH):
+        errors.append(f"idempotency_key moet tekst zijn van 1 tot {MAX_KEY_LENGTH} tekens")
+    clean["key"] = key
+    return (None, errors) if errors else (clean, [])
+
+
+def ingest(conn: sqlite3.Connection, records: list, user_id: int, chunk_size: int = CHUNK_SIZE) -> list[dict]:
+    """Valideert alles, schrijft de geldige records weg en geeft per record een resultaat.
+
+    user_id is de ingelogde API-gebruiker; idempotency-sleutels gelden alleen binnen die gebruiker.
+    """
+    chauffeur_ids = {row[0] for row in conn.execute("SELECT id FROM chauffeurs")}
+    results: list[dict] = []
+    pending: list[tuple[int, dict]] = []
+    first_with_key: dict[str, int] = {}
+    repeats: list[tuple[int, str]] = []
+    for index, record in enumerate(records):
+        clean, errors = validate_record(record, chauffeur_ids)
+        if clean is None:
+            results.append({"index": index, "result": "invalid", "errors": errors})
+            continue
+        results.append({"index": index, "result": None})
+        key = clean["key"]
+        if key is not None and key in first_with_key:
+            # Zelfde sleutel twee keer in één aanvraag: tweede verwijst naar de eerste
+            repeats.append((index, key))
+            continue
+        if key is not None:
+            first_with_key[key] = index
+        pending.append((index, clean))
+
+    for start in range(0, len(pending), chunk_size):
+        _write_chunk(conn, user_id, pending[start:start + chunk_size], results)
+
+    for index, key in repeats:
+        results[index] = {"index": index, "result": "duplicate", "id": results[first_with_key[key]]["id"]}
+    return results
+
+
+def _write_chunk(conn: sqlite3.Connection, user_id: int, chunk: list[tuple[int, dict]], results: list[dict]) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        keys = [clean["key"] for _, clean in chunk if clean["key"] is not None]
+        existing: dict[str, int] = {}
+        for start in range(0, len(keys), CHUNK_SIZE):
+            part = keys[start:start + CHUNK_SIZE]
+            placeholders = ",".join("?" for _ in part)
+            existing.update(
+                conn.execute(
+                    f"SELECT sleutel, bestelling_id FROM ingest_keys WHERE user_id = ? AND sleutel IN ({placeholders})",
+                    [user_id, *part],
+                ).fetchall()
+            )
+
+        # Ids zelf uitdelen: executemany geeft geen lastrowid per rij terug.
+        # Veilig omdat BEGIN IMMEDIATE de schrijflock al vasthoudt.
+        next_id = conn.execute(
+            "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'bestellingen'), 0),"
+            " COALESCE((SELECT MAX(id) FROM bestellingen), 0)) + 1"
+        ).fetchone()[0]
+        now = conn.execute("SELECT datetime('now','localtime')").fetchone()[0]
+        orders, events, new_keys = [], [], []
+        for index, clean in chunk:
+            key = clean["key"]
+            if key in existing:
+                results[index] = {"index": index, "result": "duplicate", "id": existing[key]}
+                continue
+            bestelling_id = next_id
+            next_id += 1
+            orders.append((bestelling_id, clean["klant"], clean["ophaal"], clean["aflever"],
+                           clean["datum"], clean["status"], clean["chauffeur_id"], clean["klant"]))
+            events.append((bestelling_id, clean["status"], now, "Aangemaakt"))
+            if key is not None:
+                new_keys.append((user_id, key, bestelling_id, now))
+            results[index] = {"index": index, "result": "created", "id": bestelling_id}
+
+        conn.executemany(
+            "INSERT INTO bestellingen (id, klant, ophaal, aflever, datum, status, chauffeur_id, klant_id) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, {KLANT_ID_FOR_NAME_SQL})",
+            orders,
+        )
+        conn.executemany(
+            "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking) VALUES (?, ?, ?, ?)", events
+        )
+        conn.executemany(
+            "INSERT INTO ingest_keys (user_id, sleutel, bestelling_id, aangemaakt_op) VALUES (?, ?, ?, ?)", new_keys
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
@@ -0,0 +1,248 @@
+"""Routeoptimalisatie als achtergrondjob voor de webserver.
+
+Een job is een losse set stops of een dag (plan_day zonder opslaan: het
+resultaat is de voorgestelde toewijzing en stopvolgorde). Een job schrijft
+nooit in bestellingen of routes; opslaan gaat via de planner of de cron.
+Jobs draaien in een lokale process pool met een begrensde wachtrij, zodat
+requests nooit zelf 2-opt uitvoeren.
+Status en resultaat staan in route_jobs; een job met dezelfde invoer
+(fingerprint) wordt hergebruikt in plaats van opnieuw berekend.
+"""
+
+import datetime
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from . import db
+from .planning import plan_day
+from .routing import compute_route_stops
+
+JOB_WORKERS = 2
+# Maximaal aantal lopende jobs per webserver-proces; daarboven 503
+MAX_PENDING_JOBS = 16
+MAX_STOPS = 500
+# Een job die zo lang 'bezig' blijft hoort bij een gestopt proces
+JOB_TIMEOUT_S = 600
+# Resultaten blijven een week bewaard (en herbruikbaar)
+JOB_RETENTION_S = 7 * 24 * 3600
+JOB_POLL_S = 0.5
+
+_EXPIRE_SQL = (
+    "UPDATE route_jobs SET status = 'mislukt', fout = 'Verlopen', klaar_op = ?"
+    " WHERE status = 'bezig' AND aangemaakt_op < ?"
+)
+
+
+class JobError(ValueError):
+    """Ongeldige job-invoer."""
+
+
+class QueueFull(RuntimeError):
+    """Te veel lopende jobs in dit proces."""
+
+
+def parse_request(payload) -> tuple[str, dict]:
+    """Geeft (soort, invoer) terug: ('stops', {'stops': [...]}) of ('dag', {'dag': 'JJJJ-MM-DD'})."""
+    if not isinstance(payload, dict):
+        raise JobError("Verwacht een JSON object met 'stops' of 'dag'")
+    if ("stops" in payload) == ("dag" in payload):
+        raise JobError("Geef precies één van 'stops' of 'dag' op")
+    if "dag" in payload:
+        try:
+            dag = datetime.date.fromisoformat(str(payload["dag"])).isoformat()
+        except ValueError:
+            raise JobError("dag moet een datum zijn (JJJJ-MM-DD)") from None
+        return "dag", {"dag": dag}
+
+    stops = payload["stops"]
+    if not isinstance(stops, list) or not stops:
+        raise JobError("stops moet een niet-lege lijst zijn")
+    if len(stops) > MAX_STOPS:
+        raise JobError(f"Maximaal {MAX_STOPS} stops per job")
+    clean = []
+    for index, stop in enumerate(stops):
+        if (
+            not isinstance(stop, dict)
+            or isinstance(stop.get("id"), bool)
+            or not isinstance(stop.get("id"), int)
+            or not isinstance(stop.get("aflever"), str)
+            or not stop["aflever"].strip()
+        ):
+            raise JobError(f"stop {index} heeft een geheel getal 'id' en een 'aflever' adres nodig")
+        clean.append({"id": stop["id"], "aflever": stop["aflever"].strip()})
+    return "stops", {"stops": clean}
+
+
+def fingerprint(soort: str, invoer: dict, versions: dict | None = None) -> str:
+    """Hash van de invoer; voor een dag ook de tabelversies (andere data = andere job)."""
+    raw = json.dumps([soort, invoer, versions or {}], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def run_job(db_path: str, soort: str, invoer: dict) -> dict:
+    """Draait in een pool-proces; moet op moduleniveau staan (pickle)."""
+    if soort == "dag":
+        # Via HTTP alleen een voorstel; toewijzingen opslaan blijft bij de planner
+        return plan_day(db_path, invoer["dag"], workers=1, write=False)
+    stops = compute_route_stops(invoer["stops"])
+    return {"stops": stops, "km": round(sum(st["afstand_km"] for st in stops), 1)}
+
+
+def _row_to_job(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "soort": row["soort"],
+        "status": row["status"],
+        "resultaat": json.loads(row["resultaat"]) if row["resultaat"] else None,
+        "fout": row["fout"],
+        "aangemaakt_op": row["aangemaakt_op"],
+        "klaar_op": row["klaar_op"],
+    }
+
+
+class JobRunner:
+    """Process pool plus bookkeeping in route_jobs, één per webserver-proces."""
+
+    def __init__(self, db_path: Path | str = db.DEFAULT_DB_PATH, workers: int = JOB_WORKERS,
+                 max_pending: int = MAX_PENDING_JOBS):
+        self.db_path = str(db_path)
+        self.workers = workers
+        self.max_pending = max_pending
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        # Lokale jobs: gezet zodra het resultaat in route_jobs staat
+        self._done: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Pool en lopende jobs van het ouderproces zijn hier niet bruikbaar
+            self._reset()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: geen fork van een webserver met draaiende threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def submit(self, conn: sqlite3.Connection, soort: str, invoer: dict) -> tuple[dict, bool]:
+        """Nieuwe job, of de bestaande met dezelfde fingerprint. Geeft (job, hergebruikt)."""
+        self._check_fork()
+        versions = db.table_versions(conn, ("bestellingen", "chauffeurs")) if soort == "dag" else None
+        fp = fingerprint(soort, invoer, versions)
+        now = time.time()
+        # IMMEDIATE: twee workers met dezelfde aanvraag maken niet allebei een job
+        conn.execute("BEGIN IMMEDIATE")
+        acquired = False
+        try:
+            conn.execute("DELETE FROM route_jobs WHERE aangemaakt_op < ?", (now - JOB_RETENTION_S,))
+            conn.execute(_EXPIRE_SQL + " AND fingerprint = ?", (now, now - JOB_TIMEOUT_S, fp))
+            existing = conn.execute(
+                "SELECT * FROM route_jobs WHERE fingerprint = ? AND status <> 'mislukt'"
+                " ORDER BY aangemaakt_op DESC LIMIT 1",
+                (fp,),
+            ).fetchone()
+            if existing is not None:
+                conn.commit()
+                return _row_to_job(existing), True
+            acquired = self._slots.acquire(blocking=False)
+            if not acquired:
+                raise QueueFull(f"Er lopen al {self.max_pending} jobs; probeer het later opnieuw")
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO route_jobs (id, fingerprint, soort, status, invoer, aangemaakt_op) VALUES (?, ?, ?, 'bezig', ?, ?)",
+                (job_id, fp, soort, json.dumps(invoer), now),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            if acquired:
+                self._slots.release()
+            raise
+
+        try:
+            future = self._get_executor().submit(run_job, self.db_path, soort, invoer)
+        except BaseException as exc:
+            self._slots.release()
+            self._finish(job_id, None, exc)
+            raise
+        with self._lock:
+            self._done[job_id] = threading.Event()
+        future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+        return self.get(conn, job_id), False
+
+    def _on_done(self, job_id: str, future: Future):
+        self._slots.release()
+        try:
+            if future.cancelled():
+                self._finish(job_id, None, RuntimeError("Geannuleerd"))
+            else:
+                exc = future.exception()
+                self._finish(job_id, None if exc else future.result(), exc)
+        finally:
+            with self._lock:
+                done = self._done.pop(job_id, None)
+            if done is not None:
+                done.set()
+
+    def _finish(self, job_id: str, result: dict | None, exc: BaseException | None):
+        conn = db.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    # Een verlopen job blijft mislukt, ook als het resultaat alsnog komt
+                    "UPDATE route_jobs SET status = ?, resultaat = ?, fout = ?, klaar_op = ?"
+                    " WHERE id = ? AND status = 'bezig'",
+                    (
+                        "mislukt" if exc else "klaar",
+                        None if exc else json.dumps(result),
+                        f"{type(exc).__name__}: {exc}" if exc else None,
+                        time.time(),
+                        job_id,
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def get(self, conn: sqlite3.Connection, job_id: str) -> dict | None:
+        """Huidige stand; een job die langer dan JOB_TIMEOUT_S 'bezig' is wordt hier als mislukt vastgelegd."""
+        row = conn.execute("SELECT * FROM route_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is not None and row["status"] == "bezig" and row["aangemaakt_op"] < time.time() - JOB_TIMEOUT_S:
+            now = time.time()
+            with conn:
+                conn.execute(_EXPIRE_SQL + " AND id = ?", (now, now - JOB_TIMEOUT_S, job_id))
+            row = conn.execute("SELECT * FROM route_jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def wait(self, job_id: str, timeout: float) -> None:
+        """Wacht tot de job klaar is of de timeout verstrijkt.
+
+        Jobs uit dit proces wachten op hun done-event; die van andere workers
+        worden alleen via de database gevolgd (de aanroeper leest opnieuw).
+        """
+        self._check_fork()
+        with self._lock:
+            done = self._done.get(job_id)
+        if done is None:
+            time.sleep(min(timeout, JOB_POLL_S))
+        else:
+            done.wait(timeout)
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,293 @@
+"""Belastingtests tegen een draaiende webserver.
+
+    python -m quickdelivery.loadtest sse --url http://127.0.0.1:8000 --db quickdelivery.db
+    python -m quickdelivery.loadtest track --url http://127.0.0.1:8000 --db quickdelivery.db
+
+sse: opent veel gelijktijdige /tracking/stream verbindingen, schrijft daarna
+status_events in de database en meet per event hoeveel clients het kregen en
+hoe lang dat duurde.
+
+track: requests per seconde op /api/track/<id> (of /track/<id>) in drie
+rondes: elke bestelling één keer (cache-miss bij een vers gestarte server),
+daarna herhaald (cache-hit) en herhaald met If-None-Match (304).
+
+Alleen standaardbibliotheek, zodat het ook naast de server op dezelfde
+machine draait.
+"""
+
+import argparse
+import asyncio
+import base64
+import http.client
+import resource
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from . import db
+
+
+def _raise_fd_limit(needed: int) -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+async def _sse_client(host: str, port: int, path: str, auth: str, connected: asyncio.Event, received: dict,
+                      counter: dict, total: int, stop: asyncio.Event) -> bool:
+    """Eén SSE-client; noteert per event-id het moment van ontvangst."""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return False
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: {auth}\r\n"
+            "Accept: text/event-stream\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            return False
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+        # De view abonneert vóór het antwoord: headers ontvangen = abonnement staat
+        counter["connected"] += 1
+        if counter["connected"] == total:
+            connected.set()
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            # Chunked transfer: alleen de regels met 'id:' zijn interessant
+            if line.startswith(b"id: "):
+                event_id = int(line[4:].strip())
+                received.setdefault(event_id, []).append(time.monotonic())
+        return True
+    finally:
+        writer.close()
+
+
+def _insert_event(db_path: str, bestelling_id: int) -> int:
+    conn = db.connect(db_path)
+    try:
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking)"
+                " VALUES (?, 'Onderweg', datetime('now','localtime'), 'loadtest')",
+                (bestelling_id,),
+            )
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+
+def _cleanup(db_path: str, event_ids: list[int]) -> None:
+    conn = db.connect(db_path)
+    try:
+        with conn:
+            conn.executemany("DELETE FROM status_events WHERE id = ?", [(event_id,) for event_id in event_ids])
+    finally:
+        conn.close()
+
+
+async def run_sse(url: str, db_path: str, clients: int, events: int, interval: float,
+                  connect_timeout: float, deliver_timeout: float, user: str, password: str) -> dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    # /tracking/stream vraagt een planner- of manager-account
+    auth = "Basic " + base64.b64encode(f"{user}:{password}".encode("utf-8")).decode("ascii")
+    _raise_fd_limit(clients + 64)
+
+    conn = db.connect(db_path)
+    try:
+        row = conn.execute("SELECT id FROM bestellingen ORDER BY id LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        raise SystemExit("De database heeft geen bestellingen om events voor te schrijven")
+
+    connected = asyncio.Event()
+    stop = asyncio.Event()
+    received: dict[int, list[float]] = {}
+    counter = {"connected": 0}
+    started = time.monotonic()
+    tasks = [
+        asyncio.create_task(_sse_client(host, port, "/tracking/stream", auth, connected, received, counter, clients, stop))
+        for _ in range(clients)
+    ]
+    try:
+        await asyncio.wait_for(connected.wait(), connect_timeout)
+    except asyncio.TimeoutError:
+        pass
+    connect_s = time.monotonic() - started
+
+    sent: dict[int, float] = {}
+    loop = asyncio.get_running_loop()
+    for _ in range(events):
+        event_id = await loop.run_in_executor(None, _insert_event, db_path, row["id"])
+        sent[event_id] = time.monotonic()
+        await asyncio.sleep(interval)
+
+    deadline = time.monotonic() + deliver_timeout
+    while time.monotonic() < deadline:
+        if all(len(received.get(event_id, ())) >= counter["connected"] for event_id in sent):
+            break
+        await asyncio.sleep(0.1)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await loop.run_in_executor(None, _cleanup, db_path, list(sent))
+
+    latencies = [
+        (arrival - sent[event_id]) * 1000
+        for event_id in sent
+        for arrival in received.get(event_id, ())
+    ]
+    expected = counter["connected"] * len(sent)
+    return {
+        "clients": clients,
+        "connected": counter["connected"],
+        "connect_s": connect_s,
+        "events": len(sent),
+        "delivered": len(latencies),
+        "expected": expected,
+        "p50_ms": statistics.median(latencies) if latencies else None,
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else None,
+        "max_ms": max(latencies) if latencies else None,
+    }
+
+
+def format_sse(stats: dict) -> str:
+    lines = [
+        f"Clients verbonden: {stats['connected']}/{stats['clients']} in {stats['connect_s']:.1f} s",
+        f"Events afgeleverd: {stats['delivered']}/{stats['expected']} ({stats['events']} events)",
+    ]
+    if stats["p50_ms"] is not None:
+        lines.append(
+            f"Latency: p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms'] or stats['p50_ms']:.0f} ms,"
+            f" max {stats['max_ms']:.0f} ms"
+        )
+    return "\n".join(lines)
+
+
+def _track_worker(host: str, port: int, jobs: list[tuple[str, str | None]], results: list) -> None:
+    """Eén keep-alive verbinding; noteert per request (status, X-Cache, ETag, pad)."""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        for path, etag in jobs:
+            headers = {"If-None-Match": etag} if etag else {}
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            results.append((response.status, response.getheader("X-Cache"), response.getheader("ETag"), path))
+    finally:
+        conn.close()
+
+
+def _track_round(name: str, host: str, port: int, jobs: list[tuple[str, str | None]], concurrency: int) -> dict:
+    results: list = []
+    threads = [
+        threading.Thread(target=_track_worker, args=(host, port, jobs[index::concurrency], results))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "round": name,
+        "requests": len(results),
+        "seconds": elapsed,
+        "rps": len(results) / elapsed if elapsed else 0.0,
+        "status": Counter(status for status, _, _, _ in results),
+        "cache": Counter(cache for _, cache, _, _ in results),
+        "etags": {path: etag for _, _, etag, path in results},
+    }
+
+
+def run_track(url: str, db_path: str, orders: int, requests: int, concurrency: int, html: bool) -> list[dict]:
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    conn = db.connect(db_path)
+    try:
+        ids = [row[0] for row in conn.execute("SELECT id FROM bestellingen ORDER BY id LIMIT ?", (orders,))]
+    finally:
+        conn.close()
+    if not ids:
+        raise SystemExit("De database heeft geen bestellingen")
+
+    prefix = "/track/" if html else "/api/track/"
+    paths = [f"{prefix}{bestelling_id}" for bestelling_id in ids]
+    repeated = [paths[index % len(paths)] for index in range(requests)]
+    miss = _track_round("miss", host, port, [(path, None) for path in paths], concurrency)
+    hit = _track_round("hit", host, port, [(path, None) for path in repeated], concurrency)
+    etags = miss["etags"]
+    not_modified = _track_round("304", host, port, [(path, etags.get(path)) for path in repeated], concurrency)
+    return [miss, hit, not_modified]
+
+
+def format_track(rounds: list[dict]) -> str:
+    lines = [f"{'ronde':<6} {'requests':>9} {'req/s':>9}  status / X-Cache"]
+    for r in rounds:
+        status = ", ".join(f"{code}: {count}" for code, count in sorted(r["status"].items()))
+        cache = ", ".join(f"{name}: {count}" for name, count in sorted(r["cache"].items(), key=str))
+        lines.append(f"{r['round']:<6} {r['requests']:>9} {r['rps']:>9.0f}  {status} / {cache}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m quickdelivery.loadtest", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sse = sub.add_parser("sse", help="Veel gelijktijdige SSE-clients op /tracking/stream.")
+    sse.add_argument("--url", default="http://127.0.0.1:8000", help="basis-URL van de webserver")
+    sse.add_argument("--db", default=str(db.DEFAULT_DB_PATH), help="database van de server (events worden erin geschreven)")
+    sse.add_argument("--clients", type=int, default=1000)
+    sse.add_argument("--events", type=int, default=10)
+    sse.add_argument("--interval", type=float, default=0.2, help="seconden tussen events")
+    sse.add_argument("--connect-timeout", type=float, default=60.0)
+    sse.add_argument("--deliver-timeout", type=float, default=30.0)
+    sse.add_argument("--user", default="planner@gmail.com", help="planner- of manager-account voor de stream")
+    sse.add_argument("--password", default="wachtwoord")
+
+    track = sub.add_parser("track", help="Cache-miss, cache-hit en 304 op de publieke statuspagina.")
+    track.add_argument("--url", default="http://127.0.0.1:8000", help="basis-URL van een vers gestarte webserver")
+    track.add_argument("--db", default=str(db.DEFAULT_DB_PATH), help="database van de server (alleen gelezen)")
+    track.add_argument("--orders", type=int, default=500, help="aantal verschillende bestellingen")
+    track.add_argument("--requests", type=int, default=5000, help="requests per hit- en 304-ronde")
+    track.add_argument("--concurrency", type=int, default=8)
+    track.add_argument("--html", action="store_true", help="/track/<id> in plaats van /api/track/<id>")
+
+    args = parser.parse_args(argv)
+    if args.command == "track":
+        try:
+            rounds = run_track(args.url, args.db, args.orders, args.requests, args.concurrency, args.html)
+        except (sqlite3.Error, OSError) as exc:
+            print(f"Loadtest mislukt: {exc}", file=sys.stderr)
+            return 1
+        print(format_track(rounds))
+        return 0
+    if args.command == "sse":
+        try:
+            stats = asyncio.run(
+                run_sse(args.url, args.db, args.clients, args.events, args.interval,
+                        args.connect_timeout, args.deliver_timeout, args.user, args.password)
+            )
+        except sqlite3.Error as exc:
+            print(f"Loadtest mislukt: {exc}", file=sys.stderr)
+            return 1
+        print(format_sse(stats))
+        return 0 if stats["connected"] == stats["clients"] and stats["delivered"] == stats["expected"] else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
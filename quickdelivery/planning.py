@@ -0,0 +1,172 @@
+"""Nachtelijke planning: open bestellingen van één dag verdelen over de
+beschikbare chauffeurs en per chauffeur de route opslaan."""
+
+import datetime
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from . import db, schema
+from .routing import compute_route_stops
+
+
+def load_day(conn: sqlite3.Connection, dag: str) -> tuple[list[dict], list[dict]]:
+    """Open bestellingen van de dag (via de datum_dag index) en de beschikbare chauffeurs."""
+    placeholders = ", ".join("?" for _ in schema.CLOSED_STATUSES)
+    orders = [
+        dict(row)
+        for row in conn.execute(
+            f"""
+            SELECT id, klant, aflever, chauffeur_id FROM bestellingen
+            WHERE datum_dag = ? AND COALESCE(status, '') NOT IN ({placeholders})
+            ORDER BY id
+            """,
+            (dag, *schema.CLOSED_STATUSES),
+        )
+    ]
+    chauffeurs = [
+        dict(row) for row in conn.execute("SELECT id, naam FROM chauffeurs WHERE beschikbaar = 1 ORDER BY id")
+    ]
+    return orders, chauffeurs
+
+
+def assign_orders(orders: list[dict], chauffeurs: list[dict]) -> dict[int, list[dict]]:
+    """Bestellingen per chauffeur-id.
+
+    Een bestaande toewijzing aan een beschikbare chauffeur blijft staan; de
+    rest gaat naar de chauffeur met de minste stops (bij gelijkspel laagste id).
+    """
+    per_chauffeur: dict[int, list[dict]] = {c["id"]: [] for c in chauffeurs}
+    if not per_chauffeur:
+        return {}
+    unassigned = []
+    for order in orders:
+        if order["chauffeur_id"] in per_chauffeur:
+            per_chauffeur[order["chauffeur_id"]].append(order)
+        else:
+            unassigned.append(order)
+    for order in unassigned:
+        ch_id = min(per_chauffeur, key=lambda cid: (len(per_chauffeur[cid]), cid))
+        per_chauffeur[ch_id].append(order)
+    return per_chauffeur
+
+
+def plan_day(db_path: Path | str, dag: str, workers: int | None = None, write: bool = True) -> dict:
+    """Plan één dag en schrijf toewijzingen en stopvolgorde in één transactie.
+
+    De routes worden parallel berekend in een ProcessPoolExecutor (workers=1
+    rekent in dit proces). Geeft statistieken en timings terug; per route
+    staan de bestelling-ids in stopvolgorde. Met write=False wordt alleen het
+    voorstel berekend en niets opgeslagen.
+    """
+    timings: dict[str, float] = {}
+    started = last = time.perf_counter()
+
+    conn = db.connect(db_path)
+    try:
+        if write:
+            # Op een server zonder desktop-app zelf het schema bijwerken
+            schema.migrate(conn)
+        orders, chauffeurs = load_day(conn, dag)
+        now = time.perf_counter()
+        timings["laden"], last = now - last, now
+
+        per_chauffeur = assign_orders(orders, chauffeurs)
+        ch_ids = list(per_chauffeur)
+        work = [per_chauffeur[ch_id] for ch_id in ch_ids]
+        if workers == 1 or len(ch_ids) < 2:
+            routes = list(map(compute_route_stops, work))
+        else:
+            with ProcessPoolExecutor(max_workers=workers or min(len(ch_ids), os.cpu_count() or 1)) as pool:
+                routes = list(pool.map(compute_route_stops, work))
+        stops_by_chauffeur = dict(zip(ch_ids, routes))
+        now = time.perf_counter()
+        timings["optimaliseren"], last = now - last, now
+
+        reassigned = [
+            (ch_id, order["id"])
+            for ch_id, ch_orders in per_chauffeur.items()
+            for order in ch_orders
+            if order["chauffeur_id"] != ch_id
+        ]
+        if write:
+            _save_plan(conn, dag, reassigned, stops_by_chauffeur)
+            now = time.perf_counter()
+            timings["schrijven"], last = now - last, now
+    finally:
+        conn.close()
+
+    timings["totaal"] = last - started
+    namen = {c["id"]: c["naam"] for c in chauffeurs}
+    return {
+        "dag": dag,
+        "opgeslagen": write,
+        "bestellingen": len(orders),
+        "chauffeurs": len(chauffeurs),
+        "toegewezen": len(reassigned),
+        "niet_gepland": len(orders) if not chauffeurs else 0,
+        "routes": [
+            {
+                "chauffeur_id": ch_id,
+                "naam": namen.get(ch_id, ""),
+                "stops": len(stops),
+                "km": round(sum(st["afstand_km"] for st in stops), 1),
+                "laatste_eta": stops[-1]["eta"] if stops else "-",
+                "bestelling_ids": [st["bestelling_id"] for st in stops],
+            }
+            for ch_id, stops in stops_by_chauffeur.items()
+        ],
+        "timings": timings,
+    }
+
+
+def _save_plan(conn: sqlite3.Connection, dag: str, reassigned: list[tuple[int, int]],
+               stops_by_chauffeur: dict[int, list[dict]]) -> None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany("UPDATE bestellingen SET chauffeur_id = ? WHERE id = ?", reassigned)
+        for ch_id, stops in stops_by_chauffeur.items():
+            conn.execute("DELETE FROM route_stops WHERE chauffeur_id = ? AND dag = ?", (ch_id, dag))
+            if not stops:
+                conn.execute("DELETE FROM route_plans WHERE chauffeur_id = ? AND dag = ?", (ch_id, dag))
+                continue
+            conn.executemany(
+                "INSERT INTO route_stops (chauffeur_id, dag, volgorde, bestelling_id, eta, afstand_km) VALUES (?, ?, ?, ?, ?, ?)",
+                [(ch_id, dag, st["volgorde"], st["bestelling_id"], st["eta"], st["afstand_km"]) for st in stops],
+            )
+            # Na de toewijzingen, want de triggers markeren de route dan als verouderd
+            conn.execute(
+                """
+                INSERT INTO route_plans (chauffeur_id, dag, stale, berekend_op)
+                VALUES (?, ?, 0, datetime('now', 'localtime'))
+                ON CONFLICT (chauffeur_id, dag) DO UPDATE SET stale = 0, berekend_op = excluded.berekend_op
+                """,
+                (ch_id, dag),
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def format_report(stats: dict) -> str:
+    lines = [
+        f"Planning {stats['dag']}: {stats['bestellingen']} open bestellingen, "
+        f"{stats['chauffeurs']} beschikbare chauffeurs, {stats['toegewezen']} (her)toegewezen",
+    ]
+    if stats["niet_gepland"]:
+        lines.append(f"Let op: {stats['niet_gepland']} bestellingen niet gepland (geen beschikbare chauffeur)")
+    for route in stats["routes"]:
+        lines.append(
+            f"  chauffeur {route['chauffeur_id']} {route['naam']}: {route['stops']} stops, "
+            f"{route['km']} km, laatste stop {route['laatste_eta']}"
+        )
+    lines.append("Tijd: " + ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in stats["timings"].items()))
+    return "\n".join(lines)
+
+
+def parse_day(value: str) -> str:
+    """YYYY-MM-DD controleren (argparse type)."""
+    return datetime.date.fromisoformat(value).isoformat()
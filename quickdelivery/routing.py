@@ -0,0 +1,119 @@
+"""Routeheuristiek: afstandsschatting, nearest neighbour en 2-opt.
+
+Alle functies zijn puur (geen database of Tk), zodat ze ook in een
+ProcessPoolExecutor gebruikt kunnen worden.
+"""
+
+from itertools import combinations
+
+# Rijsnelheid (km/u) en stoptijd (min) voor de ETA berekening
+AVERAGE_SPEED_KMH = 30
+STOP_MINUTES = 5
+START_MINUTES = 8 * 60  # 08:00
+
+
+def estimate_distance_km(a: str, b: str) -> float:
+    aa = (a or "").strip().lower()
+    bb = (b or "").strip().lower()
+    if not aa or not bb:
+        return 10.0
+    if aa == bb:
+        return 0.0
+    # Afstand schatting op basis van adres
+    a_tokens = {t for t in aa.replace(",", " ").split() if t}
+    b_tokens = {t for t in bb.replace(",", " ").split() if t}
+    common = len(a_tokens & b_tokens)
+    base = 12.0
+    dist = base - (common * 2.5)
+    # Begrenzing
+    if dist < 1.0:
+        dist = 1.0
+    if dist > 25.0:
+        dist = 25.0
+    return dist
+
+
+def route_length(stops: list[dict]) -> float:
+    if len(stops) < 2:
+        return 0.0
+    total = 0.0
+    for i in range(len(stops) - 1):
+        total += estimate_distance_km(stops[i]["adres"], stops[i + 1]["adres"])
+    return total
+
+
+def nearest_neighbor_route(stops: list[dict]) -> list[dict]:
+    if not stops:
+        return []
+    remaining = stops[1:]
+    route = [stops[0]]
+    while remaining:
+        last = route[-1]
+        best_idx = 0
+        best_d = float("inf")
+        for idx, cand in enumerate(remaining):
+            d = estimate_distance_km(last["adres"], cand["adres"])
+            if d < best_d:
+                best_d = d
+                best_idx = idx
+        route.append(remaining.pop(best_idx))
+    return route
+
+
+def two_opt(route: list[dict], max_passes: int = 50) -> list[dict]:
+    if len(route) < 4:
+        return route
+
+    best = route[:]
+    best_len = route_length(best)
+
+    improved = True
+    passes = 0
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+        # Segment grenzen
+        for i, j in combinations(range(1, len(best) - 1), 2):
+            if j <= i:
+                continue
+            candidate = best[:i] + list(reversed(best[i:j + 1])) + best[j + 1 :]
+            cand_len = route_length(candidate)
+            if cand_len + 1e-6 < best_len:
+                best = candidate
+                best_len = cand_len
+                improved = True
+                break
+        # Herstart na verbetering
+    return best
+
+
+def compute_route_stops(orders: list[dict]) -> list[dict]:
+    """Stopvolgorde (nearest neighbour + 2-opt) en ETA vanaf 08:00 voor de open bestellingen.
+
+    orders bevat dicts met id, klant en aflever; het resultaat per stop
+    volgorde, bestelling_id, eta (HH:MM) en afstand_km vanaf de vorige stop.
+    """
+    stops = []
+    for b in orders:
+        adres = (b.get("aflever") or "").strip()
+        if adres:
+            stops.append({"id": b["id"], "klant": b.get("klant", ""), "adres": adres})
+    optimized = two_opt(nearest_neighbor_route(stops)) if stops else []
+
+    result = []
+    current_time_minutes = START_MINUTES
+    prev_adres = "Depot"
+    for idx, stop in enumerate(optimized):
+        dist = estimate_distance_km(prev_adres, stop["adres"])
+        current_time_minutes += int((dist / AVERAGE_SPEED_KMH) * 60)
+        result.append(
+            {
+                "volgorde": idx + 1,
+                "bestelling_id": stop["id"],
+                "eta": f"{current_time_minutes // 60:02d}:{current_time_minutes % 60:02d}",
+                "afstand_km": dist,
+            }
+        )
+        current_time_minutes += STOP_MINUTES
+        prev_adres = stop["adres"]
+    return result
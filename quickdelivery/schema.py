@@ -0,0 +1,574 @@
+"""Databaseschema en migraties, gedeeld door de desktop-app en de webserver.
+
+migrate() brengt een database in één transactie naar SCHEMA_VERSION. Alle
+stappen zijn idempotent; BEGIN IMMEDIATE zorgt dat gelijktijdig startende
+processen (gunicorn workers, desktop) niet tegelijk migreren.
+"""
+
+import sqlite3
+
+# Verhoog bij elke wijziging in schema, migraties of seed data; bij opstarten
+# wordt alles overgeslagen zolang PRAGMA user_version al deze waarde heeft
+SCHEMA_VERSION = 6
+BESTELLING_STATUSES = ("Gepland", "Onderweg", "Afgeleverd", "Geannuleerd")
+CLOSED_STATUSES = ("Afgeleverd", "Geannuleerd")
+# klant_id voor een klantnaam (parameter): NULL als de naam niet of meer dan eens voorkomt
+KLANT_ID_FOR_NAME_SQL = "(SELECT MIN(id) FROM klanten WHERE naam = ? HAVING COUNT(*) = 1)"
+TRACKED_TABLES = ("klanten", "bestellingen", "chauffeurs", "status_events", "users")
+
+# Genormaliseerde dag (YYYY-MM-DD) van bestellingen.datum, ook voor oude DD-MM-JJJJ waarden.
+# Ongeldige datums worden NULL. Gebruikt als gegenereerde, geïndexeerde kolom datum_dag.
+_DATUM_ISO_SQL = (
+    "(CASE WHEN substr(datum, 3, 1) = '-' "
+    "THEN substr(datum, 7, 4) || '-' || substr(datum, 4, 2) || '-' || substr(datum, 1, 2) "
+    "ELSE datum END)"
+)
+DATUM_DAG_SQL = f"CASE WHEN date({_DATUM_ISO_SQL}, '+0 days') = {_DATUM_ISO_SQL} THEN {_DATUM_ISO_SQL} END"
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(conn: sqlite3.Connection) -> bool:
+    """Schema, migraties en seed als de database nog niet bij is; True als er gemigreerd is."""
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return False
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if schema_version(conn) >= SCHEMA_VERSION:
+            # Een ander proces was net eerder
+            conn.rollback()
+            return False
+        init_database(conn)
+        apply_migrations(conn)
+        ensure_seed_users(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return True
+
+
+def _execute_script(cur: sqlite3.Cursor, script: str) -> None:
+    """Als executescript, maar zonder de impliciete COMMIT: blijft binnen de migratietransactie."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            cur.execute(statement)
+            statement = ""
+    if statement.strip():
+        cur.execute(statement)
+
+
+def init_database(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS klanten (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            naam TEXT NOT NULL,
+            adres TEXT NOT NULL,
+            contact TEXT
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bestellingen (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            klant TEXT NOT NULL,
+            ophaal TEXT NOT NULL,
+            aflever TEXT NOT NULL,
+            datum TEXT,
+            status TEXT
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chauffeurs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            naam TEXT NOT NULL,
+            voertuig TEXT,
+            beschikbaar INTEGER NOT NULL DEFAULT 1
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS status_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bestelling_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            opmerking TEXT,
+            FOREIGN KEY(bestelling_id) REFERENCES bestellingen(id)
+        )
+        """
+    )
+
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            chauffeur_id INTEGER,
+            FOREIGN KEY(chauffeur_id) REFERENCES chauffeurs(id)
+        )
+        """
+    )
+
+
+def apply_migrations(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+    cols = cur.execute("PRAGMA table_info(bestellingen)").fetchall()
+    existing = {c[1] for c in cols}
+    if "chauffeur_id" not in existing:
+        cur.execute("ALTER TABLE bestellingen ADD COLUMN chauffeur_id INTEGER")
+
+    # Koppeling van een klant-account aan zijn klantrecord
+    user_cols = {c[1] for c in cur.execute("PRAGMA table_info(users)").fetchall()}
+    if "klant_id" not in user_cols:
+        cur.execute("ALTER TABLE users ADD COLUMN klant_id INTEGER REFERENCES klanten(id)")
+
+    # Getypeerde dag naast de vrije tekst in datum
+    all_cols = {c[1] for c in cur.execute("PRAGMA table_xinfo(bestellingen)").fetchall()}
+    if "datum_dag" not in all_cols:
+        cur.execute(f"ALTER TABLE bestellingen ADD COLUMN datum_dag TEXT GENERATED ALWAYS AS ({DATUM_DAG_SQL}) VIRTUAL")
+        # Oude DD-MM-JJJJ waarden omzetten naar de opgeslagen notatie
+        cur.execute("UPDATE bestellingen SET datum = datum_dag WHERE datum_dag IS NOT NULL AND datum <> datum_dag")
+
+    # Indexen voor filteren in SQL
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bestellingen_status ON bestellingen(status, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bestellingen_chauffeur ON bestellingen(chauffeur_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bestellingen_datum_dag ON bestellingen(datum_dag, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_bestellingen_klant ON bestellingen(klant, id)")
+
+    init_event_archive(conn)
+    init_kpi_rollup(conn)
+    init_search_index(conn)
+    init_change_tracking(conn)
+    init_route_plans(conn)
+    init_web_tables(conn)
+    init_klant_link(conn)
+
+
+def ensure_seed_users(conn: sqlite3.Connection) -> None:
+    """Testgebruikers, testchauffeur en testklanten."""
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT OR IGNORE INTO users (email, password, role) VALUES (?, ?, ?)",
+        [
+            ("planner@gmail.com", "wachtwoord", "planner"),
+            ("chaffeur@gmail.com", "wachtwoord", "chauffeur"),
+            ("klant@gmail.com", "wachtwoord", "klant"),
+            ("manager@gmail.com", "wachtwoord", "manager"),
+        ],
+    )
+
+    # Test chauffeur
+    cur.execute(
+        "INSERT INTO chauffeurs (naam, voertuig, beschikbaar) "
+        "SELECT 'Test Chauffeur', 'Bestelbus', 1 WHERE NOT EXISTS (SELECT 1 FROM chauffeurs WHERE naam = 'Test Chauffeur')"
+    )
+    cur.execute(
+        """
+        UPDATE users SET chauffeur_id = (SELECT MIN(id) FROM chauffeurs WHERE naam = 'Test Chauffeur')
+        WHERE lower(email) = 'chaffeur@gmail.com' AND chauffeur_id IS NOT
+            (SELECT MIN(id) FROM chauffeurs WHERE naam = 'Test Chauffeur')
+        """
+    )
+
+    # Test klanten
+    test_klanten = [
+        ("Klant 1", "Hoofdstraat 10, Amsterdam", "06-12345671"),
+        ("Klant 2", "Kerkstraat 25, Rotterdam", "06-12345672"),
+        ("Klant 3", "Marktplein 5, Utrecht", "06-12345673"),
+    ]
+    cur.executemany(
+        "INSERT INTO klanten (naam, adres, contact) SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM klanten WHERE naam = ?)",
+        [(naam, adres, contact, naam) for naam, adres, contact in test_klanten],
+    )
+    cur.execute(
+        """
+        UPDATE users SET klant_id = (SELECT MIN(id) FROM klanten WHERE naam = 'Klant 1')
+        WHERE lower(email) = 'klant@gmail.com' AND klant_id IS NULL
+        """
+    )
+
+
+def init_event_archive(conn: sqlite3.Connection) -> None:
+    """Archieftabel voor status events plus opruimen bij verwijderde bestellingen."""
+    cur = conn.cursor()
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS status_events_archive (
+            id INTEGER PRIMARY KEY,
+            bestelling_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            opmerking TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_status_events_bestelling ON status_events(bestelling_id, id);
+        CREATE INDEX IF NOT EXISTS idx_status_events_archive_bestelling ON status_events_archive(bestelling_id, id);
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_events_ad AFTER DELETE ON bestellingen BEGIN
+            DELETE FROM status_events WHERE bestelling_id = old.id;
+            DELETE FROM status_events_archive WHERE bestelling_id = old.id;
+        END;
+        """
+    )
+
+
+def init_kpi_rollup(conn: sqlite3.Connection) -> None:
+    """Dagelijkse KPI's per chauffeur; triggers houden bij welke dagen opnieuw berekend moeten worden."""
+    cur = conn.cursor()
+    existing = cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'chauffeur_daily_kpi'").fetchone()
+
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS chauffeur_daily_kpi (
+            dag TEXT NOT NULL,
+            chauffeur_id INTEGER NOT NULL,
+            bestellingen INTEGER NOT NULL DEFAULT 0,
+            afgeleverd INTEGER NOT NULL DEFAULT 0,
+            geannuleerd INTEGER NOT NULL DEFAULT 0,
+            onderweg INTEGER NOT NULL DEFAULT 0,
+            gepland INTEGER NOT NULL DEFAULT 0,
+            levertijd_som REAL NOT NULL DEFAULT 0,
+            levertijd_aantal INTEGER NOT NULL DEFAULT 0,
+            levertijd_p90 REAL,
+            levertijd_hist TEXT NOT NULL DEFAULT '{}',
+            km REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dag, chauffeur_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS kpi_dirty_days (
+            dag TEXT PRIMARY KEY
+        );
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_kpi_ai AFTER INSERT ON bestellingen BEGIN
+            INSERT OR IGNORE INTO kpi_dirty_days (dag) VALUES (COALESCE(new.datum_dag, ''));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_kpi_au AFTER UPDATE ON bestellingen BEGIN
+            INSERT OR IGNORE INTO kpi_dirty_days (dag) VALUES (COALESCE(old.datum_dag, ''));
+            INSERT OR IGNORE INTO kpi_dirty_days (dag) VALUES (COALESCE(new.datum_dag, ''));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_kpi_ad AFTER DELETE ON bestellingen BEGIN
+            INSERT OR IGNORE INTO kpi_dirty_days (dag) VALUES (COALESCE(old.datum_dag, ''));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS status_events_kpi_ai AFTER INSERT ON status_events BEGIN
+            INSERT OR IGNORE INTO kpi_dirty_days (dag)
+            SELECT COALESCE(datum_dag, '') FROM bestellingen WHERE id = new.bestelling_id;
+        END;
+        """
+    )
+    if not existing:
+        # Eerste keer: alle dagen laten berekenen
+        cur.execute("INSERT OR IGNORE INTO kpi_dirty_days (dag) SELECT DISTINCT COALESCE(datum_dag, '') FROM bestellingen")
+
+
+def init_klant_link(conn: sqlite3.Connection) -> None:
+    """bestellingen.klant_id: de klant van een bestelling, los van de (niet unieke) naam in klant.
+
+    Schrijvers vullen klant_id bij het invoegen (zie KLANT_ID_FOR_NAME_SQL).
+    Bestaande bestellingen, een gewijzigde klantnaam en een nieuwe klant met
+    de naam van nog ongekoppelde bestellingen worden hier gekoppeld. Bij twee
+    klanten met dezelfde naam blijft klant_id leeg, zodat geen van beide de
+    bestelling te zien krijgt.
+    """
+    cur = conn.cursor()
+    cols = {c[1] for c in cur.execute("PRAGMA table_xinfo(bestellingen)").fetchall()}
+    if "klant_id" not in cols:
+        cur.execute("ALTER TABLE bestellingen ADD COLUMN klant_id INTEGER REFERENCES klanten(id)")
+    _execute_script(
+        cur,
+        f"""
+        CREATE INDEX IF NOT EXISTS idx_bestellingen_klant_id ON bestellingen(klant_id, id);
+        CREATE INDEX IF NOT EXISTS idx_klanten_naam ON klanten(naam);
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_klant_id_au AFTER UPDATE OF klant ON bestellingen
+        WHEN old.klant IS NOT new.klant AND new.klant_id IS old.klant_id
+        BEGIN
+            UPDATE bestellingen SET klant_id = {KLANT_ID_FOR_NAME_SQL.replace("?", "new.klant")} WHERE id = new.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS klanten_klant_id_ai AFTER INSERT ON klanten
+        BEGIN
+            UPDATE bestellingen SET klant_id = new.id
+            WHERE klant = new.naam AND klant_id IS NULL
+              AND (SELECT COUNT(*) FROM klanten WHERE naam = new.naam) = 1;
+        END;
+        """
+    )
+    if "klant_id" not in cols:
+        cur.execute(
+            f"UPDATE bestellingen SET klant_id = {KLANT_ID_FOR_NAME_SQL.replace('?', 'bestellingen.klant')}"
+        )
+
+
+def init_search_index(conn: sqlite3.Connection) -> bool:
+    """Maak de FTS5 zoekindex voor bestellingen en klanten aan (met triggers); False zonder FTS5."""
+    cur = conn.cursor()
+    existing = {
+        r[0]
+        for r in cur.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('bestellingen_fts', 'klanten_fts')"
+        )
+    }
+
+    try:
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS bestellingen_fts USING fts5(
+                klant, ophaal, aflever, datum, status, chauffeur,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS klanten_fts USING fts5(
+                naam, adres, contact,
+                content = 'klanten', content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        # SQLite zonder FTS5: terugvallen op zoeken in Python
+        return False
+
+    # Bestellingen index synchroon houden (chauffeursnaam wordt meegeïndexeerd)
+    _execute_script(
+        cur,
+        """
+        CREATE TRIGGER IF NOT EXISTS bestellingen_fts_ai AFTER INSERT ON bestellingen BEGIN
+            INSERT INTO bestellingen_fts (rowid, klant, ophaal, aflever, datum, status, chauffeur)
+            VALUES (
+                new.id, new.klant, new.ophaal, new.aflever, COALESCE(new.datum, ''), COALESCE(new.status, ''),
+                COALESCE((SELECT naam FROM chauffeurs WHERE id = new.chauffeur_id), '')
+            );
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_fts_ad AFTER DELETE ON bestellingen BEGIN
+            DELETE FROM bestellingen_fts WHERE rowid = old.id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS bestellingen_fts_au AFTER UPDATE ON bestellingen BEGIN
+            DELETE FROM bestellingen_fts WHERE rowid = old.id;
+            INSERT INTO bestellingen_fts (rowid, klant, ophaal, aflever, datum, status, chauffeur)
+            VALUES (
+                new.id, new.klant, new.ophaal, new.aflever, COALESCE(new.datum, ''), COALESCE(new.status, ''),
+                COALESCE((SELECT naam FROM chauffeurs WHERE id = new.chauffeur_id), '')
+            );
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS chauffeurs_fts_au AFTER UPDATE OF naam ON chauffeurs BEGIN
+            UPDATE bestellingen_fts SET chauffeur = new.naam
+            WHERE rowid IN (SELECT id FROM bestellingen WHERE chauffeur_id = new.id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS chauffeurs_fts_ad AFTER DELETE ON chauffeurs BEGIN
+            UPDATE bestellingen_fts SET chauffeur = ''
+            WHERE rowid IN (SELECT id FROM bestellingen WHERE chauffeur_id = old.id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS klanten_fts_ai AFTER INSERT ON klanten BEGIN
+            INSERT INTO klanten_fts (rowid, naam, adres, contact)
+            VALUES (new.id, new.naam, new.adres, COALESCE(new.contact, ''));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS klanten_fts_ad AFTER DELETE ON klanten BEGIN
+            INSERT INTO klanten_fts (klanten_fts, rowid, naam, adres, contact)
+            VALUES ('delete', old.id, old.naam, old.adres, COALESCE(old.contact, ''));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS klanten_fts_au AFTER UPDATE ON klanten BEGIN
+            INSERT INTO klanten_fts (klanten_fts, rowid, naam, adres, contact)
+            VALUES ('delete', old.id, old.naam, old.adres, COALESCE(old.contact, ''));
+            INSERT INTO klanten_fts (rowid, naam, adres, contact)
+            VALUES (new.id, new.naam, new.adres, COALESCE(new.contact, ''));
+        END;
+        """
+    )
+
+    # Eenmalig vullen met bestaande data
+    if "bestellingen_fts" not in existing:
+        cur.execute(
+            """
+            INSERT INTO bestellingen_fts (rowid, klant, ophaal, aflever, datum, status, chauffeur)
+            SELECT b.id, b.klant, b.ophaal, b.aflever, COALESCE(b.datum, ''), COALESCE(b.status, ''),
+                   COALESCE(c.naam, '')
+            FROM bestellingen b LEFT JOIN chauffeurs c ON c.id = b.chauffeur_id
+            """
+        )
+    if "klanten_fts" not in existing:
+        cur.execute("INSERT INTO klanten_fts (klanten_fts) VALUES ('rebuild')")
+    return True
+
+
+def detect_search_index(conn: sqlite3.Connection) -> bool:
+    """True als de FTS5 tabellen bestaan en deze SQLite FTS5 ondersteunt."""
+    names = {
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('bestellingen_fts', 'klanten_fts')"
+        )
+    }
+    if names != {"bestellingen_fts", "klanten_fts"}:
+        return False
+    try:
+        # Faalt met 'no such module: fts5' als de database elders is aangemaakt
+        conn.execute("SELECT 1 FROM bestellingen_fts LIMIT 0").fetchall()
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def init_change_tracking(conn: sqlite3.Connection) -> None:
+    """Versienummer per tabel, opgehoogd door triggers bij elke wijziging."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    for table in TRACKED_TABLES:
+        cur.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+        for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+            cur.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END
+                """
+            )
+
+
+def init_route_plans(conn: sqlite3.Connection) -> None:
+    """Opgeslagen routes per chauffeur per dag; triggers markeren een route als verouderd."""
+    cur = conn.cursor()
+    existing = cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'route_plans'").fetchone()
+    _execute_script(
+        cur,
+        f"""
+        CREATE TABLE IF NOT EXISTS route_plans (
+            chauffeur_id INTEGER NOT NULL,
+            dag TEXT NOT NULL,
+            stale INTEGER NOT NULL DEFAULT 1,
+            berekend_op TEXT,
+            PRIMARY KEY (chauffeur_id, dag)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS route_stops (
+            chauffeur_id INTEGER NOT NULL,
+            dag TEXT NOT NULL,
+            volgorde INTEGER NOT NULL,
+            bestelling_id INTEGER NOT NULL,
+            eta TEXT NOT NULL,
+            afstand_km REAL NOT NULL,
+            PRIMARY KEY (chauffeur_id, dag, volgorde)
+        ) WITHOUT ROWID;
+
+        -- Alleen wijzigingen die de route raken: chauffeur, adres, dag of open/afgesloten.
+        -- bestellingen_route_au wordt altijd opnieuw aangemaakt (v4: NULL-status telt als open)
+        DROP TRIGGER IF EXISTS bestellingen_route_au;
+        CREATE TRIGGER IF NOT EXISTS bestellingen_route_ai AFTER INSERT ON bestellingen
+        WHEN new.chauffeur_id IS NOT NULL
+        BEGIN
+            INSERT INTO route_plans (chauffeur_id, dag, stale)
+            SELECT new.chauffeur_id, COALESCE(new.datum_dag, ''), 1 WHERE 1
+            ON CONFLICT (chauffeur_id, dag) DO UPDATE SET stale = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS bestellingen_route_au AFTER UPDATE ON bestellingen
+        WHEN old.chauffeur_id IS NOT new.chauffeur_id
+            OR old.aflever IS NOT new.aflever
+            OR old.datum_dag IS NOT new.datum_dag
+            OR (COALESCE(old.status, '') IN {CLOSED_STATUSES}) IS NOT (COALESCE(new.status, '') IN {CLOSED_STATUSES})
+        BEGIN
+            UPDATE route_plans SET stale = 1
+            WHERE chauffeur_id = old.chauffeur_id AND dag = COALESCE(old.datum_dag, '');
+            INSERT INTO route_plans (chauffeur_id, dag, stale)
+            SELECT new.chauffeur_id, COALESCE(new.datum_dag, ''), 1 WHERE new.chauffeur_id IS NOT NULL
+            ON CONFLICT (chauffeur_id, dag) DO UPDATE SET stale = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS bestellingen_route_ad AFTER DELETE ON bestellingen
+        WHEN old.chauffeur_id IS NOT NULL
+        BEGIN
+            UPDATE route_plans SET stale = 1
+            WHERE chauffeur_id = old.chauffeur_id AND dag = COALESCE(old.datum_dag, '');
+        END;
+        """
+    )
+    if not existing:
+        # Bestaande toewijzingen krijgen een (nog te berekenen) route
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO route_plans (chauffeur_id, dag, stale)
+            SELECT DISTINCT chauffeur_id, COALESCE(datum_dag, ''), 1 FROM bestellingen
+            WHERE chauffeur_id IS NOT NULL
+            """
+        )
+
+
+def init_web_tables(conn: sqlite3.Connection) -> None:
+    """Tabellen van de webserver: routejobs en idempotency-sleutels van de bulk-import."""
+    cur = conn.cursor()
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS route_jobs (
+            id TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            soort TEXT NOT NULL,
+            status TEXT NOT NULL,
+            invoer TEXT NOT NULL,
+            resultaat TEXT,
+            fout TEXT,
+            aangemaakt_op REAL NOT NULL,
+            klaar_op REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_route_jobs_fingerprint ON route_jobs(fingerprint, aangemaakt_op);
+        """
+    )
+    key_cols = {c[1] for c in cur.execute("PRAGMA table_info(ingest_keys)").fetchall()}
+    if key_cols and "user_id" not in key_cols:
+        # v4 en eerder: sleutels waren globaal. Bewaren onder user_id 0 (onbekende klant),
+        # zodat ze geen sleutel van een echte koppeling meer kunnen blokkeren.
+        cur.execute("ALTER TABLE ingest_keys RENAME TO ingest_keys_v4")
+    _execute_script(
+        cur,
+        """
+        CREATE TABLE IF NOT EXISTS ingest_keys (
+            user_id INTEGER NOT NULL,
+            sleutel TEXT NOT NULL,
+            bestelling_id INTEGER NOT NULL,
+            aangemaakt_op TEXT NOT NULL,
+            PRIMARY KEY (user_id, sleutel)
+        ) WITHOUT ROWID;
+        """
+    )
+    if key_cols and "user_id" not in key_cols:
+        cur.execute(
+            "INSERT INTO ingest_keys (user_id, sleutel, bestelling_id, aangemaakt_op)"
+            " SELECT 0, sleutel, bestelling_id, aangemaakt_op FROM ingest_keys_v4"
+        )
+        cur.execute("DROP TABLE ingest_keys_v4")
@@ -0,0 +1,47 @@
+import base64
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# desktop_main.py, app.py en quickdelivery/ staan in de root van de repo
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture(scope="session")
+def web(tmp_path_factory):
+    """app.py tegen een eigen database; DB_PATH wordt bij de import gelezen."""
+    db_path = tmp_path_factory.mktemp("web") / "quickdelivery.db"
+    os.environ["QUICKDELIVERY_DB"] = str(db_path)
+    import app
+
+    app.app.config["TESTING"] = True
+    yield app
+    app.job_runner.shutdown()
+
+
+@pytest.fixture(scope="session")
+def api_auth(web):
+    """HTTP Basic headers van een planner-account voor de beveiligde API."""
+    with web.pool.connection() as conn:
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO users (email, password, role) VALUES ('api-test@example.com', 'geheim', 'planner')"
+            )
+    token = base64.b64encode(b"api-test@example.com:geheim").decode("ascii")
+    return {"Authorization": f"Basic {token}"}
+
+
+@pytest.fixture
+def tk_root():
+    """Tk-root voor PhotoImage en widgets; overgeslagen zonder display."""
+    import tkinter
+
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip("geen display voor Tk")
+    root.withdraw()
+    yield root
+    root.destroy()
@@ -0,0 +1,83 @@
+"""JSON API: inloggen, keyset-paginering, ETag/304 en foutmeldingen."""
+
+import base64
+
+import pytest
+
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
+
+
+def _klanten(web, count: int, prefix: str) -> list[int]:
+    with web.pool.connection() as conn:
+        with conn:
+            return [
+                conn.execute(
+                    "INSERT INTO klanten (naam, adres, contact) VALUES (?, 'Straat 1', '')", (f"{prefix} {index}",)
+                ).lastrowid
+                for index in range(count)
+            ]
+
+
+@pytest.mark.parametrize(
+    "path", ["/api/klanten", "/api/bestellingen", "/api/status_events", "/api/bestellingen/1/events", "/tracking/stream"]
+)
+def test_requires_login(client, path):
+    response = client.get(path)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"].startswith("Basic")
+
+
+def test_wrong_password_and_role(web, client):
+    wrong = base64.b64encode(b"api-test@example.com:fout").decode("ascii")
+    assert client.get("/api/klanten", headers={"Authorization": f"Basic {wrong}"}).status_code == 401
+    with web.pool.connection() as conn:
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO users (email, password, role) VALUES ('api-klant@example.com', 'geheim', 'klant')"
+            )
+    klant = base64.b64encode(b"api-klant@example.com:geheim").decode("ascii")
+    assert client.get("/api/klanten", headers={"Authorization": f"Basic {klant}"}).status_code == 403
+
+
+def test_keyset_paging(web, client, api_auth):
+    ids = _klanten(web, 5, "Paging")
+    seen = []
+    after_id = 0
+    while after_id is not None:
+        page = client.get(f"/api/klanten?q=Paging&limit=2&after_id={after_id}", headers=api_auth).get_json()
+        assert len(page["items"]) <= 2
+        seen += [item["id"] for item in page["items"]]
+        after_id = page["next_after_id"]
+    assert seen == ids
+
+
+def test_if_none_match_gives_304(web, client, api_auth):
+    _klanten(web, 1, "Etag")
+    first = client.get("/api/klanten?q=Etag", headers=api_auth)
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = client.get("/api/klanten?q=Etag", headers={**api_auth, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+
+def test_etag_changes_after_write(web, client, api_auth):
+    first = client.get("/api/klanten?q=Write", headers=api_auth)
+    _klanten(web, 1, "Write")
+    second = client.get("/api/klanten?q=Write", headers={**api_auth, "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert [item["naam"] for item in second.get_json()["items"]] == ["Write 0"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["/api/klanten?limit=0", "/api/klanten?after_id=x", "/api/bestellingen?chauffeur_id=abc",
+     "/api/bestellingen?datum_van=31-12-2024", "/api/chauffeurs?beschikbaar=ja"],
+)
+def test_invalid_parameters(client, api_auth, query):
+    response = client.get(query, headers=api_auth)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
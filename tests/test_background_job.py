@@ -0,0 +1,25 @@
+"""BackgroundJob: een fout in de taak komt in job.error, ook als het geen database- of bestandsfout is."""
+
+import desktop_main
+
+
+def test_unexpected_error_is_reported(tmp_path):
+    def work(job):
+        return {}["ontbrekende kolom"]
+
+    job = desktop_main.BackgroundJob(tmp_path / "quickdelivery.db", work)
+    job.start()
+    assert job.finished.wait(5)
+    assert isinstance(job.error, KeyError)
+    assert job.result is None
+
+
+def test_error_after_cancel_is_ignored(tmp_path):
+    def work(job):
+        job.cancel()
+        raise RuntimeError("onderbroken")
+
+    job = desktop_main.BackgroundJob(tmp_path / "quickdelivery.db", work)
+    job.start()
+    assert job.finished.wait(5)
+    assert job.error is None
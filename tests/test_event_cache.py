@@ -0,0 +1,41 @@
+"""Event cache: lookups (ook vanuit de worker) gebruiken de cache; de watermark check draait per tick."""
+
+import desktop_main
+from quickdelivery import db, schema
+
+
+def _app(conn):
+    app = desktop_main.QuickDeliveryApp.__new__(desktop_main.QuickDeliveryApp)
+    app.db_conn = conn
+    app.event_cache = desktop_main.EventCache()
+    app._event_cache_signature = None
+    app._event_cache_version = None
+    return app
+
+
+def test_worker_lookup_uses_cache_until_watermark_check(tmp_path):
+    path = tmp_path / "quickdelivery.db"
+    conn = db.connect(path)
+    schema.migrate(conn)
+    with conn:
+        best_id = conn.execute(
+            "INSERT INTO bestellingen (klant, ophaal, aflever, status) VALUES ('K', 'A', 'B', 'Gepland')"
+        ).lastrowid
+        conn.execute("INSERT INTO status_events (bestelling_id, status, timestamp) VALUES (?, 'Gepland', 't1')", (best_id,))
+    app = _app(conn)
+    app._check_event_cache_watermark()
+
+    worker = db.connect(path)
+    first = app._get_status_events_for_bestelling(best_id, conn=worker)
+    assert app._get_status_events_for_bestelling(best_id) is first
+    assert (app.event_cache.hits, app.event_cache.misses) == (1, 1)
+
+    # Een ander proces schrijft een event: pas de volgende tick leegt de cache
+    other = db.connect(path)
+    with other:
+        other.execute("INSERT INTO status_events (bestelling_id, status, timestamp) VALUES (?, 'Onderweg', 't2')", (best_id,))
+    assert app._get_status_events_for_bestelling(best_id, conn=worker) is first
+    app._check_event_cache_watermark()
+    assert [ev["status"] for ev in app._get_status_events_for_bestelling(best_id, conn=worker)] == ["Onderweg", "Gepland"]
+    for c in (other, worker, conn):
+        c.close()
@@ -0,0 +1,48 @@
+"""Wijzigingsfeed en SSE-backlog: geen gemiste events tussen backlog en feed."""
+
+import threading
+import time
+
+from quickdelivery import db, feed
+
+
+def _insert_event(db_path, bestelling_id: int = 1) -> int:
+    conn = db.connect(db_path)
+    try:
+        with conn:
+            return conn.execute(
+                "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking)"
+                " VALUES (?, 'Onderweg', datetime('now','localtime'), 'test')",
+                (bestelling_id,),
+            ).lastrowid
+    finally:
+        conn.close()
+
+
+def test_event_right_after_subscribe_is_delivered(web, monkeypatch):
+    connect = db.connect
+
+    def slow_connect(*args, **kwargs):
+        # Poller-thread start traag: een event kan vóór zijn eerste query vallen
+        if threading.current_thread() is not threading.main_thread():
+            time.sleep(0.3)
+        return connect(*args, **kwargs)
+
+    monkeypatch.setattr(feed.db, "connect", slow_connect)
+    change_feed = feed.ChangeFeed(web.DB_PATH, interval=0.05)
+    sub = change_feed.subscribe()
+    try:
+        event_id = _insert_event(web.DB_PATH)
+        event = sub.get(timeout=5)
+        assert event is not None and event["id"] == event_id
+    finally:
+        change_feed.unsubscribe(sub)
+        change_feed.close()
+
+
+def test_fleet_backlog_is_paged_until_caught_up(web, monkeypatch):
+    monkeypatch.setattr(web, "SSE_BACKLOG_PAGE_SIZE", 3)
+    first = _insert_event(web.DB_PATH)
+    ids = [first] + [_insert_event(web.DB_PATH) for _ in range(9)]
+    backlog = [event["id"] for event in web._events_after(first - 1)]
+    assert backlog == ids
@@ -0,0 +1,31 @@
+"""CSV-import van bestellingen: chauffeurs op id of op naam."""
+
+import pytest
+
+import desktop_main
+
+CHAUFFEURS = {"3": 3, "piet": 3, "12": 12, "2fast koeriers": 12}
+
+
+@pytest.mark.parametrize(
+    ("chauffeur", "expected"),
+    [
+        ("3", 3),
+        ("12: 2Fast Koeriers", 12),
+        ("Piet", 3),
+        ("2Fast Koeriers", 12),
+        ("(Geen)", None),
+        ("", None),
+    ],
+)
+def test_chauffeur_by_id_or_name(chauffeur, expected):
+    app = desktop_main.QuickDeliveryApp.__new__(desktop_main.QuickDeliveryApp)
+    values = {"klant": "K", "ophaal": "A", "aflever": "B", "datum": "", "status": "", "chauffeur": chauffeur}
+    row = app._parse_import_bestelling(values, CHAUFFEURS, {"": ""})
+    assert row[-1] == expected
+
+
+def test_unknown_chauffeur_is_rejected():
+    app = desktop_main.QuickDeliveryApp.__new__(desktop_main.QuickDeliveryApp)
+    values = {"klant": "K", "ophaal": "A", "aflever": "B", "datum": "", "status": "", "chauffeur": "2Slow"}
+    assert app._parse_import_bestelling(values, CHAUFFEURS, {"": ""}) == "onbekende chauffeur: 2Slow"
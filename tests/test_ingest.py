@@ -0,0 +1,83 @@
+"""Bulk-import: inloggen, de body-limiet (ook chunked) en idempotency-sleutels per gebruiker."""
+
+import base64
+import io
+import json
+import sqlite3
+
+import pytest
+
+from quickdelivery import schema
+
+
+def _ndjson(count: int) -> bytes:
+    return b"".join(
+        json.dumps({"klant": f"K{i}", "ophaal": "A", "aflever": "B"}).encode() + b"\n" for i in range(count)
+    )
+
+
+def _post_chunked(client, body: bytes, content_type: str, auth: dict):
+    # Geen Content-Length: zoals een chunked upload achter gunicorn
+    return client.post(
+        "/api/bestellingen/batch",
+        input_stream=io.BytesIO(body),
+        headers={**auth, "Content-Type": content_type, "Transfer-Encoding": "chunked"},
+        environ_overrides={"wsgi.input_terminated": True},
+    )
+
+
+@pytest.mark.parametrize("content_type", ["application/x-ndjson", "application/json"])
+def test_chunked_body_over_limit_is_413(web, api_auth, monkeypatch, content_type):
+    monkeypatch.setattr(web, "BATCH_MAX_BYTES", 1000)
+    body = _ndjson(50) if content_type == "application/x-ndjson" else json.dumps([{"klant": "K" * 2000}]).encode()
+    assert _post_chunked(web.app.test_client(), body, content_type, api_auth).status_code == 413
+
+
+def test_content_length_over_limit_is_413(web, api_auth, monkeypatch):
+    monkeypatch.setattr(web, "BATCH_MAX_BYTES", 1000)
+    response = web.app.test_client().post(
+        "/api/bestellingen/batch", data=_ndjson(50), content_type="application/x-ndjson", headers=api_auth
+    )
+    assert response.status_code == 413
+
+
+def test_chunked_body_under_limit_is_ingested(web, api_auth):
+    response = _post_chunked(web.app.test_client(), _ndjson(3), "application/x-ndjson", api_auth)
+    assert response.status_code == 200
+    assert response.get_json()["created"] == 3
+
+
+def test_batch_requires_login(web):
+    response = web.app.test_client().post("/api/bestellingen/batch", json=[{"klant": "K", "ophaal": "A", "aflever": "B"}])
+    assert response.status_code == 401
+
+
+def test_idempotency_key_is_per_user(web, api_auth):
+    with web.pool.connection() as conn:
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO users (email, password, role) VALUES ('shop2@example.com', 'geheim', 'manager')"
+            )
+    other = {"Authorization": "Basic " + base64.b64encode(b"shop2@example.com:geheim").decode("ascii")}
+    record = [{"klant": "K", "ophaal": "A", "aflever": "B", "idempotency_key": "order-1"}]
+    client = web.app.test_client()
+    first = client.post("/api/bestellingen/batch", json=record, headers=api_auth).get_json()
+    repeat = client.post("/api/bestellingen/batch", json=record, headers=api_auth).get_json()
+    other_shop = client.post("/api/bestellingen/batch", json=record, headers=other).get_json()
+    assert first["created"] == 1
+    assert repeat["duplicate"] == 1 and repeat["results"][0]["id"] == first["results"][0]["id"]
+    assert other_shop["created"] == 1 and other_shop["results"][0]["id"] != first["results"][0]["id"]
+
+
+def test_v4_keys_are_kept_without_user(tmp_path):
+    conn = sqlite3.connect(tmp_path / "v4.db")
+    conn.execute(
+        "CREATE TABLE ingest_keys (sleutel TEXT PRIMARY KEY, bestelling_id INTEGER NOT NULL,"
+        " aangemaakt_op TEXT NOT NULL) WITHOUT ROWID"
+    )
+    conn.execute("INSERT INTO ingest_keys VALUES ('oud', 7, '2024-01-01 10:00:00')")
+    conn.commit()
+    schema.migrate(conn)
+    assert conn.execute("SELECT user_id, sleutel, bestelling_id FROM ingest_keys").fetchall() == [(0, "oud", 7)]
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'ingest_keys_v4'").fetchone() is None
+    conn.close()
@@ -0,0 +1,58 @@
+"""Routejobs: een job die blijft hangen wordt na JOB_TIMEOUT_S als mislukt gemeld."""
+
+import json
+import time
+import uuid
+
+from quickdelivery import jobs
+
+
+def _stale_job(web) -> str:
+    job_id = uuid.uuid4().hex
+    with web.pool.connection() as conn:
+        with conn:
+            conn.execute(
+                "INSERT INTO route_jobs (id, fingerprint, soort, status, invoer, aangemaakt_op)"
+                " VALUES (?, ?, 'stops', 'bezig', '{}', ?)",
+                (job_id, job_id, time.time() - jobs.JOB_TIMEOUT_S - 1),
+            )
+    return job_id
+
+
+def test_get_expires_stale_job(web, api_auth):
+    job_id = _stale_job(web)
+    response = web.app.test_client().get(f"/api/jobs/{job_id}", headers=api_auth)
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "mislukt"
+    assert response.get_json()["fout"] == "Verlopen"
+
+
+def test_stream_ends_for_stale_job(web, api_auth):
+    job_id = _stale_job(web)
+    body = web.app.test_client().get(f"/api/jobs/{job_id}/stream", headers=api_auth).get_data(as_text=True)
+    data = json.loads(body.split("data: ", 1)[1])
+    assert data["status"] == "mislukt"
+
+
+def test_late_result_does_not_revive_expired_job(web):
+    job_id = _stale_job(web)
+    with web.pool.connection() as conn:
+        web.job_runner.get(conn, job_id)
+    web.job_runner._finish(job_id, {"km": 1.0}, None)
+    with web.pool.connection() as conn:
+        assert web.job_runner.get(conn, job_id)["status"] == "mislukt"
+
+
+def test_dag_job_only_proposes(web):
+    with web.pool.connection() as conn:
+        with conn:
+            conn.execute("INSERT INTO chauffeurs (naam, voertuig, beschikbaar) VALUES ('Job test', '', 1)")
+            best_id = conn.execute(
+                "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status) VALUES ('Job', 'A', 'B', '2031-01-02', 'Gepland')"
+            ).lastrowid
+    result = jobs.run_job(web.DB_PATH, "dag", {"dag": "2031-01-02"})
+    assert result["opgeslagen"] is False
+    assert any(best_id in route["bestelling_ids"] for route in result["routes"])
+    with web.pool.connection() as conn:
+        assert conn.execute("SELECT chauffeur_id FROM bestellingen WHERE id = ?", (best_id,)).fetchone()[0] is None
+        assert conn.execute("SELECT COUNT(*) FROM route_stops WHERE dag = '2031-01-02'").fetchone()[0] == 0
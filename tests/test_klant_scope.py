@@ -0,0 +1,63 @@
+"""Klanten zien alleen bestellingen met hun eigen klant_id, ook bij dubbele klantnamen."""
+
+import sqlite3
+
+import desktop_main
+from quickdelivery import ingest, schema
+
+
+def _scoped_ids(conn: sqlite3.Connection, klant_id: int) -> list[int]:
+    app = desktop_main.QuickDeliveryApp.__new__(desktop_main.QuickDeliveryApp)
+    app.current_role = "klant"
+    app.current_klant_id = klant_id
+    where, params = app._bestellingen_where(app._role_scope_filters())
+    return [r[0] for r in conn.execute(f"SELECT b.id FROM bestellingen b WHERE {where} ORDER BY b.id", params)]
+
+
+def test_backfill_links_only_unique_names(tmp_path):
+    conn = sqlite3.connect(tmp_path / "v5.db")
+    conn.executescript(
+        """
+        CREATE TABLE klanten (id INTEGER PRIMARY KEY AUTOINCREMENT, naam TEXT NOT NULL, adres TEXT, contact TEXT);
+        CREATE TABLE bestellingen (id INTEGER PRIMARY KEY AUTOINCREMENT, klant TEXT NOT NULL, ophaal TEXT NOT NULL,
+            aflever TEXT NOT NULL, datum TEXT, status TEXT NOT NULL, chauffeur_id INTEGER);
+        INSERT INTO klanten (id, naam) VALUES (1, 'Bakker'), (2, 'Jansen'), (3, 'Jansen');
+        INSERT INTO bestellingen (klant, ophaal, aflever, status) VALUES
+            ('Bakker', 'A', 'B', 'Gepland'), ('Jansen', 'A', 'B', 'Gepland'), ('Onbekend', 'A', 'B', 'Gepland');
+        """
+    )
+    schema.migrate(conn)
+    rows = conn.execute("SELECT klant, klant_id FROM bestellingen ORDER BY id").fetchall()
+    assert rows == [("Bakker", 1), ("Jansen", None), ("Onbekend", None)]
+    assert _scoped_ids(conn, 1) == [1]
+    assert _scoped_ids(conn, 2) == []
+    assert _scoped_ids(conn, 3) == []
+    conn.close()
+
+
+def test_new_orders_and_klanten_are_linked(tmp_path):
+    conn = sqlite3.connect(tmp_path / "quickdelivery.db")
+    schema.migrate(conn)
+    conn.executemany("INSERT INTO klanten (naam, adres) VALUES (?, 'A')", [("Smit",), ("Visser",), ("Visser",)])
+    conn.commit()
+    smit, visser_a, visser_b = [r[0] for r in conn.execute(
+        "SELECT id FROM klanten WHERE naam IN ('Smit', 'Visser') ORDER BY id"
+    )]
+    results = ingest.ingest(conn, [
+        {"klant": "Smit", "ophaal": "A", "aflever": "B"},
+        {"klant": "Visser", "ophaal": "A", "aflever": "B"},
+        {"klant": "De Vries", "ophaal": "A", "aflever": "B"},
+    ], user_id=1)
+    ids = [r["id"] for r in results]
+    assert _scoped_ids(conn, smit) == [ids[0]]
+    assert _scoped_ids(conn, visser_a) == _scoped_ids(conn, visser_b) == []
+
+    # De eerste klant met deze naam neemt de ongekoppelde bestelling over
+    de_vries = conn.execute("INSERT INTO klanten (naam, adres) VALUES ('De Vries', 'A')").lastrowid
+    assert _scoped_ids(conn, de_vries) == [ids[2]]
+
+    # Een andere klantnaam op de bestelling verplaatst hem naar die klant
+    conn.execute("UPDATE bestellingen SET klant = 'Smit' WHERE id = ?", (ids[2],))
+    assert _scoped_ids(conn, smit) == [ids[0], ids[2]]
+    assert _scoped_ids(conn, de_vries) == []
+    conn.close()
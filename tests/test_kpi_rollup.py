@@ -0,0 +1,28 @@
+"""KPI rollup: gewijzigde dagen worden per chunk verwerkt, los van de rapporten."""
+
+import desktop_main
+from quickdelivery import db, schema
+
+
+def test_rollup_processes_dirty_days_in_chunks(tmp_path):
+    conn = db.connect(tmp_path / "quickdelivery.db")
+    schema.migrate(conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status) VALUES ('K', 'A', 'B', date('2024-01-01', ?), ?)",
+            [(f"+{i % 30} days", "Afgeleverd" if i % 3 == 0 else "Gepland") for i in range(90)],
+        )
+    app = desktop_main.QuickDeliveryApp.__new__(desktop_main.QuickDeliveryApp)
+
+    steps = []
+    while days := app._kpi_rollup_chunk(conn, chunk_size=7):
+        steps.append(days)
+
+    # 30 dagen, één (lege) chauffeur per dag
+    assert sum(steps) == 30
+    assert conn.execute("SELECT COUNT(*) FROM chauffeur_daily_kpi").fetchone()[0] == 30
+    assert max(steps) == 7
+    assert not conn.execute("SELECT 1 FROM kpi_dirty_days").fetchone()
+    totals = conn.execute("SELECT SUM(bestellingen), SUM(afgeleverd) FROM chauffeur_daily_kpi").fetchone()
+    assert tuple(totals) == (90, 30)
+    conn.close()
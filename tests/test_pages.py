@@ -0,0 +1,35 @@
+"""Pagina's: widgets staan alleen op de app zolang hun pagina zichtbaar is."""
+
+from types import SimpleNamespace
+
+import desktop_main
+
+
+def _app():
+    return SimpleNamespace(_pagers={})
+
+
+def test_detach_removes_page_widgets():
+    app = _app()
+    page = desktop_main.Page("klanten", frame=None)
+    tree, pager = object(), {"index": 0}
+    page.widgets["klanten_tree"] = tree
+    page.pagers["klanten"] = pager
+
+    page.attach(app)
+    assert app.klanten_tree is tree and app._pagers["klanten"] is pager
+
+    page.detach(app)
+    assert not hasattr(app, "klanten_tree")
+    assert "klanten" not in app._pagers
+
+
+def test_detach_keeps_widgets_of_other_page():
+    app = _app()
+    old, new = desktop_main.Page("klant_dashboard", None), desktop_main.Page("klant_bestellingen", None)
+    old.widgets["klant_tree"], new.widgets["klant_tree"] = object(), object()
+    old.attach(app)
+    new.attach(app)
+    # De oude pagina mag het attribuut van de nieuwe niet weghalen
+    old.detach(app)
+    assert app.klant_tree is new.widgets["klant_tree"]
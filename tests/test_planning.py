@@ -0,0 +1,54 @@
+"""Planning: verdeling over chauffeurs (assign_orders) en de stopvolgorde (compute_route_stops)."""
+
+from quickdelivery.planning import assign_orders
+from quickdelivery.routing import compute_route_stops
+
+CHAUFFEURS = [{"id": 1, "naam": "Piet"}, {"id": 2, "naam": "Anna"}, {"id": 3, "naam": "Kees"}]
+
+
+def _order(order_id: int, chauffeur_id: int | None = None, aflever: str = "Straat 1, Stad") -> dict:
+    return {"id": order_id, "klant": "K", "aflever": aflever, "chauffeur_id": chauffeur_id}
+
+
+def _ids(per_chauffeur: dict[int, list[dict]]) -> dict[int, list[int]]:
+    return {ch_id: [o["id"] for o in orders] for ch_id, orders in per_chauffeur.items()}
+
+
+def test_unassigned_orders_go_to_least_loaded_lowest_id_first():
+    orders = [_order(i) for i in range(1, 8)]
+    assert _ids(assign_orders(orders, CHAUFFEURS)) == {1: [1, 4, 7], 2: [2, 5], 3: [3, 6]}
+
+
+def test_existing_assignment_is_kept_and_counts_as_load():
+    orders = [_order(1, chauffeur_id=2), _order(2, chauffeur_id=2), _order(3), _order(4), _order(5)]
+    assert _ids(assign_orders(orders, CHAUFFEURS)) == {1: [3, 5], 2: [1, 2], 3: [4]}
+
+
+def test_assignment_to_unavailable_chauffeur_is_redistributed():
+    # Chauffeur 9 staat niet in de lijst van beschikbare chauffeurs
+    orders = [_order(1, chauffeur_id=9), _order(2, chauffeur_id=1)]
+    assert _ids(assign_orders(orders, CHAUFFEURS[:2])) == {1: [2], 2: [1]}
+
+
+def test_no_chauffeurs_assigns_nothing():
+    assert assign_orders([_order(1), _order(2)], []) == {}
+
+
+def test_route_groups_nearby_addresses_and_counts_eta_from_eight():
+    orders = [
+        _order(1, aflever="Kerkstraat 1, Utrecht"),
+        _order(2, aflever="Markt 5, Amsterdam"),
+        _order(3, aflever="Kerkstraat 3, Utrecht"),
+    ]
+    stops = compute_route_stops(orders)
+    assert [s["bestelling_id"] for s in stops] == [1, 3, 2]
+    assert [s["volgorde"] for s in stops] == [1, 2, 3]
+    # Depot -> 12 km (24 min), stop 5 min, dan 7 km (14 min), stop 5 min, dan 12 km
+    assert [s["afstand_km"] for s in stops] == [12.0, 7.0, 12.0]
+    assert [s["eta"] for s in stops] == ["08:24", "08:43", "09:12"]
+
+
+def test_route_skips_orders_without_address():
+    stops = compute_route_stops([_order(1, aflever=""), _order(2, aflever="  "), _order(3)])
+    assert [s["bestelling_id"] for s in stops] == [3]
+    assert compute_route_stops([]) == []
@@ -0,0 +1,67 @@
+"""reconcile_tree: alleen de Tk calls die nodig zijn, met vaste iids."""
+
+import desktop_main
+
+
+class FakeTree:
+    """Houdt de Treeview calls bij die reconcile_tree doet (geen display nodig)."""
+
+    def __init__(self, children=()):
+        self.children = list(children)
+        self.calls = []
+
+    def get_children(self):
+        return tuple(self.children)
+
+    def delete(self, *iids):
+        self.calls.append(("delete", iids))
+        self.children = [c for c in self.children if c not in iids]
+
+    def insert(self, parent, index, iid, values, tags):
+        self.calls.append(("insert", iid))
+        self.children.insert(index, iid)
+
+    def item(self, iid, values, tags):
+        self.calls.append(("item", iid, values))
+
+    def move(self, iid, parent, index):
+        self.calls.append(("move", iid, index))
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+
+def _rows(*items):
+    return [(iid, (value,), ()) for iid, value in items]
+
+
+def test_first_render_replaces_unknown_rows():
+    tree = FakeTree(children=["oud"])
+    desktop_main.reconcile_tree(tree, _rows((1, "a"), (2, "b")))
+    assert tree.calls == [("delete", ("oud",)), ("insert", "1"), ("insert", "2")]
+    assert tree.children == ["1", "2"]
+
+
+def test_unchanged_rows_cost_no_calls():
+    tree = FakeTree()
+    desktop_main.reconcile_tree(tree, _rows((1, "a"), (2, "b")))
+    tree.calls.clear()
+    desktop_main.reconcile_tree(tree, _rows((1, "a"), (2, "b")))
+    assert tree.calls == []
+
+
+def test_only_changed_added_and_removed_rows_are_touched():
+    tree = FakeTree()
+    desktop_main.reconcile_tree(tree, _rows((1, "a"), (2, "b"), (3, "c")))
+    tree.calls.clear()
+    desktop_main.reconcile_tree(tree, _rows((1, "a"), (3, "c2"), (4, "d")))
+    assert tree.calls == [("delete", ("2",)), ("item", "3", ("c2",)), ("insert", "4")]
+    assert tree.children == ["1", "3", "4"]
+
+
+def test_rows_are_moved_only_when_the_order_changes():
+    tree = FakeTree()
+    desktop_main.reconcile_tree(tree, _rows((1, "a"), (2, "b")))
+    tree.calls.clear()
+    desktop_main.reconcile_tree(tree, _rows((2, "b"), (1, "a")))
+    assert [c[0] for c in tree.calls] == ["move", "move"]
+    assert tree.children == ["2", "1"]
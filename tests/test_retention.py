@@ -0,0 +1,43 @@
+"""Archiveren van status events van afgesloten bestellingen, venster voor venster."""
+
+import desktop_main
+from quickdelivery import db, schema
+
+archive_chunk = desktop_main.QuickDeliveryApp._archive_closed_events_chunk
+
+
+def test_archive_walks_all_orders_in_windows(tmp_path, monkeypatch):
+    monkeypatch.setattr(desktop_main, "RETENTION_CHUNK_SIZE", 7)
+    conn = db.connect(tmp_path / "quickdelivery.db")
+    schema.migrate(conn)
+    statuses = ("Gepland", "Onderweg", "Afgeleverd", "Geannuleerd")
+    with conn:
+        conn.executemany(
+            "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status) VALUES ('K', 'A', 'B', '', ?)",
+            [(statuses[i % 4],) for i in range(40)],
+        )
+        # Even ids: laatste event lang geleden; oneven: vandaag
+        conn.execute(
+            "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking)"
+            " SELECT id, status, CASE WHEN id % 2 = 0 THEN '2020-01-01 10:00:00'"
+            " ELSE datetime('now', 'localtime') END, '' FROM bestellingen"
+        )
+    expected = {
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM bestellingen WHERE id % 2 = 0 AND status IN ('Afgeleverd', 'Geannuleerd')"
+        )
+    }
+
+    after_id, steps = 0, 0
+    while after_id is not None:
+        after_id = archive_chunk(None, conn, after_id)
+        steps += 1
+
+    assert steps == 40 // 7 + 1
+    assert {row[0] for row in conn.execute("SELECT DISTINCT bestelling_id FROM status_events_archive")} == expected
+    assert not conn.execute(
+        f"SELECT 1 FROM status_events WHERE bestelling_id IN ({', '.join(map(str, expected))})"
+    ).fetchone()
+    assert conn.execute("SELECT COUNT(*) FROM status_events").fetchone()[0] == 40 - len(expected)
+    conn.close()
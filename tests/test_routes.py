@@ -0,0 +1,71 @@
+"""Opgeslagen chauffeursroutes: stale-trigger en de leveringenlijst van de chauffeur."""
+
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import desktop_main
+from quickdelivery import db, schema
+
+App = desktop_main.QuickDeliveryApp
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = db.connect(tmp_path / "quickdelivery.db")
+    schema.migrate(conn)
+    with conn:
+        conn.execute("DELETE FROM chauffeurs")
+        conn.execute("INSERT INTO chauffeurs (id, naam, voertuig, beschikbaar) VALUES (1, 'Piet', 'Bus', 1)")
+    yield conn
+    conn.close()
+
+
+def _order(conn, datum: str, status: str | None = "Gepland") -> int:
+    with conn:
+        return conn.execute(
+            "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status, chauffeur_id)"
+            " VALUES ('K', 'Depot', 'Straat 1, Stad', ?, ?, 1)",
+            (datum, status),
+        ).lastrowid
+
+
+def _stale(conn, dag: str) -> int | None:
+    row = conn.execute("SELECT stale FROM route_plans WHERE chauffeur_id = 1 AND dag = ?", (dag,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_status(conn, bestelling_id: int, status: str | None) -> None:
+    with conn:
+        conn.execute("UPDATE route_plans SET stale = 0")
+        conn.execute("UPDATE bestellingen SET status = ? WHERE id = ?", (status, bestelling_id))
+
+
+def test_null_status_counts_as_open(conn):
+    dag = "2030-01-01"
+    bestelling_id = _order(conn, dag, status=None)
+    # NULL -> Gepland: blijft open, route hoeft niet opnieuw
+    _set_status(conn, bestelling_id, "Gepland")
+    assert _stale(conn, dag) == 0
+    _set_status(conn, bestelling_id, None)
+    assert _stale(conn, dag) == 0
+    # NULL -> Afgeleverd: valt uit de route
+    _set_status(conn, bestelling_id, "Afgeleverd")
+    assert _stale(conn, dag) == 1
+
+
+def test_deliveries_skip_past_days_and_update_upcoming_only(conn):
+    today = datetime.date.today()
+    yesterday = (today - datetime.timedelta(days=1)).isoformat()
+    tomorrow = (today + datetime.timedelta(days=1)).isoformat()
+    old, new, undated = _order(conn, yesterday), _order(conn, tomorrow), _order(conn, "")
+    app = SimpleNamespace(db_conn=conn, current_chauffeur_id=1)
+
+    assert App._update_route_plans(app, 1, upcoming_only=True) == 2
+    assert _stale(conn, yesterday) == 1 and _stale(conn, tomorrow) == 0 and _stale(conn, "") == 0
+
+    App._update_route_plans(app, 1)
+    ids = [d["id"] for d in App._get_chauffeur_deliveries_sorted(app)]
+    assert ids == [undated, new]
+    assert old not in ids
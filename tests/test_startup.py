@@ -0,0 +1,41 @@
+"""Warme start van de desktop-app binnen STARTUP_BUDGET_MS, met FTS actief."""
+
+import tkinter
+
+import pytest
+
+import desktop_main
+
+
+def _tk_available() -> bool:
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return False
+    root.destroy()
+    return True
+
+
+pytestmark = pytest.mark.skipif(not _tk_available(), reason="geen display voor Tk")
+
+
+def _start(monkeypatch, db_path) -> desktop_main.QuickDeliveryApp:
+    monkeypatch.setenv(desktop_main.DB_PATH_ENV, str(db_path))
+    # Logo-dialoog zou de test blokkeren
+    monkeypatch.setattr(desktop_main.QuickDeliveryApp, "_ensure_logo_asset", lambda self: None)
+    app = desktop_main.QuickDeliveryApp()
+    app.update_idletasks()  # draait _finish_startup (after_idle)
+    return app
+
+
+def test_warm_start_within_budget(tmp_path, monkeypatch):
+    db_path = tmp_path / "quickdelivery.db"
+    # Koude start: schema, migraties en seed
+    _start(monkeypatch, db_path)._on_close()
+
+    app = _start(monkeypatch, db_path)
+    try:
+        assert app.startup_ms <= desktop_main.STARTUP_BUDGET_MS, app.startup_report()
+        assert app._fts_enabled, "FTS moet ook na de eerste start gebruikt worden"
+    finally:
+        app._on_close()
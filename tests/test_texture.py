@@ -0,0 +1,54 @@
+"""De getegelde achtergrondtextuur is pixel-gelijk aan het oude algoritme (één put per stip)."""
+
+from types import SimpleNamespace
+
+import desktop_main
+
+BASE = "#FBF7F1"
+SIZE = desktop_main.TEXTURE_TILE_SIZE
+
+
+def _old_dots(w: int, h: int):
+    """De oude _redraw_texture-lus: (kleur, x0, y0, x1, y1) per stip."""
+    step = 5
+    for y in range(0, h, step):
+        for x in range(0, w, step):
+            n = (x * 1103515245 + y * 12345 + 67890) & 0xFFFFFFFF
+            r = (n >> 16) & 0xFF
+            if r < 55:
+                yield "#EDE0D8", x, y, x + 2, y + 2
+            elif r < 80:
+                yield "#E7D6CC", x + 1, y + 1, x + 3, y + 3
+
+
+def _old_pixels(w: int, h: int) -> list[list[str]]:
+    grid = [[BASE] * w for _ in range(h)]
+    for color, x0, y0, x1, y1 in _old_dots(w, h):
+        # PhotoImage met vaste afmetingen knipt af aan de rand
+        for y in range(y0, min(y1, h)):
+            for x in range(x0, min(x1, w)):
+                grid[y][x] = color
+    return grid
+
+
+def test_tile_rows_match_old_algorithm():
+    assert desktop_main.texture_tile_rows(SIZE, BASE) == _old_pixels(SIZE, SIZE)
+
+
+def test_tile_photoimage_matches_old_photoimage(tk_root):
+    import tkinter
+
+    old = tkinter.PhotoImage(width=SIZE, height=SIZE)
+    old.put(BASE, to=(0, 0, SIZE, SIZE))
+    for color, x0, y0, x1, y1 in _old_dots(SIZE, SIZE):
+        old.put(color, to=(x0, y0, x1, y1))
+
+    new = desktop_main.QuickDeliveryApp._render_texture_tile(SimpleNamespace(brand_bg=BASE))
+    assert (new.width(), new.height()) == (SIZE, SIZE)
+    assert new.tk.call(new, "data") == old.tk.call(old, "data")
+
+    # 'copy -to' herhaalt de tegel over een groter gebied
+    big = tkinter.PhotoImage(width=SIZE * 2, height=SIZE)
+    big.tk.call(big, "copy", new, "-to", 0, 0, SIZE * 2, SIZE)
+    for x, y in ((0, 0), (3, 7), (SIZE - 1, SIZE - 1), (123, 45)):
+        assert big.get(x + SIZE, y) == new.get(x, y)
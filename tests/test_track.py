@@ -0,0 +1,59 @@
+"""Publieke statuspagina: cache-miss, cache-hit, 304 en invalidatie door een nieuw event."""
+
+import pytest
+
+from quickdelivery import db
+
+
+def _new_order(web) -> int:
+    conn = db.connect(web.DB_PATH)
+    try:
+        with conn:
+            bestelling_id = conn.execute(
+                "INSERT INTO bestellingen (klant, ophaal, aflever, datum, status)"
+                " VALUES ('Test', 'A', 'B', '2026-10-19', 'Gepland')"
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking)"
+                " VALUES (?, 'Gepland', datetime('now','localtime'), 'Aangemaakt')",
+                (bestelling_id,),
+            )
+        return bestelling_id
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("prefix", ["/api/track/", "/track/"])
+def test_miss_hit_not_modified_and_invalidation(web, prefix):
+    client = web.app.test_client()
+    bestelling_id = _new_order(web)
+    url = f"{prefix}{bestelling_id}"
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    second = client.get(url)
+    assert second.status_code == 200 and second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == etag and second.data == first.data
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b""
+
+    conn = db.connect(web.DB_PATH)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO status_events (bestelling_id, status, timestamp, opmerking)"
+                " VALUES (?, 'Onderweg', datetime('now','localtime'), '')",
+                (bestelling_id,),
+            )
+    finally:
+        conn.close()
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["X-Cache"] == "MISS"
+    assert changed.headers["ETag"] != etag
+
+
+def test_unknown_order_is_404(web):
+    assert web.app.test_client().get("/api/track/999999999").status_code == 404
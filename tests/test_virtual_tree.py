@@ -0,0 +1,45 @@
+"""VirtualTreeview: buurblokken worden op key opgehaald, alleen een sprong gebruikt offset."""
+
+from collections import OrderedDict
+
+import desktop_main
+
+IDS = [n * 3 + (n % 2) for n in range(1, 1001)]
+
+
+def _table(calls: list, block_size: int = 50) -> desktop_main.VirtualTreeview:
+    def fetch_rows(offset, limit, after_key=None, before_key=None):
+        calls.append("after" if after_key is not None else "before" if before_key is not None else "offset")
+        if after_key is not None:
+            ids = [i for i in IDS if i > after_key][:limit]
+        elif before_key is not None:
+            ids = [i for i in IDS if i < before_key][-limit:]
+        else:
+            ids = IDS[offset:offset + limit]
+        return [(i, (i,), ()) for i in ids]
+
+    # Zonder Tk: alleen de blokcache, niet de widgets
+    table = desktop_main.VirtualTreeview.__new__(desktop_main.VirtualTreeview)
+    table.fetch_rows = fetch_rows
+    table.block_size = block_size
+    table.max_blocks = 4
+    table._blocks = OrderedDict()
+    return table
+
+
+def test_scrolling_down_uses_keyset():
+    calls = []
+    table = _table(calls)
+    assert [table._row_at(index)[0] for index in range(len(IDS))] == IDS
+    assert calls.count("offset") == 1
+    assert calls.count("after") == len(IDS) // table.block_size - 1
+
+
+def test_jump_then_scroll_up_uses_one_offset():
+    calls = []
+    table = _table(calls)
+    start = 777
+    rows = [table._row_at(index)[0] for index in range(start, 0, -1)]
+    assert rows == IDS[start:0:-1]
+    assert calls.count("offset") == 1
+    assert calls.count("after") == 0